@@ -0,0 +1,130 @@
+"""
+Admin notification recipients, cached.
+
+Nearly every notification task calls get_admin_emails(); the staff query now
+runs once per change instead of once per email. The list is held in process
+(ADMIN_EMAILS_LOCAL_SECONDS) and in the shared Redis cache (settings.CACHES,
+ADMIN_EMAILS_CACHE_SECONDS). When a User is saved or deleted or group membership
+changes, the receivers below (connected from ApiConfig.ready) drop this
+process's copy and the Redis entry. Every other web or Celery process then
+picks up the change once its local copy expires. Without Redis (per-process
+LocMem cache) only the local tier is used, since a LocMem entry could not be
+invalidated from another process. Redis errors are logged and never raised:
+reads fall back to the database and invalidation skips the shared delete.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+ADMIN_EMAILS_CACHE_KEY = 'api:admin-emails'
+ADMIN_EMAILS_CACHE_SECONDS = 60 * 60
+ADMIN_EMAILS_LOCAL_SECONDS = 30
+
+User = get_user_model()
+
+_local = {'emails': None, 'expires': 0.0}
+_lock = threading.Lock()
+
+
+def _default_recipients():
+    default_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'admin@example.com')
+    return [default_email] if default_email else ['admin@example.com']
+
+
+def _shared_cache():
+    """The default cache when it is shared between processes, else None."""
+    cache = caches['default']
+    return None if isinstance(cache, LocMemCache) else cache
+
+
+def _query_admin_emails():
+    # Staff users first, then superusers; only the email column is fetched.
+    emails = list(
+        User.objects.filter(is_staff=True, is_active=True).exclude(email='').values_list('email', flat=True)
+    )
+    if not emails:
+        emails = list(
+            User.objects.filter(is_superuser=True, is_active=True).exclude(email='').values_list('email', flat=True)
+        )
+    return emails
+
+
+def admin_emails():
+    """Staff (else superuser) emails; DEFAULT_FROM_EMAIL when there are none."""
+    now = time.monotonic()
+    emails = _local['emails']
+    if emails is not None and now < _local['expires']:
+        return list(emails)
+    with _lock:
+        shared = _shared_cache()
+        emails = None
+        if shared is not None:
+            try:
+                emails = shared.get(ADMIN_EMAILS_CACHE_KEY)
+            except Exception as e:
+                # Redis unreachable: fall back to the database for this lookup.
+                logger.error(f"Admin email cache read failed: {e}")
+                shared = None
+        if emails is None:
+            try:
+                emails = _query_admin_emails()
+            except Exception as e:
+                # If User table doesn't exist or query fails, use DEFAULT_FROM_EMAIL (not cached)
+                logger.warning(f"Error fetching admin emails: {e}")
+                return _default_recipients()
+            if shared is not None:
+                try:
+                    shared.set(ADMIN_EMAILS_CACHE_KEY, emails, ADMIN_EMAILS_CACHE_SECONDS)
+                except Exception as e:
+                    logger.error(f"Admin email cache write failed: {e}")
+        _local['emails'] = emails
+        _local['expires'] = now + ADMIN_EMAILS_LOCAL_SECONDS
+    return list(emails) if emails else _default_recipients()
+
+
+def invalidate_admin_emails():
+    with _lock:
+        _local['emails'] = None
+        _local['expires'] = 0.0
+    shared = _shared_cache()
+    if shared is not None:
+        try:
+            shared.delete(ADMIN_EMAILS_CACHE_KEY)
+        except Exception as e:
+            # Runs inside User saves/deletes, which must not fail on a cache outage.
+            # A stale Redis entry still expires after ADMIN_EMAILS_CACHE_SECONDS.
+            logger.error(f"Admin email cache invalidation failed: {e}")
+
+
+@receiver(post_save, sender=User, dispatch_uid='api.admin_recipients.user_saved')
+def _user_saved(sender, instance, update_fields=None, **kwargs):
+    # Login only touches last_login; that cannot change who is an admin.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_admin_emails()
+
+
+@receiver(post_delete, sender=User, dispatch_uid='api.admin_recipients.user_deleted')
+def _user_deleted(sender, instance, **kwargs):
+    invalidate_admin_emails()
+
+
+@receiver(m2m_changed, sender=User.groups.through, dispatch_uid='api.admin_recipients.groups_changed')
+def _groups_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_admin_emails()
+
+
+@receiver(post_delete, sender=Group, dispatch_uid='api.admin_recipients.group_deleted')
+def _group_deleted(sender, instance, **kwargs):
+    invalidate_admin_emails()
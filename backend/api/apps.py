@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Signal receivers that keep the cached admin recipient list fresh.
+        from . import admin_recipients  # noqa: F401
@@ -0,0 +1,503 @@
+"""
+Authenticated Cloudinary downloads for lease PDFs and tenant documents.
+
+Cloudinary assets can live under several (resource_type, format, delivery type)
+variants and the storage path alone does not say which. Two caches keep repeat
+views off the network:
+  - variant memo   → Django cache: public_id → winning variant (skips the probe)
+  - file cache     → size-bounded LRU directory of downloaded bytes, keyed by
+                     public_id + version (evicts least recently read first). A
+                     public_id can be overwritten in place, so only callers that
+                     pass a version (lease_signing.lease_pdf_version) use it.
+When neither knows the file, candidate variants are probed concurrently over one
+pooled requests.Session; the first 200 wins and queued probes are cancelled.
+open_cloudinary_file streams a remembered variant (UpstreamFile) instead of
+downloading it first, so a document view starts sending bytes immediately.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from io import BytesIO
+
+import cloudinary
+import cloudinary.api
+import cloudinary.utils
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_TYPES = ['upload', 'authenticated', 'private']
+VARIANT_CACHE_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_FILE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_PROBE_WORKERS = 6
+CHUNK_SIZE = 64 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """Process-wide requests.Session (keep-alive pool sized for the probe workers)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                workers = _probe_workers()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(workers, 10))
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def set_http_session(session):
+    """
+    Swap the HTTP client (anything with requests' get(url, timeout=, stream=)).
+    Used by the probe benchmark to point downloads at a local stub server.
+    Returns the previous session so callers can restore it.
+    """
+    global _session
+    with _session_lock:
+        previous, _session = _session, session
+    return previous
+
+
+def _probe_workers():
+    return max(1, int(getattr(settings, 'CLOUDINARY_PROBE_WORKERS', DEFAULT_PROBE_WORKERS)))
+
+
+def _digest(*parts):
+    return hashlib.sha256('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+
+def _variant_cache_key(public_id):
+    return f"cloudinary-variant:{_digest(public_id)}"
+
+
+# The memo only saves a probe, so cache errors (Redis down) are logged and read as a miss.
+
+def get_cached_variant(public_id):
+    try:
+        return cache.get(_variant_cache_key(public_id))
+    except Exception as e:
+        logger.warning(f"Cloudinary variant memo read failed for {public_id}: {e}")
+        return None
+
+
+def remember_variant(public_id, variant):
+    try:
+        cache.set(_variant_cache_key(public_id), variant, VARIANT_CACHE_SECONDS)
+    except Exception as e:
+        logger.warning(f"Cloudinary variant memo write failed for {public_id}: {e}")
+
+
+def forget_variant(public_id):
+    try:
+        cache.delete(_variant_cache_key(public_id))
+    except Exception as e:
+        logger.warning(f"Cloudinary variant memo delete failed for {public_id}: {e}")
+
+
+# ==================== On-disk LRU of file bytes ====================
+
+def _file_cache_dir():
+    path = getattr(settings, 'CLOUDINARY_FILE_CACHE_DIR', None) or os.path.join(
+        tempfile.gettempdir(), 'neela-cloudinary-cache'
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _file_cache_max_bytes():
+    return int(getattr(settings, 'CLOUDINARY_FILE_CACHE_MAX_BYTES', DEFAULT_FILE_CACHE_MAX_BYTES))
+
+
+def _file_cache_path(public_id, version):
+    return os.path.join(_file_cache_dir(), _digest(public_id, version))
+
+
+def _file_cache_enabled(version):
+    return version is not None and _file_cache_max_bytes() > 0
+
+
+def read_cached_file(public_id, version=None):
+    """Bytes from the local cache, or None. A hit refreshes the entry's LRU position."""
+    if not _file_cache_enabled(version):
+        return None
+    path = _file_cache_path(public_id, version)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        os.utime(path, None)
+        return data
+    except OSError:
+        return None
+
+
+def write_cached_file(public_id, data, version=None):
+    """Store bytes atomically, then evict oldest entries until under the size cap."""
+    max_bytes = _file_cache_max_bytes()
+    if not _file_cache_enabled(version) or not data or len(data) > max_bytes:
+        return
+    path = _file_cache_path(public_id, version)
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not write Cloudinary file cache entry: {e}")
+        return
+    _prune_file_cache(max_bytes)
+
+
+def _prune_file_cache(max_bytes):
+    entries = []
+    total = 0
+    with os.scandir(_file_cache_dir()) as it:
+        for entry in it:
+            if not entry.is_file() or entry.name.endswith('.tmp'):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+    if total <= max_bytes:
+        return
+    for _mtime, size, path in sorted(entries):
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            continue
+        if total <= max_bytes:
+            break
+
+
+# ==================== Download ====================
+
+def _variant_url(public_id, variant):
+    if variant.get('method') == 'admin':
+        return variant['url']
+    return cloudinary.utils.private_download_url(
+        public_id,
+        format=variant['format'],
+        resource_type=variant['resource_type'],
+        type=variant['type'],
+        attachment=False,
+    )
+
+
+def _fetch_variant(public_id, variant):
+    """Download one known variant; returns bytes or None."""
+    url = _variant_url(public_id, variant)
+    # Not streamed: the whole body is needed, and the with block returns the
+    # connection to the pool even when the status is not 200.
+    with get_http_session().get(url, timeout=30) as response:
+        if response.status_code == 200:
+            return response.content
+        logger.warning(
+            f"Cloudinary variant {variant.get('resource_type')}/{variant.get('format')}/"
+            f"{variant.get('type')} failed: HTTP {response.status_code}"
+        )
+        return None
+
+
+def _candidate_variants(resource_types, formats):
+    # private_download_url requires `format`; skip invalid entries.
+    return [
+        {'method': 'private', 'resource_type': resource_type, 'format': file_format, 'type': delivery_type}
+        for resource_type in resource_types
+        for file_format in formats
+        if file_format
+        for delivery_type in DELIVERY_TYPES
+    ]
+
+
+def _try_variant(public_id, variant):
+    try:
+        return _fetch_variant(public_id, variant)
+    except Exception as e:
+        logger.warning(f"Error with {variant['resource_type']}/{variant['format']}/{variant['type']}: {e}")
+        return None
+
+
+def _probe_private_variants(public_id, candidates):
+    """Probe candidates on a bounded pool; first success wins, queued probes are cancelled."""
+    if not candidates:
+        return None, None
+    logger.info(f"Probing {len(candidates)} Cloudinary variants for {public_id}")
+    executor = ThreadPoolExecutor(max_workers=min(_probe_workers(), len(candidates)))
+    try:
+        pending = {executor.submit(_try_variant, public_id, v): v for v in candidates}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                variant = pending.pop(future)
+                data = future.result()
+                if data:
+                    return data, variant
+        return None, None
+    finally:
+        # In-flight probes finish in the background; nothing queued starts.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _probe_variants(public_id, resource_types, formats):
+    """Try every private download variant, then the Admin API secure_url. Returns (bytes, variant)."""
+    data, variant = _probe_private_variants(public_id, _candidate_variants(resource_types, formats))
+    if data:
+        return data, variant
+
+    logger.info("Attempting to fetch resource details via Admin API")
+    for resource_type in resource_types:
+        try:
+            resource_info = cloudinary.api.resource(public_id, resource_type=resource_type, type='upload')
+        except Exception:
+            continue
+        secure_url = resource_info.get('secure_url')
+        if not secure_url:
+            continue
+        variant = {'method': 'admin', 'resource_type': resource_type, 'url': secure_url}
+        try:
+            data = _fetch_variant(public_id, variant)
+        except Exception as e:
+            logger.warning(f"Admin API secure_url failed: {e}")
+            continue
+        if data:
+            return data, variant
+    return None, None
+
+
+def download_cloudinary_file(resource_path, resource_types=None, formats=None, version=None):
+    """
+    Download a file from Cloudinary using API authentication.
+    Handles authenticated delivery and returns file bytes.
+
+    Args:
+        resource_path: The path/public_id of the file in Cloudinary
+        version: Identifies the bytes behind resource_path (e.g. the Cloudinary
+            version); the local file cache is used only when it is given
+
+    Returns:
+        bytes: The file content, or None if failed
+    """
+    try:
+        # Keep the full path including extension (our uploads include .pdf in the public_id).
+        public_id = resource_path.lstrip('/').replace('\\', '/')
+        resource_types = resource_types or ['raw']
+        formats = formats or ['pdf']
+
+        data = read_cached_file(public_id, version)
+        if data:
+            logger.info(f"Served Cloudinary file from local cache: {public_id}")
+            return data
+
+        logger.info(f"Attempting to download Cloudinary file: {public_id}")
+        variant = get_cached_variant(public_id)
+        if variant:
+            try:
+                data = _fetch_variant(public_id, variant)
+            except Exception as e:
+                logger.warning(f"Remembered variant failed for {public_id}: {e}")
+                data = None
+            if not data:
+                forget_variant(public_id)
+
+        if not data:
+            data, variant = _probe_variants(public_id, resource_types, formats)
+            if not data:
+                logger.error(f"All download methods failed for: {public_id}")
+                return None
+            remember_variant(public_id, variant)
+
+        logger.info(f"Downloaded {public_id} via {variant.get('resource_type')}/{variant.get('type', variant.get('method'))}")
+        write_cached_file(public_id, data, version)
+        return data
+
+    except Exception as e:
+        logger.error(f"Error in download_cloudinary_file: {e}", exc_info=True)
+        return None
+
+
+class UpstreamFile:
+    """
+    Read-only, seekable view of a Cloudinary download that is fetched as it is read.
+
+    Reads continue the current streamed response; a seek elsewhere closes it and
+    the next read asks Cloudinary for `Range: bytes=<pos>-` (if the server ignores
+    the header and answers 200, the skipped prefix is discarded). Bytes read from
+    offset 0 through EOF are also written into the local file cache when one is
+    given, so the next open is served from disk.
+    """
+
+    def __init__(self, url, response, size, cache_path=None):
+        self.url = url
+        self.size = size
+        self._pos = 0
+        self._buffer = bytearray()
+        self._response = response
+        self._chunks = response.iter_content(CHUNK_SIZE)
+        self._cache_path = cache_path
+        self._cache_file = None
+        if cache_path:
+            try:
+                fd, self._cache_tmp = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix='.tmp')
+                self._cache_file = os.fdopen(fd, 'wb')
+            except OSError as e:
+                logger.warning(f"Could not write Cloudinary file cache entry: {e}")
+
+    def _open_at(self, pos):
+        response = get_http_session().get(
+            self.url, headers={'Range': f'bytes={pos}-'}, timeout=30, stream=True,
+        )
+        if response.status_code not in (200, 206):
+            response.close()
+            raise OSError(f"Cloudinary range request failed: HTTP {response.status_code}")
+        self._response = response
+        self._chunks = response.iter_content(CHUNK_SIZE)
+        skip = pos if response.status_code == 200 else 0
+        while skip > 0:
+            chunk = next(self._chunks, b'')
+            if not chunk:
+                break
+            if len(chunk) > skip:
+                self._buffer += chunk[skip:]
+            skip -= len(chunk)
+
+    def _drop_response(self):
+        if self._response is not None:
+            self._response.close()
+        self._response = None
+        self._chunks = None
+        self._buffer = bytearray()
+
+    def _discard_cache_entry(self):
+        if self._cache_file is not None:
+            self._cache_file.close()
+            self._cache_file = None
+            try:
+                os.remove(self._cache_tmp)
+            except OSError:
+                pass
+
+    def _commit_cache_entry(self):
+        self._cache_file.close()
+        self._cache_file = None
+        try:
+            os.replace(self._cache_tmp, self._cache_path)
+        except OSError as e:
+            logger.warning(f"Could not write Cloudinary file cache entry: {e}")
+            return
+        _prune_file_cache(_file_cache_max_bytes())
+
+    def read(self, n=-1):
+        if n is None or n < 0:
+            n = self.size - self._pos
+        n = min(n, self.size - self._pos)
+        if n <= 0:
+            return b''
+        if self._chunks is None:
+            self._open_at(self._pos)
+        while len(self._buffer) < n:
+            chunk = next(self._chunks, b'')
+            if not chunk:
+                break
+            self._buffer += chunk
+        data = bytes(self._buffer[:n])
+        del self._buffer[:n]
+        self._pos += len(data)
+        if self._cache_file is not None:
+            try:
+                self._cache_file.write(data)
+            except OSError:
+                self._discard_cache_entry()
+            else:
+                if self._pos >= self.size:
+                    self._commit_cache_entry()
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self.size
+        offset = max(0, offset)
+        if offset != self._pos:
+            self._drop_response()
+            self._discard_cache_entry()
+            self._pos = offset
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        self._drop_response()
+        self._discard_cache_entry()
+
+
+def _open_upstream(public_id, variant, version):
+    """UpstreamFile for a known variant, or None when it no longer answers."""
+    url = _variant_url(public_id, variant)
+    response = get_http_session().get(url, timeout=30, stream=True)
+    if response.status_code != 200:
+        response.close()
+        return None
+    size = response.headers.get('Content-Length')
+    if size is None or response.headers.get('Content-Encoding'):
+        # Length of the decoded body is unknown; buffer it instead.
+        with response:
+            data = response.content
+        write_cached_file(public_id, data, version)
+        return BytesIO(data)
+    cache_path = _file_cache_path(public_id, version) if _file_cache_enabled(version) else None
+    return UpstreamFile(url, response, int(size), cache_path)
+
+
+def open_cloudinary_file(resource_path, resource_types=None, formats=None, version=None):
+    """
+    Open a Cloudinary file for streaming: the local cache file when present, else
+    the remembered variant streamed from Cloudinary (UpstreamFile), else the
+    probed download in a buffer. None if unavailable.
+    """
+    public_id = resource_path.lstrip('/').replace('\\', '/')
+    path = _file_cache_path(public_id, version) if _file_cache_enabled(version) else None
+    if path:
+        try:
+            fileobj = open(path, 'rb')
+            os.utime(path, None)
+            return fileobj
+        except OSError:
+            pass
+
+    variant = get_cached_variant(public_id)
+    if variant:
+        try:
+            fileobj = _open_upstream(public_id, variant, version)
+        except Exception as e:
+            logger.warning(f"Remembered variant failed for {public_id}: {e}")
+            fileobj = None
+        if fileobj is not None:
+            return fileobj
+        forget_variant(public_id)
+
+    data = download_cloudinary_file(public_id, resource_types=resource_types, formats=formats, version=version)
+    if not data:
+        return None
+    if path:
+        try:
+            return open(path, 'rb')
+        except OSError:
+            pass
+    return BytesIO(data)
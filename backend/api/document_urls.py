@@ -0,0 +1,155 @@
+"""
+Short-lived signed document URLs.
+
+The authenticated proxy endpoints (tenant/booking documents, lease PDFs) decode a
+JWT and load the owning row on every request — and PDF viewers issue many Range
+requests per document. Instead, an authorised caller mints a URL whose token
+carries everything needed to serve the file:
+
+  scope     → per-document revocation key, e.g. "legal_document:42"
+  sources   → where the bytes live: ["storage", name] or
+              ["cloudinary", public_id, resource_types, formats, version], tried
+              in order (version is optional; see cloudinary_files)
+  ct / fn   → content type, filename and disposition
+  v / exp   → scope version at mint time and expiry (epoch seconds)
+
+The token is signed with SECRET_KEY (django.core.signing, HMAC-SHA256), so the
+serve view needs no database query and no JWT decode. Revocation bumps the
+scope's version in the Django cache; tokens minted under an older version stop
+verifying. settings.CACHES is Redis whenever a broker is configured, so a bump
+made in a Celery worker is seen by every gunicorn process. If that cache cannot
+be reached, versions cannot be checked: minting, revoking and serving all raise
+DocumentUrlUnavailable rather than guessing (fail closed).
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.urls import reverse
+
+SIGNING_SALT = 'api.document-urls'
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_MAX_TTL_SECONDS = 60 * 60
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentUrlError(Exception):
+    """Token is malformed, tampered with, expired or revoked."""
+
+
+class DocumentUrlUnavailable(DocumentUrlError):
+    """The version cache is unreachable, so tokens can be neither minted nor checked."""
+
+
+def _version_key(scope):
+    return f"document-url-version:{scope}"
+
+
+def scope_version(scope):
+    try:
+        return cache.get(_version_key(scope), 0)
+    except Exception as e:
+        logger.error("Document URL version lookup failed for %s: %s", scope, e)
+        raise DocumentUrlUnavailable('Document links are temporarily unavailable')
+
+
+def revoke_document_urls(scope):
+    """Invalidate every URL minted so far for this scope. Returns the new version."""
+    key = _version_key(scope)
+    try:
+        cache.add(key, 0, None)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr(); start a fresh counter above zero.
+            cache.set(key, 1, None)
+            return 1
+    except Exception as e:
+        logger.error("Document URL revocation failed for %s: %s", scope, e)
+        raise DocumentUrlUnavailable('Document links cannot be revoked right now')
+
+
+def legal_document_scope(document_id):
+    return f"legal_document:{document_id}"
+
+
+def tenant_scope(tenant_id):
+    return f"tenant:{tenant_id}"
+
+
+def booking_scope(booking_id):
+    return f"short_stay_booking:{booking_id}"
+
+
+def _ttl(requested=None):
+    default = int(getattr(settings, 'DOCUMENT_URL_TTL_SECONDS', DEFAULT_TTL_SECONDS))
+    ceiling = int(getattr(settings, 'DOCUMENT_URL_MAX_TTL_SECONDS', DEFAULT_MAX_TTL_SECONDS))
+    try:
+        ttl = int(requested) if requested not in (None, '') else default
+    except (TypeError, ValueError):
+        ttl = default
+    return max(30, min(ttl, ceiling))
+
+
+def mint_document_token(*, scope, sources, content_type, filename=None, disposition='inline', ttl=None):
+    """Signed token for one document. Returns (token, expires_at_epoch)."""
+    expires_at = int(time.time()) + _ttl(ttl)
+    claims = {
+        's': scope,
+        'src': sources,
+        'ct': content_type,
+        'fn': filename,
+        'd': disposition,
+        'v': scope_version(scope),
+        'exp': expires_at,
+    }
+    return signing.dumps(claims, salt=SIGNING_SALT, compress=True), expires_at
+
+
+def mint_document_url(request, **kwargs):
+    """Absolute signed URL for the serve view. Returns (url, expires_at_epoch)."""
+    token, expires_at = mint_document_token(**kwargs)
+    url = request.build_absolute_uri(reverse('signed-document', args=[token]))
+    return url, expires_at
+
+
+def verify_document_token(token):
+    """
+    Claims dict for a valid token; raises DocumentUrlError otherwise
+    (DocumentUrlUnavailable when the version cache is down).
+    """
+    try:
+        claims = signing.loads(token, salt=SIGNING_SALT)
+    except signing.BadSignature:
+        raise DocumentUrlError('Invalid document link')
+    if claims.get('exp', 0) < time.time():
+        raise DocumentUrlError('Document link expired')
+    if claims.get('v', 0) != scope_version(claims.get('s')):
+        raise DocumentUrlError('Document link revoked')
+    return claims
+
+
+def open_document_source(sources):
+    """Open the first available source. Returns (fileobj, source_name) or (None, None)."""
+    from django.core.files.storage import default_storage
+
+    from .cloudinary_files import open_cloudinary_file
+
+    for source in sources or []:
+        kind, name = source[0], source[1]
+        if kind == 'storage':
+            try:
+                return default_storage.open(name, 'rb'), name
+            except Exception:
+                continue
+        elif kind == 'cloudinary':
+            resource_types = source[2] if len(source) > 2 else None
+            formats = source[3] if len(source) > 3 else None
+            version = source[4] if len(source) > 4 else None
+            fileobj = open_cloudinary_file(name, resource_types=resource_types, formats=formats, version=version)
+            if fileobj is not None:
+                return fileobj, name
+    return None, None
@@ -0,0 +1,122 @@
+"""
+Process-wide pooled email connection.
+
+send_mail() opens and closes a backend connection (SMTP login, or a new HTTP
+session for Anymail) for every message. The pool keeps one opened
+get_connection() per process and reuses it across calls and Celery tasks:
+
+    from .email_connections import send_messages
+    sent = send_messages([msg1, msg2])   # one connection, one login
+
+The connection is recycled after EMAIL_CONNECTION_MAX_IDLE_SECONDS without use
+or EMAIL_CONNECTION_MAX_MESSAGES sends (servers drop idle sessions). On a reused
+connection the first message goes out alone: if the server had dropped the
+session, only that message is resent over a fresh connection. The rest of the
+batch is never resent, since part of it may already have been delivered. A forked
+child (Celery prefork) never reuses its parent's socket. Worker children close it
+on shutdown (celery.py).
+"""
+import logging
+import os
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_IDLE_SECONDS = 60
+DEFAULT_MAX_MESSAGES = 500
+
+# Errors that mean the pooled connection went stale, not that the message was bad.
+STALE_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class _PooledConnection:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.connection = None
+        self.backend = None
+        self.pid = None
+        self.last_used = 0.0
+        self.sent = 0
+
+    def _expired(self):
+        max_idle = getattr(settings, 'EMAIL_CONNECTION_MAX_IDLE_SECONDS', DEFAULT_MAX_IDLE_SECONDS)
+        max_messages = getattr(settings, 'EMAIL_CONNECTION_MAX_MESSAGES', DEFAULT_MAX_MESSAGES)
+        return (
+            self.pid != os.getpid()
+            or self.backend != settings.EMAIL_BACKEND
+            or time.monotonic() - self.last_used > max_idle
+            or self.sent >= max_messages
+        )
+
+    def close(self):
+        connection, self.connection = self.connection, None
+        if connection is not None and self.pid == os.getpid():
+            try:
+                connection.close()
+            except Exception as e:
+                logger.debug(f"Closing pooled email connection failed: {e}")
+
+    def get(self):
+        if self.connection is not None and self._expired():
+            self.close()
+        if self.connection is None:
+            connection = get_connection(fail_silently=False)
+            connection.open()
+            self.connection = connection
+            self.backend = settings.EMAIL_BACKEND
+            self.pid = os.getpid()
+            self.sent = 0
+            logger.debug(f"Opened pooled email connection ({self.backend}) in pid {self.pid}")
+        return self.connection
+
+
+_pool = _PooledConnection()
+
+
+def send_messages(email_messages, fail_silently=False):
+    """
+    Send EmailMessage objects over the pooled connection; returns the number sent.
+    A stale pooled connection is reopened and only the message that found it stale
+    is retried.
+    """
+    email_messages = list(email_messages)
+    if not email_messages:
+        return 0
+    with _pool.lock:
+        try:
+            reused = _pool.connection is not None and not _pool._expired()
+            connection = _pool.get()
+            sent = 0
+            rest = email_messages
+            if reused:
+                # Nothing is delivered before this message, so it alone is safe to resend.
+                head, rest = email_messages[:1], email_messages[1:]
+                try:
+                    sent = connection.send_messages(head) or 0
+                except STALE_CONNECTION_ERRORS as e:
+                    logger.info(f"Pooled email connection dropped ({type(e).__name__}); reconnecting")
+                    _pool.close()
+                    connection = _pool.get()
+                    sent = connection.send_messages(head) or 0
+            if rest:
+                sent += connection.send_messages(rest) or 0
+        except Exception:
+            _pool.close()
+            if fail_silently:
+                logger.error("Pooled email send failed", exc_info=True)
+                return 0
+            raise
+        _pool.sent += len(email_messages)
+        _pool.last_used = time.monotonic()
+        return sent
+
+
+def close_pooled_connection():
+    """Close this process's pooled connection (worker shutdown, tests)."""
+    with _pool.lock:
+        _pool.close()
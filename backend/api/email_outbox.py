@@ -0,0 +1,173 @@
+"""
+Transactional email outbox (OutboundEmail).
+
+Views used to call send_x.delay() and, when the broker was down, send inline in
+the request thread. Instead, enqueue_email() writes an outbox row in the same
+transaction as the business change:
+
+    with transaction.atomic():
+        payment = serializer.save()
+        enqueue_email('send_payment_invoice_to_tenant', payment.id)
+
+After commit the drain_email_outbox task is nudged; the beat entry (every
+minute) and `python manage.py drain_email_outbox` pick up anything left. The
+drainer claims due rows with select_for_update(skip_locked=True), so several
+drainers never send the same row, runs the matching email_service sender over
+the pooled connection, and retries failures with exponential backoff until
+EMAIL_OUTBOX_MAX_ATTEMPTS, after which the row is marked failed.
+"""
+import functools
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_ATTEMPTS = 6
+DEFAULT_RETRY_BASE_SECONDS = 60
+# A row stuck in 'sending' this long (worker died mid-send) is claimed again.
+CLAIM_TIMEOUT = timedelta(minutes=10)
+SENT_RETENTION = timedelta(days=7)
+
+_capture = threading.local()
+
+
+def reports_send_result(func):
+    """Decorator for send_email_with_logging: lets the drainer see sends that returned 0."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        result = func(*args, **kwargs)
+        results = getattr(_capture, 'results', None)
+        if results is not None:
+            results.append(result)
+        return result
+    return wrapper
+
+
+@contextmanager
+def capture_send_results():
+    previous = getattr(_capture, 'results', None)
+    _capture.results = []
+    try:
+        yield _capture.results
+    finally:
+        _capture.results = previous
+
+
+def _sender(kind):
+    from . import email_service
+
+    return getattr(email_service, f'_{kind}', None)
+
+
+def _nudge_drainer():
+    from .tasks import drain_email_outbox
+
+    try:
+        drain_email_outbox.delay()
+    except Exception as e:
+        # Rows stay pending; the periodic drain sends them once the broker is back.
+        logger.warning(f"Could not queue outbox drain, leaving emails for the next run: {e}")
+
+
+def enqueue_email(kind, *args, **kwargs):
+    """
+    Record an email to send once the surrounding transaction commits.
+    `kind` is an email_service task name (its `_kind` function does the sending).
+    """
+    from .models import OutboundEmail
+
+    if _sender(kind) is None:
+        raise ValueError(f"Unknown outbox email kind: {kind}")
+    row = OutboundEmail.objects.create(kind=kind, args=list(args), kwargs=kwargs)
+    transaction.on_commit(_nudge_drainer)
+    return row
+
+
+def _claim_batch(batch_size):
+    from .models import OutboundEmail
+
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status='pending', next_attempt_at__lte=now)
+                | Q(status='sending', claimed_at__lt=now - CLAIM_TIMEOUT)
+            )
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if rows:
+            OutboundEmail.objects.filter(id__in=[row.id for row in rows]).update(
+                status='sending', claimed_at=now, attempts=F('attempts') + 1,
+            )
+    for row in rows:
+        row.attempts += 1
+    return rows
+
+
+def _deliver(row):
+    """Run the sender for one claimed row; returns None on success or an error string."""
+    sender = _sender(row.kind)
+    if sender is None:
+        return f"Unknown outbox email kind: {row.kind}"
+    with capture_send_results() as results:
+        try:
+            sender(*row.args, **row.kwargs)
+        except Exception as e:
+            logger.error(f"Outbox email {row.id} ({row.kind}) raised: {e}", exc_info=True)
+            return f"{type(e).__name__}: {e}"
+    if any(not sent for sent in results):
+        return 'Email backend sent 0 messages'
+    return None
+
+
+def _finish(row, error):
+    from .models import OutboundEmail
+
+    now = timezone.now()
+    if error is None:
+        OutboundEmail.objects.filter(id=row.id).update(status='sent', sent_at=now, last_error='')
+        return 'sent'
+    max_attempts = int(getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS))
+    if row.attempts >= max_attempts:
+        OutboundEmail.objects.filter(id=row.id).update(status='failed', last_error=error[:2000])
+        logger.error(f"Outbox email {row.id} ({row.kind}) failed after {row.attempts} attempts: {error}")
+        return 'failed'
+    base = int(getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE_SECONDS', DEFAULT_RETRY_BASE_SECONDS))
+    delay = timedelta(seconds=base * 2 ** (row.attempts - 1))
+    OutboundEmail.objects.filter(id=row.id).update(
+        status='pending', next_attempt_at=now + delay, last_error=error[:2000],
+    )
+    logger.warning(f"Outbox email {row.id} ({row.kind}) attempt {row.attempts} failed, retrying in {delay}: {error}")
+    return 'retrying'
+
+
+def drain_outbox(batch_size=None, max_batches=None):
+    """Send due outbox rows in batches until none are left; returns counts per outcome."""
+    batch_size = batch_size or int(getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+    counts = {'sent': 0, 'retrying': 0, 'failed': 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = _claim_batch(batch_size)
+        if not rows:
+            break
+        batches += 1
+        for row in rows:
+            counts[_finish(row, _deliver(row))] += 1
+    return counts
+
+
+def purge_sent_outbox(older_than=SENT_RETENTION):
+    """Delete sent rows past the retention window; failed rows are kept for inspection."""
+    from .models import OutboundEmail
+
+    deleted, _ = OutboundEmail.objects.filter(status='sent', sent_at__lt=timezone.now() - older_than).delete()
+    return deleted
@@ -0,0 +1,80 @@
+"""
+Email template rendering for email_service.
+
+Templates under api/templates/emails/ are compiled once per process (Django's
+cached loader, warmed when a Celery worker child starts) and kept as Template
+objects here, so a send no longer goes through the loader at all. Context that
+never changes within a process (portal/login URLs, company name) is built once
+and merged under each email's own context.
+
+    html = render_email('emails/payment_reminder.html', context)
+    htmls = render_many('emails/payment_reminder.html', contexts)   # one template, many tenants
+
+Benchmark: python manage.py bench_email_rendering
+"""
+import logging
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.template.loader import get_template
+
+logger = logging.getLogger(__name__)
+
+EMAIL_TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), 'templates', 'emails')
+
+
+def email_template_names():
+    """'emails/<file>.html' for every email template shipped with the app."""
+    return sorted(
+        f'emails/{name}' for name in os.listdir(EMAIL_TEMPLATE_DIR) if name.endswith('.html')
+    )
+
+
+@lru_cache(maxsize=None)
+def get_email_template(name):
+    return get_template(name)
+
+
+@lru_cache(maxsize=1)
+def static_context():
+    """Context shared by every email; computed once per process."""
+    frontend_url = getattr(settings, 'FRONTEND_URL', 'https://neela-tenant.vercel.app').rstrip('/')
+    return {
+        'frontend_url': frontend_url,
+        'tenant_portal_url': frontend_url,
+        'payment_url': frontend_url,
+        'admin_login_url': f"{frontend_url}/admin-login",
+        'company_name': getattr(settings, 'PROPERTY_MANAGER_NAME', 'Neela Capital Investment'),
+    }
+
+
+def render_email(name, context):
+    """HTML for one email: static context overlaid with the email's own values."""
+    return get_email_template(name).render({**static_context(), **context})
+
+
+def render_many(name, contexts):
+    """HTML for each context in order, reusing one compiled template and the static context."""
+    template = get_email_template(name)
+    base = static_context()
+    return [template.render({**base, **context}) for context in contexts]
+
+
+def warm_email_templates():
+    """Compile every email template now (called on Celery worker child start)."""
+    static_context()
+    warmed = 0
+    for name in email_template_names():
+        try:
+            get_email_template(name)
+            warmed += 1
+        except Exception as e:
+            logger.error(f"Could not compile email template {name}: {e}")
+    logger.info(f"Warmed {warmed} email templates")
+    return warmed
+
+
+def clear_email_template_cache():
+    get_email_template.cache_clear()
+    static_context.cache_clear()
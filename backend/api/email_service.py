@@ -5,10 +5,15 @@ import threading
 import logging
 import os
 from django.core.mail import send_mail, EmailMessage, EmailMultiAlternatives
-from django.template.loader import render_to_string
 from django.conf import settings
 from django.contrib.auth import get_user_model
 
+from .admin_recipients import admin_emails as cached_admin_emails
+from .email_connections import send_messages
+from .email_rendering import render_email, static_context
+from .idempotency import idempotent
+from .email_outbox import reports_send_result
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -63,9 +68,11 @@ def validate_email_config():
     return True, None
 
 
+@reports_send_result
 def send_email_with_logging(subject, message, from_email, recipient_list, html_message=None, email_type="email"):
     """
     Wrapper around send_mail with proper logging, validation, and error handling.
+    Sends over the pooled connection (email_connections) instead of a new one per call.
     Falls back to console backend if SMTP fails in DEBUG mode.
     
     Args:
@@ -94,19 +101,16 @@ def send_email_with_logging(subject, message, from_email, recipient_list, html_m
     fail_silently = not getattr(settings, 'DEBUG', False)
     
     try:
-        result = send_mail(
-            subject=subject,
-            message=message,
-            from_email=from_email,
-            recipient_list=recipient_list,
-            html_message=html_message,
-            fail_silently=fail_silently
-        )
+        # Same message send_mail builds, sent over the process-wide pooled connection.
+        email = EmailMultiAlternatives(subject, message, from_email, recipient_list)
+        if html_message:
+            email.attach_alternative(html_message, 'text/html')
+        result = send_messages([email], fail_silently=fail_silently)
         
         if result > 0:
             logger.info(f"{email_type} sent successfully to {recipient_list} (sent {result} email(s))")
         else:
-            logger.error(f"Failed to send {email_type}: send_mail returned {result} (0 indicates failure)")
+            logger.error(f"Failed to send {email_type}: send_messages returned {result} (0 indicates failure)")
         
         return result
     except Exception as e:
@@ -235,13 +239,14 @@ def _send_contact_message_to_manager(*, tenant_id=None, sender_name=None, sender
         reply_to=[reply_to] if reply_to else None,
     )
     email.attach_alternative(html_message, "text/html")
-    result = email.send(fail_silently=fail_silently)
+    result = send_messages([email], fail_silently=fail_silently)
     if result <= 0:
         raise RuntimeError("Email send failed (send() returned 0)")
 
 
-@shared_task
-def send_contact_message_to_manager(*, tenant_id=None, sender_name=None, sender_email=None, message: str):
+@shared_task(bind=True)
+@idempotent()
+def send_contact_message_to_manager(self, *, tenant_id=None, sender_name=None, sender_email=None, message: str):
     """
     Celery task wrapper for sending contact messages.
     """
@@ -317,32 +322,14 @@ def send_email_in_thread(email_func, *args, **kwargs):
 def get_admin_emails():
     """
     Get admin email addresses for notifications.
-    Returns list of admin emails from staff users or ADMIN_EMAIL setting.
-    Optimized to fetch only email field for faster queries.
+    Returns [ADMIN_EMAIL] when set, else staff (or superuser) emails from the cached
+    recipient list in admin_recipients (one query per change, not per email).
+    All send_* tasks use this helper.
     """
     admin_email = getattr(settings, 'ADMIN_EMAIL', '')
     if admin_email:
         return [admin_email]
-    
-    try:
-        # Get all staff users' emails - only fetch email field for performance
-        staff_users = User.objects.filter(is_staff=True, is_active=True).only('email')
-        admin_emails = [user.email for user in staff_users if user.email]
-        
-        if not admin_emails:
-            # Fallback to superuser emails - only fetch email field for performance
-            superusers = User.objects.filter(is_superuser=True, is_active=True).only('email')
-            admin_emails = [user.email for user in superusers if user.email]
-        
-        return admin_emails if admin_emails else [settings.DEFAULT_FROM_EMAIL]
-    except Exception as e:
-        # If User table doesn't exist or query fails, use DEFAULT_FROM_EMAIL
-        # This prevents crashes during development when tables aren't set up yet
-        logger.warning(f"Error fetching admin emails: {e}")
-        default_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'admin@example.com')
-        if default_email:
-            return [default_email]
-        return ['admin@example.com']  # Final fallback
+    return cached_admin_emails()
 
 
 def _send_application_notification_to_admin(tenant_id):
@@ -365,8 +352,7 @@ def _send_application_notification_to_admin(tenant_id):
     subject = f'New Property Application: {tenant.name}'
     
     # Get admin login URL (base frontend URL - admin can click Admin Login button)
-    frontend_url = getattr(settings, 'FRONTEND_URL', 'https://neela-tenant.vercel.app')
-    admin_login_url = f"{frontend_url.rstrip('/')}/admin-login"
+    admin_login_url = static_context()['admin_login_url']
     
     # Render email template
     context = {
@@ -374,10 +360,9 @@ def _send_application_notification_to_admin(tenant_id):
         'property_unit': tenant.property_unit,
         'email': tenant.email,
         'phone': tenant.phone,
-        'admin_login_url': admin_login_url,
     }
     
-    html_message = render_to_string('emails/application_notification.html', context)
+    html_message = render_email('emails/application_notification.html', context)
     plain_message = f"""
     New Property Application Received
     
@@ -401,8 +386,9 @@ def _send_application_notification_to_admin(tenant_id):
     )
 
 
-@shared_task
-def send_application_notification_to_admin(tenant_id):
+@shared_task(bind=True)
+@idempotent()
+def send_application_notification_to_admin(self, tenant_id):
     """
     Celery task to send email notification to admin when a user applies for a property.
     This function is decorated with @shared_task, so it runs as a Celery task.
@@ -444,7 +430,7 @@ def _send_acceptance_email_to_user(tenant_id, reset_token, reset_url):
         'reset_url': reset_url,
     }
     
-    html_message = render_to_string('emails/application_acceptance.html', context)
+    html_message = render_email('emails/application_acceptance.html', context)
     plain_message = f"""
     Congratulations {tenant.name}!
     
@@ -468,8 +454,9 @@ def _send_acceptance_email_to_user(tenant_id, reset_token, reset_url):
     )
 
 
-@shared_task
-def send_acceptance_email_to_user(tenant_id, reset_token, reset_url):
+@shared_task(bind=True)
+@idempotent()
+def send_acceptance_email_to_user(self, tenant_id, reset_token, reset_url):
     """
     Celery task to send acceptance email to user with password reset link when application is approved.
     
@@ -501,8 +488,7 @@ def _send_application_approval_notification_to_admin(tenant_id):
         
     subject = f'Application Approved: {tenant.name} - {tenant.property_unit}'
     
-    frontend_url = getattr(settings, 'FRONTEND_URL', 'https://neela-tenant.vercel.app')
-    admin_login_url = f"{frontend_url.rstrip('/')}/admin-login"
+    admin_login_url = static_context()['admin_login_url']
     
     plain_message = f"""
     Application Approved
@@ -530,12 +516,11 @@ def _send_application_approval_notification_to_admin(tenant_id):
         'property_unit': tenant.property_unit,
         'email': tenant.email,
         'phone': tenant.phone,
-        'admin_login_url': admin_login_url,
         'title': 'Application Approved'
     }
     
     try:
-        html_message = render_to_string('emails/application_notification.html', context)
+        html_message = render_email('emails/application_notification.html', context)
     except:
         html_message = None
         
@@ -549,8 +534,9 @@ def _send_application_approval_notification_to_admin(tenant_id):
     )
 
 
-@shared_task
-def send_application_approval_notification_to_admin(tenant_id):
+@shared_task(bind=True)
+@idempotent()
+def send_application_approval_notification_to_admin(self, tenant_id):
     """
     Celery task to send email notification to admin when application is approved.
     """
@@ -580,8 +566,7 @@ def _send_maintenance_ticket_notification_to_manager(maintenance_request_id):
     
     subject = f'New Maintenance Request: {maintenance_request.category} - {maintenance_request.tenant.name}'
     
-    frontend_url = getattr(settings, 'FRONTEND_URL', 'https://neela-tenant.vercel.app')
-    admin_login_url = f"{frontend_url.rstrip('/')}/admin-login"
+    admin_login_url = static_context()['admin_login_url']
     
     context = {
         'tenant': maintenance_request.tenant,
@@ -589,10 +574,9 @@ def _send_maintenance_ticket_notification_to_manager(maintenance_request_id):
         'description': maintenance_request.description,
         'priority': maintenance_request.priority,
         'created_at': maintenance_request.created_at,
-        'admin_login_url': admin_login_url,
     }
     
-    html_message = render_to_string('emails/maintenance_ticket_submitted.html', context)
+    html_message = render_email('emails/maintenance_ticket_submitted.html', context)
     plain_message = f"""
     New Maintenance Request Received
     
@@ -617,8 +601,9 @@ def _send_maintenance_ticket_notification_to_manager(maintenance_request_id):
     )
 
 
-@shared_task
-def send_maintenance_ticket_notification_to_manager(maintenance_request_id):
+@shared_task(bind=True)
+@idempotent()
+def send_maintenance_ticket_notification_to_manager(self, maintenance_request_id):
     """
     Celery task to send email notification to manager when tenant submits maintenance ticket.
     """
@@ -645,8 +630,7 @@ def _send_maintenance_ticket_confirmation_to_tenant(maintenance_request_id):
     
     subject = f'Maintenance Request Confirmation - Ticket #{maintenance_request.id}'
     
-    frontend_url = getattr(settings, 'FRONTEND_URL', 'https://neela-tenant.vercel.app')
-    tenant_portal_url = f"{frontend_url.rstrip('/')}"
+    tenant_portal_url = static_context()['tenant_portal_url']
     
     context = {
         'tenant_name': maintenance_request.tenant.name,
@@ -656,10 +640,9 @@ def _send_maintenance_ticket_confirmation_to_tenant(maintenance_request_id):
         'priority': maintenance_request.priority,
         'status': maintenance_request.status,
         'created_at': maintenance_request.created_at,
-        'tenant_portal_url': tenant_portal_url,
     }
     
-    html_message = render_to_string('emails/maintenance_ticket_confirmation.html', context)
+    html_message = render_email('emails/maintenance_ticket_confirmation.html', context)
     plain_message = f"""
     Maintenance Request Confirmation
     
@@ -691,8 +674,9 @@ def _send_maintenance_ticket_confirmation_to_tenant(maintenance_request_id):
     )
 
 
-@shared_task
-def send_maintenance_ticket_confirmation_to_tenant(maintenance_request_id):
+@shared_task(bind=True)
+@idempotent()
+def send_maintenance_ticket_confirmation_to_tenant(self, maintenance_request_id):
     """
     Celery task to send confirmation email to tenant when maintenance ticket is created.
     """
@@ -719,8 +703,7 @@ def _send_maintenance_status_update_to_tenant(maintenance_request_id, old_status
     
     subject = f'Maintenance Request Status Update - Ticket #{maintenance_request.id}'
     
-    frontend_url = getattr(settings, 'FRONTEND_URL', 'https://neela-tenant.vercel.app')
-    tenant_portal_url = f"{frontend_url.rstrip('/')}"
+    tenant_portal_url = static_context()['tenant_portal_url']
     
     context = {
         'tenant_name': maintenance_request.tenant.name,
@@ -730,10 +713,9 @@ def _send_maintenance_status_update_to_tenant(maintenance_request_id, old_status
         'status': new_status,
         'assigned_to': maintenance_request.assigned_to,
         'update_message': update_message,
-        'tenant_portal_url': tenant_portal_url,
     }
     
-    html_message = render_to_string('emails/maintenance_status_update.html', context)
+    html_message = render_email('emails/maintenance_status_update.html', context)
     plain_message = f"""
     Maintenance Request Status Update
     
@@ -771,8 +753,9 @@ def _send_maintenance_status_update_to_tenant(maintenance_request_id, old_status
     )
 
 
-@shared_task
-def send_maintenance_status_update_to_tenant(maintenance_request_id, old_status, new_status, update_message=None):
+@shared_task(bind=True)
+@idempotent()
+def send_maintenance_status_update_to_tenant(self, maintenance_request_id, old_status, new_status, update_message=None):
     """
     Celery task to send email to tenant when maintenance ticket status changes.
     """
@@ -799,8 +782,7 @@ def _send_maintenance_comment_notification_to_tenant(maintenance_request_id, com
     
     subject = f'New Comment on Maintenance Request - Ticket #{maintenance_request.id}'
     
-    frontend_url = getattr(settings, 'FRONTEND_URL', 'https://neela-tenant.vercel.app')
-    tenant_portal_url = f"{frontend_url.rstrip('/')}"
+    tenant_portal_url = static_context()['tenant_portal_url']
     
     context = {
         'tenant_name': maintenance_request.tenant.name,
@@ -811,10 +793,9 @@ def _send_maintenance_comment_notification_to_tenant(maintenance_request_id, com
         'comment_author': comment_author,
         'comment_message': comment_message,
         'comment_date': comment_date,
-        'tenant_portal_url': tenant_portal_url,
     }
     
-    html_message = render_to_string('emails/maintenance_comment_added.html', context)
+    html_message = render_email('emails/maintenance_comment_added.html', context)
     plain_message = f"""
     New Comment on Maintenance Request
     
@@ -846,8 +827,9 @@ def _send_maintenance_comment_notification_to_tenant(maintenance_request_id, com
     )
 
 
-@shared_task
-def send_maintenance_comment_notification_to_tenant(maintenance_request_id, comment_author, comment_message, comment_date):
+@shared_task(bind=True)
+@idempotent()
+def send_maintenance_comment_notification_to_tenant(self, maintenance_request_id, comment_author, comment_message, comment_date):
     """
     Celery task to send email to tenant when manager adds a comment to maintenance ticket.
     """
@@ -876,8 +858,7 @@ def _send_payment_invoice_to_tenant(payment_id):
     
     subject = f'Payment Invoice - ${payment.amount} - {payment.type}'
     
-    frontend_url = getattr(settings, 'FRONTEND_URL', 'https://neela-tenant.vercel.app')
-    payment_url = f"{frontend_url.rstrip('/')}"
+    payment_url = static_context()['payment_url']
     
     context = {
         'tenant_name': payment.tenant.name,
@@ -887,10 +868,9 @@ def _send_payment_invoice_to_tenant(payment_id):
         'status': payment.status,
         'property_unit': payment.tenant.property_unit,
         'reference': payment.reference,
-        'payment_url': payment_url,
     }
     
-    html_message = render_to_string('emails/payment_invoice.html', context)
+    html_message = render_email('emails/payment_invoice.html', context)
     plain_message = f"""
     Payment Invoice
     
@@ -927,8 +907,9 @@ def _send_payment_invoice_to_tenant(payment_id):
     )
 
 
-@shared_task
-def send_payment_invoice_to_tenant(payment_id):
+@shared_task(bind=True)
+@idempotent()
+def send_payment_invoice_to_tenant(self, payment_id):
     """
     Celery task to send invoice email to tenant when payment is created.
     """
@@ -937,31 +918,18 @@ def send_payment_invoice_to_tenant(payment_id):
     _send_payment_invoice_to_tenant(payment_id)
 
 
-def _send_payment_reminder_to_tenant(payment_id):
-    """
-    Internal function to send reminder email to tenant for pending/overdue payments.
-    """
-    from .models import Payment
+def _payment_reminder_parts(payment, today=None):
+    """(subject, plain_message, template context) for a payment reminder."""
     from django.utils import timezone
-    
-    try:
-        payment = Payment.objects.select_related('tenant').get(id=payment_id)
-    except Payment.DoesNotExist:
-        logger.error(f"Payment with ID {payment_id} not found for reminder email.")
-        return
-    
-    if not payment.tenant.email:
-        logger.warning(f"Tenant {payment.tenant.id} has no email address for payment reminder.")
-        return
-    
-    is_overdue = payment.status == 'Overdue' or (payment.status == 'Pending' and payment.date < timezone.now().date())
+
+    today = today or timezone.now().date()
+    is_overdue = payment.status == 'Overdue' or (payment.status == 'Pending' and payment.date < today)
     
     subject = f'Payment Reminder - ${payment.amount} - {payment.type}'
     if is_overdue:
         subject = f'⚠️ Overdue Payment - ${payment.amount} - {payment.type}'
     
-    frontend_url = getattr(settings, 'FRONTEND_URL', 'https://neela-tenant.vercel.app')
-    payment_url = f"{frontend_url.rstrip('/')}"
+    payment_url = static_context()['payment_url']
     
     context = {
         'tenant_name': payment.tenant.name,
@@ -971,10 +939,8 @@ def _send_payment_reminder_to_tenant(payment_id):
         'status': payment.status,
         'property_unit': payment.tenant.property_unit,
         'is_overdue': is_overdue,
-        'payment_url': payment_url,
     }
     
-    html_message = render_to_string('emails/payment_reminder.html', context)
     plain_message = f"""
     Payment Reminder
     
@@ -999,6 +965,27 @@ def _send_payment_reminder_to_tenant(payment_id):
     Thank you,
     Neela Property Management Team
     """
+    return subject, plain_message, context
+
+
+def _send_payment_reminder_to_tenant(payment_id):
+    """
+    Internal function to send reminder email to tenant for pending/overdue payments.
+    """
+    from .models import Payment
+    
+    try:
+        payment = Payment.objects.select_related('tenant').get(id=payment_id)
+    except Payment.DoesNotExist:
+        logger.error(f"Payment with ID {payment_id} not found for reminder email.")
+        return
+    
+    if not payment.tenant.email:
+        logger.warning(f"Tenant {payment.tenant.id} has no email address for payment reminder.")
+        return
+    
+    subject, plain_message, context = _payment_reminder_parts(payment)
+    html_message = render_email('emails/payment_reminder.html', context)
     
     send_email_with_logging(
         subject=subject,
@@ -1010,8 +997,51 @@ def _send_payment_reminder_to_tenant(payment_id):
     )
 
 
-@shared_task
-def send_payment_reminder_to_tenant(payment_id):
+def _send_payment_reminders(payment_ids):
+    """
+    Internal function to send reminders for a chunk of payments: one query, one batch
+    render, one send_messages call over the pooled connection.
+    Returns {'sent', 'skipped', 'failed', 'duration_ms'}.
+    """
+    import time
+    from django.utils import timezone
+    from .email_rendering import render_many
+    from .models import Payment
+    
+    started = time.perf_counter()
+    payments = [
+        p for p in Payment.objects.select_related('tenant').filter(id__in=payment_ids).order_by('id')
+        if p.tenant.email
+    ]
+    skipped = len(payment_ids) - len(payments)
+    today = timezone.now().date()
+    parts = [_payment_reminder_parts(payment, today) for payment in payments]
+    htmls = render_many('emails/payment_reminder.html', [context for _, _, context in parts])
+    
+    messages = []
+    for payment, (subject, plain_message, _), html_message in zip(payments, parts, htmls):
+        email = EmailMultiAlternatives(subject, plain_message, settings.DEFAULT_FROM_EMAIL, [payment.tenant.email])
+        email.attach_alternative(html_message, 'text/html')
+        messages.append(email)
+    
+    try:
+        sent = send_messages(messages)
+    except Exception as e:
+        logger.error(f"Failed to send {len(messages)} payment reminders: {e}", exc_info=True)
+        sent = 0
+    result = {
+        'sent': sent,
+        'skipped': skipped,
+        'failed': len(messages) - sent,
+        'duration_ms': round((time.perf_counter() - started) * 1000),
+    }
+    logger.info(f"Payment reminder chunk of {len(payment_ids)}: {result}")
+    return result
+
+
+@shared_task(bind=True)
+@idempotent()
+def send_payment_reminder_to_tenant(self, payment_id):
     """
     Celery task to send reminder email to tenant for pending/overdue payments.
     """
@@ -1020,6 +1050,16 @@ def send_payment_reminder_to_tenant(payment_id):
     _send_payment_reminder_to_tenant(payment_id)
 
 
+@shared_task(bind=True)
+@idempotent()
+def send_payment_reminders(self, payment_ids):
+    """
+    Celery task to send reminders for a chunk of payments over one pooled connection.
+    """
+    logger.info(f"Celery task executing: send_payment_reminders for {len(payment_ids)} payment(s)")
+    return _send_payment_reminders(payment_ids)
+
+
 def _send_payment_receipt_to_tenant(payment_id):
     """
     Internal function to send receipt email to tenant when payment status changes to 'Paid'.
@@ -1049,7 +1089,7 @@ def _send_payment_receipt_to_tenant(payment_id):
         'status': payment.status,
     }
     
-    html_message = render_to_string('emails/payment_receipt.html', context)
+    html_message = render_email('emails/payment_receipt.html', context)
     plain_message = f"""
     Payment Receipt
     
@@ -1085,8 +1125,9 @@ def _send_payment_receipt_to_tenant(payment_id):
     )
 
 
-@shared_task
-def send_payment_receipt_to_tenant(payment_id):
+@shared_task(bind=True)
+@idempotent()
+def send_payment_receipt_to_tenant(self, payment_id):
     """
     Celery task to send receipt email to tenant when payment status changes to 'Paid'.
     """
@@ -1122,7 +1163,7 @@ def _send_payment_confirmation_to_tenant(payment_id):
         'reference': payment.reference,
     }
     
-    html_message = render_to_string('emails/payment_confirmation.html', context)
+    html_message = render_email('emails/payment_confirmation.html', context)
     plain_message = f"""
     Payment Confirmation
     
@@ -1156,8 +1197,9 @@ def _send_payment_confirmation_to_tenant(payment_id):
     )
 
 
-@shared_task
-def send_payment_confirmation_to_tenant(payment_id):
+@shared_task(bind=True)
+@idempotent()
+def send_payment_confirmation_to_tenant(self, payment_id):
     """
     Celery task to send confirmation email to tenant when payment is submitted.
     """
@@ -1185,7 +1227,7 @@ def _send_lease_ready_for_signing(legal_document_id, token=None):
         logger.warning(f"Tenant {legal_doc.tenant.id} has no email address for lease ready email.")
         return
 
-    frontend_url = getattr(settings, 'FRONTEND_URL', 'https://neela-tenant.vercel.app').rstrip('/')
+    frontend_url = static_context()['frontend_url']
 
     if token:
         signing_url = f"{frontend_url}/sign-lease?token={token}"
@@ -1203,7 +1245,7 @@ def _send_lease_ready_for_signing(legal_document_id, token=None):
         'signing_url': signing_url,
     }
 
-    html_message = render_to_string('emails/lease_ready_for_signing.html', context)
+    html_message = render_email('emails/lease_ready_for_signing.html', context)
     plain_message = f"""Your Lease Agreement is Ready to Sign
 
 Dear {legal_doc.tenant.name},
@@ -1230,8 +1272,9 @@ Neela Property Management Team
     )
 
 
-@shared_task
-def send_lease_ready_for_signing(legal_document_id, token=None):
+@shared_task(bind=True)
+@idempotent()
+def send_lease_ready_for_signing(self, legal_document_id, token=None):
     """
     Celery task to send email to tenant when lease is ready for in-house signing.
     """
@@ -1269,7 +1312,7 @@ def _send_lease_signed_confirmation(legal_document_id):
         
         The final signed lease document has been stored in the system.
         
-        Log in to view: {getattr(settings, 'FRONTEND_URL', 'https://neela-tenant.vercel.app')}
+        Log in to view: {static_context()['frontend_url']}
         """
         
         send_email_with_logging(
@@ -1297,8 +1340,7 @@ def _send_lease_signed_confirmation(legal_document_id):
             # If user needs to set a password (newly created or no usable password)
             if created or not user.has_usable_password():
                 token, uidb64 = generate_password_reset_token(user)
-                frontend_url = getattr(settings, 'FRONTEND_URL', 'https://neela-tenant.vercel.app')
-                setup_url = get_password_reset_url(uidb64, token, frontend_url)
+                setup_url = get_password_reset_url(uidb64, token, static_context()['frontend_url'])
                 logger.info(f"Generated setup URL for tenant {legal_doc.tenant.id} in confirmation email")
         except Exception as e:
             logger.error(f"Error generating setup URL for tenant {legal_doc.tenant.id}: {e}")
@@ -1313,7 +1355,7 @@ def _send_lease_signed_confirmation(legal_document_id):
             'setup_url': setup_url,
         }
         
-        html_message = render_to_string('emails/lease_signed_confirmation.html', context)
+        html_message = render_email('emails/lease_signed_confirmation.html', context)
         plain_message = f"""
         Lease Signed - Confirmation
         
@@ -1403,8 +1445,9 @@ def _send_landlord_lease_ready_to_sign(legal_document_id: int):
     )
 
 
-@shared_task
-def send_landlord_lease_ready_to_sign(legal_document_id: int):
+@shared_task(bind=True)
+@idempotent()
+def send_landlord_lease_ready_to_sign(self, legal_document_id: int):
     """
     Celery task to notify landlord/admin to sign after tenant has signed.
     """
@@ -1416,8 +1459,9 @@ def send_landlord_lease_ready_to_sign(legal_document_id: int):
 
 
 
-@shared_task
-def send_lease_signed_confirmation(legal_document_id):
+@shared_task(bind=True)
+@idempotent()
+def send_lease_signed_confirmation(self, legal_document_id):
     """
     Celery task to send email to tenant when lease is signed.
     """
@@ -1452,7 +1496,7 @@ def _send_application_declined_email_to_user(tenant_id):
         'application_date': tenant.created_at if hasattr(tenant, 'created_at') else None,
     }
     
-    html_message = render_to_string('emails/application_declined.html', context)
+    html_message = render_email('emails/application_declined.html', context)
     plain_message = f"""
     Application Update
     
@@ -1478,8 +1522,9 @@ def _send_application_declined_email_to_user(tenant_id):
     )
 
 
-@shared_task
-def send_application_declined_email_to_user(tenant_id):
+@shared_task(bind=True)
+@idempotent()
+def send_application_declined_email_to_user(self, tenant_id):
     """
     Celery task to send email to user when application is declined.
     """
@@ -1518,7 +1563,7 @@ def _send_notice_to_tenant(legal_document_id, pdf_path=None, pdf_bytes_b64=None)
         'sent_date': legal_doc.created_at,
     }
     
-    html_message = render_to_string('emails/notice_sent.html', context)
+    html_message = render_email('emails/notice_sent.html', context)
     plain_message = f"""
     Legal Notice
     
@@ -1604,18 +1649,19 @@ def _send_notice_to_tenant(legal_document_id, pdf_path=None, pdf_bytes_b64=None)
             except Exception as e:
                 logger.warning(f"Could not attach PDF to notice email: {e}")
         
-        result = email.send(fail_silently=fail_silently)
+        result = send_messages([email], fail_silently=fail_silently)
         
         if result > 0:
             logger.info(f"Notice email sent successfully to {legal_doc.tenant.email} for document {legal_doc.id} (sent {result} email(s))")
         else:
-            logger.error(f"Failed to send notice email: EmailMessage.send returned {result} (0 indicates failure)")
+            logger.error(f"Failed to send notice email: send_messages returned {result} (0 indicates failure)")
     except Exception as e:
         logger.error(f"Error sending notice email to tenant {legal_doc.tenant.email} for document {legal_doc.id}: {e}", exc_info=True)
 
 
-@shared_task
-def send_notice_to_tenant(legal_document_id, pdf_path=None, pdf_bytes_b64=None):
+@shared_task(bind=True)
+@idempotent()
+def send_notice_to_tenant(self, legal_document_id, pdf_path=None, pdf_bytes_b64=None):
     """
     Celery task to send notice email to tenant with PDF attachment.
     """
@@ -1649,7 +1695,7 @@ def _send_application_received_email_to_tenant(tenant_id):
         'property_unit': tenant.property_unit,
     }
     
-    html_message = render_to_string('emails/application_received.html', context)
+    html_message = render_email('emails/application_received.html', context)
     plain_message = f"""
     Application Received
     
@@ -1679,8 +1725,9 @@ def _send_application_received_email_to_tenant(tenant_id):
     )
 
 
-@shared_task
-def send_application_received_email_to_tenant(tenant_id):
+@shared_task(bind=True)
+@idempotent()
+def send_application_received_email_to_tenant(self, tenant_id):
     """
     Celery task to send email to tenant when application is received.
     """
@@ -1714,18 +1761,14 @@ def _send_lease_renewal_reminder(tenant_id, days_remaining):
     
     subject = f'Lease Renewal Reminder - {tenant.property_unit}'
     
-    frontend_url = getattr(settings, 'FRONTEND_URL', 'https://neela-tenant.vercel.app')
-    tenant_portal_url = f"{frontend_url.rstrip('/')}"
-    
     context = {
         'tenant_name': tenant.name,
         'property_unit': tenant.property_unit,
         'lease_end_date': tenant.lease_end,
         'days_remaining': days_remaining,
-        'tenant_portal_url': tenant_portal_url,
     }
     
-    html_message = render_to_string('emails/lease_renewal_reminder.html', context)
+    html_message = render_email('emails/lease_renewal_reminder.html', context)
     plain_message = f"""
     Lease Renewal Reminder
     
@@ -1757,8 +1800,9 @@ def _send_lease_renewal_reminder(tenant_id, days_remaining):
     )
 
 
-@shared_task
-def send_lease_renewal_reminder(tenant_id, days_remaining):
+@shared_task(bind=True)
+@idempotent()
+def send_lease_renewal_reminder(self, tenant_id, days_remaining):
     """
     Celery task to send lease renewal reminder to tenant.
     """
@@ -1787,8 +1831,7 @@ def _send_payment_received_notification_to_admin(payment_id):
         
     subject = f'Payment Received: ${payment.amount} - {payment.tenant.name} - {payment.tenant.property_unit}'
     
-    frontend_url = getattr(settings, 'FRONTEND_URL', 'https://neela-tenant.vercel.app')
-    admin_login_url = f"{frontend_url.rstrip('/')}/admin-login"
+    admin_login_url = static_context()['admin_login_url']
     
     plain_message = f"""
     Payment Received
@@ -1822,8 +1865,9 @@ def _send_payment_received_notification_to_admin(payment_id):
     )
 
 
-@shared_task
-def send_payment_received_notification_to_admin(payment_id):
+@shared_task(bind=True)
+@idempotent()
+def send_payment_received_notification_to_admin(self, payment_id):
     """
     Celery task to send email notification to admin when payment is received/confirmed.
     """
@@ -1857,8 +1901,7 @@ def _send_proof_of_payment_notification_to_admin(payment_id):
 
     subject = f'Proof of Payment Uploaded: {payment.tenant.name} - ${payment.amount}'
 
-    frontend_url = getattr(settings, 'FRONTEND_URL', 'https://neela-tenant.vercel.app')
-    admin_login_url = f"{frontend_url.rstrip('/')}/admin-login"
+    admin_login_url = static_context()['admin_login_url']
 
     context = {
         'tenant_name': payment.tenant.name,
@@ -1868,10 +1911,9 @@ def _send_proof_of_payment_notification_to_admin(payment_id):
         'date': payment.date,
         'reference': payment.reference or '',
         'proof_count': proof_count,
-        'admin_login_url': admin_login_url,
     }
 
-    html_message = render_to_string('emails/proof_of_payment_notification.html', context)
+    html_message = render_email('emails/proof_of_payment_notification.html', context)
     plain_message = f"""
 Tenant Uploaded Proof of Payment
 
@@ -1900,8 +1942,9 @@ Proof Files: {proof_count} file(s) attached
     )
 
 
-@shared_task
-def send_proof_of_payment_notification_to_admin(payment_id):
+@shared_task(bind=True)
+@idempotent()
+def send_proof_of_payment_notification_to_admin(self, payment_id):
     """
     Celery task to send email notification to admin when tenant uploads proof of payment.
     """
@@ -1951,8 +1994,9 @@ Please review and confirm in the admin Short Stays section.
     )
 
 
-@shared_task
-def send_short_stay_proof_notification_to_admin(booking_id):
+@shared_task(bind=True)
+@idempotent()
+def send_short_stay_proof_notification_to_admin(self, booking_id):
     email_backend = getattr(settings, 'EMAIL_BACKEND', 'unknown')
     logger.info(f"Celery task executing: send_short_stay_proof_notification_to_admin for booking {booking_id}, using email backend: {email_backend}")
     _send_short_stay_proof_notification_to_admin(booking_id)
@@ -2050,8 +2094,9 @@ We hope you enjoy your stay!
     )
 
 
-@shared_task
-def send_short_stay_confirmation_to_guest(booking_id):
+@shared_task(bind=True)
+@idempotent()
+def send_short_stay_confirmation_to_guest(self, booking_id):
     logger.info(f"Sending short-stay confirmation email for booking {booking_id}")
     _send_short_stay_confirmation_to_guest(booking_id)
 
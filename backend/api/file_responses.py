@@ -0,0 +1,129 @@
+"""
+Streaming file responses with HTTP Range / If-Range support for document proxies.
+
+PDF viewers request byte ranges to render pages incrementally; serving the file
+in chunks keeps a large scanned lease from pinning a worker's memory.
+"""
+import hashlib
+import os
+import re
+
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_CACHE_CONTROL = 'private, max-age=300'
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+_UNSATISFIABLE = object()
+
+
+def _file_size(fileobj):
+    size = getattr(fileobj, 'size', None)
+    if size is None:
+        pos = fileobj.tell()
+        fileobj.seek(0, os.SEEK_END)
+        size = fileobj.tell()
+        fileobj.seek(pos)
+    return size
+
+
+def _parse_range(header, size):
+    """
+    Single byte range → (start, end) inclusive. None means "ignore, send the whole
+    file" (multi-range or malformed, as RFC 9110 allows); _UNSATISFIABLE → 416.
+    """
+    m = _RANGE_RE.match(header.strip())
+    if not m:
+        return None
+    first, last = m.groups()
+    if not first and not last:
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            return _UNSATISFIABLE
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    if start >= size:
+        return _UNSATISFIABLE
+    end = int(last) if last else size - 1
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def _iter_chunks(fileobj, start, length):
+    try:
+        fileobj.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = fileobj.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+def _etag_matches(header, etag):
+    tags = [t.strip() for t in header.split(',')]
+    return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+
+def ranged_file_response(
+    request,
+    fileobj,
+    *,
+    content_type,
+    etag_source,
+    filename=None,
+    disposition='inline',
+    cache_control=DEFAULT_CACHE_CONTROL,
+):
+    """
+    Stream an open, seekable file (closed when the response finishes).
+    etag_source: stable identity of the content (storage name, version…); size is mixed in.
+    """
+    size = _file_size(fileobj)
+    etag = '"%s"' % hashlib.sha1(f'{etag_source}:{size}'.encode('utf-8')).hexdigest()[:32]
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and _etag_matches(if_none_match, etag):
+        fileobj.close()
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        return response
+
+    start, end, status = 0, size - 1, 200
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header:
+        if_range = (request.META.get('HTTP_IF_RANGE') or '').strip()
+        # If-Range with a stale validator (or a date) → send the full, current file.
+        if not if_range or if_range == etag:
+            parsed = _parse_range(range_header, size)
+            if parsed is _UNSATISFIABLE:
+                fileobj.close()
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+            if parsed:
+                start, end = parsed
+                status = 206
+
+    length = max(0, end - start + 1)
+    response = StreamingHttpResponse(
+        _iter_chunks(fileobj, start, length),
+        status=status,
+        content_type=content_type,
+    )
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    if status == 206:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    if filename:
+        response['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+    return response
@@ -0,0 +1,227 @@
+"""
+Idempotent task execution.
+
+A redelivered Celery message (worker lost before ack, broker visibility timeout)
+runs the task again and sends the same email twice. A redelivery keeps its task
+id, so @idempotent (under a bound task) claims the key task name + task id before
+running the body; a second execution of the same message inside the TTL is
+skipped. A deliberate resend is a new message with a new id and always runs:
+
+    @shared_task(bind=True)
+    @idempotent()
+    def send_payment_invoice_to_tenant(self, payment_id): ...
+
+A task that should also collapse separate calls with the same arguments opts in
+with a key built from them:
+
+    @idempotent(key=lambda booking_id: f"booking:{booking_id}", ttl=24 * 3600)
+
+Calls made inline (no task id, e.g. the fallback when the broker is down) are
+not broker redeliveries and run without a claim.
+
+A claim is 'running' for IDEMPOTENCY_RUNNING_TTL_SECONDS, so a task whose worker
+died is retried after that; success marks it 'done' for the TTL, and an
+exception releases it so Celery retries can run. Keys live in Redis
+(IDEMPOTENCY_REDIS_URL, the broker by default) or, without Redis, in the
+TaskIdempotencyKey table. idempotency_stats() returns per-task hit/miss counts.
+"""
+import functools
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 60 * 60
+DEFAULT_RUNNING_TTL_SECONDS = 10 * 60
+KEY_PREFIX = 'idem:'
+STATS_KEY = 'idem:stats'
+
+_local_stats = Counter()
+_stats_lock = threading.Lock()
+_redis_client = None
+_redis_lock = threading.Lock()
+_redis_down_until = 0.0
+# After a Redis error, use the database for this long before trying Redis again.
+REDIS_RETRY_SECONDS = 60
+
+
+def _redis():
+    """Redis client for idempotency keys, or None when not configured/available."""
+    global _redis_client
+    url = getattr(settings, 'IDEMPOTENCY_REDIS_URL', None)
+    if not url or not url.startswith(('redis://', 'rediss://')):
+        return None
+    if time.monotonic() < _redis_down_until:
+        return None
+    with _redis_lock:
+        if _redis_client is None:
+            try:
+                import redis
+                _redis_client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+            except Exception as e:
+                logger.warning(f"Idempotency Redis unavailable, using the database: {e}")
+                return None
+        return _redis_client
+
+
+class _RedisStore:
+    def __init__(self, client):
+        self.client = client
+
+    def claim(self, key, running_ttl):
+        return bool(self.client.set(key, 'running', nx=True, ex=running_ttl))
+
+    def complete(self, key, ttl):
+        self.client.set(key, 'done', ex=ttl)
+
+    def release(self, key):
+        self.client.delete(key)
+
+    def count(self, task_name, outcome):
+        self.client.hincrby(STATS_KEY, f'{task_name}:{outcome}', 1)
+
+
+class _DatabaseStore:
+    def claim(self, key, running_ttl):
+        from .models import TaskIdempotencyKey
+
+        now = timezone.now()
+        TaskIdempotencyKey.objects.filter(key=key, expires_at__lte=now).delete()
+        try:
+            with transaction.atomic():
+                TaskIdempotencyKey.objects.create(
+                    key=key, state='running', expires_at=now + timedelta(seconds=running_ttl),
+                )
+        except IntegrityError:
+            return False
+        return True
+
+    def complete(self, key, ttl):
+        from .models import TaskIdempotencyKey
+
+        TaskIdempotencyKey.objects.filter(key=key).update(
+            state='done', expires_at=timezone.now() + timedelta(seconds=ttl),
+        )
+
+    def release(self, key):
+        from .models import TaskIdempotencyKey
+
+        TaskIdempotencyKey.objects.filter(key=key).delete()
+
+    def count(self, task_name, outcome):
+        pass
+
+
+def _store():
+    client = _redis()
+    return _RedisStore(client) if client is not None else _DatabaseStore()
+
+
+def _redis_failed(e):
+    global _redis_down_until
+    logger.warning(f"Idempotency Redis error, using the database for {REDIS_RETRY_SECONDS}s: {e}")
+    _redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+
+
+def _count(store, task_name, outcome):
+    with _stats_lock:
+        _local_stats[(task_name, outcome)] += 1
+    try:
+        store.count(task_name, outcome)
+    except Exception as e:
+        logger.debug(f"Could not record idempotency {outcome} for {task_name}: {e}")
+
+
+def idempotent(key=None, ttl=None):
+    """
+    Decorator (under @shared_task(bind=True)) that skips an execution whose key was
+    already claimed. By default the key is the task id, so only redeliveries of
+    the same message are skipped; `key` (a callable taking the task's arguments)
+    opts in to deduplicating by arguments. Skipped calls return None.
+    """
+    def decorator(func):
+        task_name = f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if key is not None:
+                raw_key = f"{task_name}:{key(*args, **kwargs)}"
+            else:
+                task_id = getattr(self.request, 'id', None)
+                if not task_id:
+                    return func(self, *args, **kwargs)
+                raw_key = f"{task_name}:{task_id}"
+            full_key = KEY_PREFIX + raw_key
+            done_ttl = ttl or int(getattr(settings, 'IDEMPOTENCY_TTL_SECONDS', DEFAULT_TTL_SECONDS))
+            running_ttl = int(getattr(settings, 'IDEMPOTENCY_RUNNING_TTL_SECONDS', DEFAULT_RUNNING_TTL_SECONDS))
+
+            store = _store()
+            try:
+                try:
+                    claimed = store.claim(full_key, running_ttl)
+                except Exception as e:
+                    if not isinstance(store, _RedisStore):
+                        raise
+                    _redis_failed(e)
+                    store = _DatabaseStore()
+                    claimed = store.claim(full_key, running_ttl)
+            except Exception as e:
+                # Never drop an email because the key store is down; run without dedup.
+                logger.warning(f"Idempotency claim failed for {task_name}, running anyway: {e}")
+                return func(self, *args, **kwargs)
+            if not claimed:
+                _count(store, task_name, 'hit')
+                logger.info(f"Skipping duplicate execution of {task_name} ({raw_key})")
+                return None
+            _count(store, task_name, 'miss')
+
+            try:
+                result = func(self, *args, **kwargs)
+            except Exception:
+                try:
+                    store.release(full_key)
+                except Exception as e:
+                    logger.warning(f"Could not release idempotency key for {task_name}: {e}")
+                raise
+            try:
+                store.complete(full_key, done_ttl)
+            except Exception as e:
+                logger.warning(f"Could not mark {task_name} done: {e}")
+            return result
+
+        wrapper.idempotency_task_name = task_name
+        return wrapper
+    return decorator
+
+
+def idempotency_stats():
+    """{task_name: {'hit': n, 'miss': n}} — shared counts from Redis, else this process's."""
+    stats = {}
+    client = _redis()
+    if client is not None:
+        try:
+            for field, value in client.hgetall(STATS_KEY).items():
+                task_name, _, outcome = field.decode().rpartition(':')
+                stats.setdefault(task_name, {'hit': 0, 'miss': 0})[outcome] = int(value)
+            return stats
+        except Exception as e:
+            logger.warning(f"Could not read idempotency stats from Redis: {e}")
+    with _stats_lock:
+        for (task_name, outcome), value in _local_stats.items():
+            stats.setdefault(task_name, {'hit': 0, 'miss': 0})[outcome] = value
+    return stats
+
+
+def purge_expired_idempotency_keys():
+    """Delete expired TaskIdempotencyKey rows (Redis keys expire on their own)."""
+    from .models import TaskIdempotencyKey
+
+    deleted, _ = TaskIdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,182 @@
+"""
+Thumbnail / medium derivatives for Listing and Property images.
+
+Listing cards and property grids used to download the full-resolution photo.
+When an image is set, a Celery task renders downscaled JPEGs with Pillow and
+saves them through default_storage under deterministic keys:
+
+  derivatives/<digest[:2]>/<digest>_<size>.jpg   (digest = hash of the source)
+
+The resulting URLs are recorded on the row's `image_derivatives` JSON together
+with the source they were built from, so a replaced image never serves a stale
+thumbnail; serializers fall back to the original until derivatives exist.
+
+Listing image URLs are client-supplied, so a URL source is only fetched over
+https from IMAGE_DERIVATIVE_SOURCE_HOSTS (Cloudinary by default), without
+following redirects; other URLs keep serving the original image.
+Backfill: python manage.py backfill_image_derivatives
+"""
+import hashlib
+import logging
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels.
+DERIVATIVE_SIZES = {
+    'thumb': 320,
+    'medium': 960,
+}
+JPEG_QUALITY = 82
+MAX_SOURCE_BYTES = 25 * 1024 * 1024
+DEFAULT_SOURCE_HOSTS = ('res.cloudinary.com',)
+
+
+def image_source(obj):
+    """Identity of the image a Listing/Property currently shows ('' when none)."""
+    field = getattr(obj, 'image', None)
+    if hasattr(field, 'name'):
+        if field:
+            return field.name
+        return getattr(obj, 'image_url', None) or ''
+    return field or ''
+
+
+def _uploaded_file(obj):
+    field = getattr(obj, 'image', None)
+    return field if hasattr(field, 'name') and field else None
+
+
+def is_allowed_source_url(url):
+    """True for https URLs on an owned image host (IMAGE_DERIVATIVE_SOURCE_HOSTS)."""
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return False
+    hosts = {h.lower() for h in getattr(settings, 'IMAGE_DERIVATIVE_SOURCE_HOSTS', DEFAULT_SOURCE_HOSTS)}
+    return (
+        parts.scheme == 'https'
+        and port in (None, 443)
+        and not parts.username
+        and (parts.hostname or '').lower() in hosts
+    )
+
+
+def derivative_key(source, size):
+    digest = hashlib.sha256(source.encode('utf-8')).hexdigest()[:32]
+    return f"derivatives/{digest[:2]}/{digest}_{size}.jpg"
+
+
+def derivative_url(obj, size):
+    """Stored derivative URL for the current image, or None (caller falls back to the original)."""
+    derivatives = getattr(obj, 'image_derivatives', None) or {}
+    source = image_source(obj)
+    if not source or derivatives.get('source') != source:
+        return None
+    return derivatives.get(size)
+
+
+def needs_derivatives(obj):
+    source = image_source(obj)
+    if not source or (obj.image_derivatives or {}).get('source') == source:
+        return False
+    return bool(_uploaded_file(obj)) or is_allowed_source_url(source)
+
+
+def _read_source(obj):
+    field = _uploaded_file(obj)
+    if field:
+        field.open('rb')
+        try:
+            return field.read()
+        finally:
+            field.close()
+
+    from .cloudinary_files import get_http_session
+
+    url = image_source(obj)
+    if not is_allowed_source_url(url):
+        raise ValueError(f"Refusing to fetch image from a non-allowed host: {urlsplit(url).hostname or url[:100]}")
+    response = get_http_session().get(url, timeout=30, stream=True, allow_redirects=False)
+    try:
+        response.raise_for_status()
+        chunks, total = [], 0
+        for chunk in response.iter_content(64 * 1024):
+            total += len(chunk)
+            if total > MAX_SOURCE_BYTES:
+                raise ValueError(f"Image larger than {MAX_SOURCE_BYTES} bytes: {url}")
+            chunks.append(chunk)
+        return b''.join(chunks)
+    finally:
+        response.close()
+
+
+def render_derivatives(data):
+    """Original image bytes → {size: jpeg bytes}."""
+    from PIL import Image, ImageOps
+
+    with Image.open(BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        rendered = {}
+        for size, edge in DERIVATIVE_SIZES.items():
+            copy = img.copy()
+            copy.thumbnail((edge, edge), Image.LANCZOS)
+            out = BytesIO()
+            copy.save(out, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+            rendered[size] = out.getvalue()
+    return rendered
+
+
+def generate_derivatives(obj, force=False):
+    """
+    Build and store derivatives for obj's current image; records them on the row.
+    Returns the derivatives dict, or None when there is no image / nothing to do.
+    """
+    source = image_source(obj)
+    if not source:
+        return None
+    if not force and not needs_derivatives(obj):
+        return obj.image_derivatives
+
+    rendered = render_derivatives(_read_source(obj))
+    derivatives = {'source': source}
+    for size, content in rendered.items():
+        key = derivative_key(source, size)
+        exists = default_storage.exists(key)
+        if exists and force:
+            default_storage.delete(key)
+            exists = False
+        if not exists:
+            key = default_storage.save(key, ContentFile(content))
+        derivatives[size] = default_storage.url(key)
+
+    # update() so the write does not race a concurrent edit of other fields.
+    type(obj).objects.filter(pk=obj.pk).update(image_derivatives=derivatives)
+    obj.image_derivatives = derivatives
+    logger.info(f"Generated image derivatives for {type(obj).__name__} {obj.pk}")
+    return derivatives
+
+
+def schedule_derivatives(obj):
+    """Queue derivative generation after an image changes (inline if Celery is down)."""
+    if not needs_derivatives(obj):
+        return
+    from .tasks import generate_image_derivatives
+
+    model_name = type(obj).__name__.lower()
+    try:
+        generate_image_derivatives.delay(model_name, obj.pk)
+    except Exception as e:
+        logger.warning(f"Celery connection failed, generating image derivatives synchronously: {e}")
+        try:
+            generate_derivatives(obj)
+        except Exception as exc:
+            logger.error(f"Image derivatives failed for {model_name} {obj.pk}: {exc}")
@@ -0,0 +1,167 @@
+"""
+Batch lease generation (renewal waves) as a ReportJob of kind 'lease_batch'.
+
+Per batch:
+  1. fill every tenant's lease from one compiled template (single query for tenants)
+  2. render PDFs and upload them on a bounded thread pool
+  3. bulk_create LegalDocument rows, then their LeaseSigningTokens
+  4. mark tenants Sent with one UPDATE and queue all signing emails as one Celery group
+
+Per-tenant status is written to ReportJob.progress as items finish, so the client
+polls /report-jobs/<id>/ exactly like a P&L job.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import LeaseSigningToken, LeaseTemplate, LegalDocument, Tenant
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE_BATCH_WORKERS = 4
+MAX_LEASE_BATCH_SIZE = 500
+# Write progress to the job row at most every N finished items.
+PROGRESS_EVERY = 10
+
+
+def _workers():
+    return max(1, int(getattr(settings, 'LEASE_BATCH_WORKERS', DEFAULT_LEASE_BATCH_WORKERS)))
+
+
+def batch_tenants(params):
+    """Tenants selected by params: explicit tenant_ids, or a lease_end window (+ optional status)."""
+    qs = Tenant.objects.all()
+    tenant_ids = params.get('tenant_ids')
+    if tenant_ids:
+        qs = qs.filter(id__in=tenant_ids)
+    else:
+        if params.get('lease_end_from'):
+            qs = qs.filter(lease_end__gte=params['lease_end_from'])
+        if params.get('lease_end_to'):
+            qs = qs.filter(lease_end__lte=params['lease_end_to'])
+        if params.get('status'):
+            qs = qs.filter(status=params['status'])
+    return qs.order_by('id')
+
+
+def _batch_template(params):
+    from .lease_service import resolve_lease_template
+
+    if params.get('template_id'):
+        return LeaseTemplate.objects.get(id=params['template_id'])
+    return resolve_lease_template()
+
+
+def _render_and_upload(tenant_id, filled_content, stamp):
+    """Render, scan the signing field layout and upload; returns (pdf_file name, field_layout)."""
+    from .lease_service import upload_lease_pdf
+    from .pdf_renderer import render_lease
+    from .signature_layout import document_field_layout
+
+    pdf_bytes = render_lease(filled_content)
+    field_layout = document_field_layout(pdf_bytes)
+    return upload_lease_pdf(f"lease_{tenant_id}_{stamp}.pdf", pdf_bytes), field_layout
+
+
+def _save_progress(job, progress):
+    job.progress = progress
+    job.save(update_fields=['progress'])
+
+
+def build_lease_batch(job):
+    """ReportJob builder: returns the per-tenant summary stored as the job result."""
+    from .email_service import send_lease_ready_for_signing
+    from .lease_service import fill_lease_template
+    from .lease_templates import get_compiled_template
+
+    params = job.params or {}
+    send = params.get('send', True)
+    template = _batch_template(params)
+    compiled = get_compiled_template(template)
+    tenants = list(batch_tenants(params)[:MAX_LEASE_BATCH_SIZE])
+
+    items = {t.id: {'tenant_id': t.id, 'tenant_name': t.name, 'status': 'pending'} for t in tenants}
+    progress = {'total': len(tenants), 'done': 0, 'failed': 0, 'items': list(items.values())}
+    _save_progress(job, progress)
+
+    filled = {}
+    for tenant in tenants:
+        try:
+            filled[tenant.id] = fill_lease_template(template.content, tenant, compiled=compiled)
+        except Exception as e:
+            items[tenant.id].update(status='failed', error=str(e))
+            progress['failed'] += 1
+
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    uploaded = {}
+    with ThreadPoolExecutor(max_workers=min(_workers(), max(1, len(filled))), thread_name_prefix='lease-batch') as executor:
+        futures = {
+            executor.submit(_render_and_upload, tenant_id, content, stamp): tenant_id
+            for tenant_id, content in filled.items()
+        }
+        for n, future in enumerate(as_completed(futures), start=1):
+            tenant_id = futures[future]
+            try:
+                uploaded[tenant_id] = future.result()
+                items[tenant_id]['status'] = 'uploaded'
+            except Exception as e:
+                logger.error(f"Lease batch {job.id}: tenant {tenant_id} failed: {e}")
+                items[tenant_id].update(status='failed', error=str(e))
+                progress['failed'] += 1
+            progress['done'] = n
+            if n % PROGRESS_EVERY == 0:
+                _save_progress(job, progress)
+
+    doc_status = 'Sent' if send else 'Draft'
+    with transaction.atomic():
+        docs = LegalDocument.objects.bulk_create([
+            LegalDocument(
+                tenant_id=tenant_id,
+                template=template,
+                type='Lease Agreement',
+                generated_content=filled[tenant_id],
+                status=doc_status,
+                delivery_method='In-House' if send else None,
+                pdf_file=name,
+                field_layout=field_layout,
+            )
+            for tenant_id, (name, field_layout) in uploaded.items()
+        ])
+        tokens = []
+        if send:
+            expires_at = timezone.now() + timedelta(days=7)
+            tokens = LeaseSigningToken.objects.bulk_create([
+                LeaseSigningToken(legal_document=doc, expires_at=expires_at) for doc in docs
+            ])
+            Tenant.objects.filter(id__in=[doc.tenant_id for doc in docs]).update(lease_status='Sent')
+
+    for doc in docs:
+        items[doc.tenant_id].update(status='sent' if send else 'generated', legal_document_id=doc.id)
+
+    if tokens:
+        from celery import group
+
+        signatures = [send_lease_ready_for_signing.si(t.legal_document_id, token=str(t.token)) for t in tokens]
+        try:
+            group(signatures).apply_async()
+        except Exception as e:
+            logger.warning(f"Celery unavailable for lease batch {job.id} emails, sending inline: {e}")
+            for sig in signatures:
+                try:
+                    sig.apply()
+                except Exception as exc:
+                    logger.error(f"Lease-ready email failed: {exc}")
+
+    progress['done'] = len(tenants)
+    _save_progress(job, progress)
+    return {
+        'template_id': template.id,
+        'total': len(tenants),
+        'generated': len(docs),
+        'failed': progress['failed'],
+        'items': progress['items'],
+    }
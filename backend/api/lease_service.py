@@ -1,7 +1,9 @@
 
 import base64
 import logging
+import os
 import re
+import tempfile
 from io import BytesIO
 from datetime import datetime, timedelta
 from typing import Any
@@ -11,12 +13,9 @@ from django.conf import settings
 
 logger = logging.getLogger(__name__)
 from django.core.files.base import ContentFile
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
 from .models import Tenant, LeaseTemplate, LegalDocument
+from .lease_templates import compile_template, get_compiled_template
+from .pdf_renderer import render_lease
 
 
 def _property_city_state_zip(tenant: Tenant) -> str:
@@ -37,16 +36,37 @@ def _last_day_of_month(d):
     return next_first - timedelta(days=1)
 
 
-def fill_lease_template(template_content: str, tenant: Tenant) -> str:
+# Every placeholder lease_placeholder_values() fills; templates are validated against it.
+LEASE_PLACEHOLDERS = frozenset({
+    'bathrooms', 'bathrooms_desired', 'bedrooms', 'bedrooms_desired', 'citizenship',
+    'company_name', 'current_date', 'date_of_birth', 'deposit', 'deposit_amount',
+    'dl_state', 'driver_license', 'emergency_contact_address',
+    'emergency_contact_email', 'emergency_contact_name', 'emergency_contact_phone',
+    'employer', 'employment_duration', 'employment_start_date', 'eye_color',
+    'hair_color', 'has_pets_check', 'height', 'job_title', 'landlord_address',
+    'landlord_email', 'landlord_name', 'landlord_phone', 'late_fee_amount',
+    'late_fee_day', 'lease_end', 'lease_end_date', 'lease_start', 'lease_start_date',
+    'marital_status', 'monthly_income', 'move_in_date', 'move_in_date_prev',
+    'move_out_date_prev', 'move_out_deadline', 'no_pets_check', 'occupants',
+    'period_end_date', 'period_start_date', 'pets_description', 'previous_address',
+    'previous_landlord', 'previous_landlord_email', 'previous_landlord_phone',
+    'previous_rent', 'property_address', 'property_city_state_zip', 'property_manager',
+    'property_unit', 'reason_for_leaving', 'rent_amount', 'returned_check_fee', 'ssn',
+    'supervisor_name', 'supervisor_phone', 'tenant_current_address', 'tenant_email',
+    'tenant_first_name', 'tenant_last_name', 'tenant_name', 'tenant_phone',
+    'vehicles_list', 'weight',
+})
+
+
+def lease_placeholder_values(tenant: Tenant) -> dict:
     """
-    Fill lease template with tenant data.
+    Placeholder name → value for one tenant (keys match LEASE_PLACEHOLDERS).
     
     Args:
-        template_content: Template string with placeholders
         tenant: Tenant instance
         
     Returns:
-        Filled template string
+        dict of placeholder values
     """
     # Extract name parts
     name_parts = tenant.name.split(' ', 1)
@@ -86,27 +106,27 @@ def fill_lease_template(template_content: str, tenant: Tenant) -> str:
 
     # Template variables
     replacements = {
-        '{{tenant_name}}': tenant.name,
-        '{{tenant_first_name}}': first_name,
-        '{{tenant_last_name}}': last_name,
-        '{{tenant_email}}': tenant.email,
-        '{{tenant_phone}}': tenant.phone,
-        '{{property_unit}}': tenant.property_unit,
-        '{{rent_amount}}': f"${tenant.rent_amount:,.2f}",
-        '{{deposit_amount}}': f"${tenant.deposit:,.2f}",
+        'tenant_name': tenant.name,
+        'tenant_first_name': first_name,
+        'tenant_last_name': last_name,
+        'tenant_email': tenant.email,
+        'tenant_phone': tenant.phone,
+        'property_unit': tenant.property_unit,
+        'rent_amount': f"${tenant.rent_amount:,.2f}",
+        'deposit_amount': f"${tenant.deposit:,.2f}",
         # Backward-compatible aliases used by some legal/compliance templates
-        '{{deposit}}': f"{tenant.deposit:,.2f}",
-        '{{lease_start_date}}': lease_start.strftime('%m/%d/%Y'),
-        '{{lease_end_date}}': lease_end.strftime('%m/%d/%Y'),
-        '{{lease_start}}': lease_start.strftime('%m/%d/%Y'),
-        '{{lease_end}}': lease_end.strftime('%m/%d/%Y'),
-        '{{employer}}': (
+        'deposit': f"{tenant.deposit:,.2f}",
+        'lease_start_date': lease_start.strftime('%m/%d/%Y'),
+        'lease_end_date': lease_end.strftime('%m/%d/%Y'),
+        'lease_start': lease_start.strftime('%m/%d/%Y'),
+        'lease_end': lease_end.strftime('%m/%d/%Y'),
+        'employer': (
             application_data.get('currentEmployer') or
             employment.get('employer') or
             '__________'
         ),
-        '{{job_title}}': employment.get('jobTitle') or application_data.get('jobTitle') or '__________',
-        '{{monthly_income}}': (
+        'job_title': employment.get('jobTitle') or application_data.get('jobTitle') or '__________',
+        'monthly_income': (
             f"${float(employment.get('monthlyIncome')):,.2f}"
             if employment.get('monthlyIncome') not in (None, '')
             else (
@@ -115,98 +135,127 @@ def fill_lease_template(template_content: str, tenant: Tenant) -> str:
                 else '__________'
             )
         ),
-        '{{current_date}}': datetime.now().strftime('%m/%d/%Y'),
-        '{{property_manager}}': getattr(settings, 'PROPERTY_MANAGER_NAME', None) or 'Neela Capital Investment',
+        'current_date': datetime.now().strftime('%m/%d/%Y'),
+        'property_manager': getattr(settings, 'PROPERTY_MANAGER_NAME', None) or 'Neela Capital Investment',
         
         # Landlord/company from settings only (no hardcoded defaults)
-        '{{landlord_name}}': getattr(settings, 'LANDLORD_NAME', None) or '[Landlord Name]',
-        '{{landlord_address}}': getattr(settings, 'LANDLORD_ADDRESS', None) or '[Landlord Address]',
-        '{{landlord_phone}}': getattr(settings, 'LANDLORD_PHONE', None) or '[Landlord Phone]',
-        '{{landlord_email}}': getattr(settings, 'LANDLORD_EMAIL', None) or '[Landlord Email]',
+        'landlord_name': getattr(settings, 'LANDLORD_NAME', None) or '[Landlord Name]',
+        'landlord_address': getattr(settings, 'LANDLORD_ADDRESS', None) or '[Landlord Address]',
+        'landlord_phone': getattr(settings, 'LANDLORD_PHONE', None) or '[Landlord Phone]',
+        'landlord_email': getattr(settings, 'LANDLORD_EMAIL', None) or '[Landlord Email]',
         
         # Property city/state/zip: derive from tenant.property_unit when it contains commas, else settings or placeholder
-        '{{property_city_state_zip}}': _property_city_state_zip(tenant),
+        'property_city_state_zip': _property_city_state_zip(tenant),
         # Aliases used in some templates (e.g. Settings UI)
-        '{{company_name}}': getattr(settings, 'PROPERTY_MANAGER_NAME', None) or getattr(settings, 'LANDLORD_NAME', None) or 'Neela Capital Investment',
-        '{{property_address}}': tenant.property_unit or '[Property Address]',
+        'company_name': getattr(settings, 'PROPERTY_MANAGER_NAME', None) or getattr(settings, 'LANDLORD_NAME', None) or 'Neela Capital Investment',
+        'property_address': tenant.property_unit or '[Property Address]',
         
         # Date helpers for Notices
-        '{{period_start_date}}': lease_start.replace(day=1).strftime('%m/%d/%Y'),
-        '{{period_end_date}}': (_last_day_of_month(lease_start)).strftime('%m/%d/%Y'),
+        'period_start_date': lease_start.replace(day=1).strftime('%m/%d/%Y'),
+        'period_end_date': (_last_day_of_month(lease_start)).strftime('%m/%d/%Y'),
         
         # Termination Helper (Default to 30 days from now)
-        '{{move_out_deadline}}': (datetime.now() + timedelta(days=30)).strftime('%B %d, %Y'),
+        'move_out_deadline': (datetime.now() + timedelta(days=30)).strftime('%B %d, %Y'),
         
         # New helpers for Application Packet
-        '{{tenant_current_address}}': application_data.get('currentAddress', ''),
-        '{{move_in_date}}': application_data.get('desiredMoveInDate', ''),
+        'tenant_current_address': application_data.get('currentAddress', ''),
+        'move_in_date': application_data.get('desiredMoveInDate', ''),
         
-        '{{occupants}}': other_occupants,
+        'occupants': other_occupants,
         
         # --- APPLICATION DATA MAPPING ---
         # This maps fields from the frontend Application Form directly to the Lease/Notice
         
         # Property Preferences
-        '{{bedrooms_desired}}': bedrooms_val,
-        '{{bathrooms_desired}}': bathrooms_val,
+        'bedrooms_desired': bedrooms_val,
+        'bathrooms_desired': bathrooms_val,
         
         # Personal Info (Extended)
-        '{{date_of_birth}}': application_data.get('dateOfBirth') or application_data.get('dob') or '__________',
-        '{{driver_license}}': application_data.get('driverLicense') or '__________',
-        '{{dl_state}}': application_data.get('driverLicenseState') or '__________',
-        '{{ssn}}': application_data.get('ssn') or application_data.get('ssnLast4') or '__________',
-        '{{marital_status}}': application_data.get('maritalStatus') or '__________',
-        '{{citizenship}}': application_data.get('citizenship') or '__________',
-        '{{height}}': application_data.get('height') or '__________',
-        '{{weight}}': application_data.get('weight') or '__________',
-        '{{hair_color}}': application_data.get('hairColor') or '__________',
-        '{{eye_color}}': application_data.get('eyeColor') or '__________',
+        'date_of_birth': application_data.get('dateOfBirth') or application_data.get('dob') or '__________',
+        'driver_license': application_data.get('driverLicense') or '__________',
+        'dl_state': application_data.get('driverLicenseState') or '__________',
+        'ssn': application_data.get('ssn') or application_data.get('ssnLast4') or '__________',
+        'marital_status': application_data.get('maritalStatus') or '__________',
+        'citizenship': application_data.get('citizenship') or '__________',
+        'height': application_data.get('height') or '__________',
+        'weight': application_data.get('weight') or '__________',
+        'hair_color': application_data.get('hairColor') or '__________',
+        'eye_color': application_data.get('eyeColor') or '__________',
 
         # Emergency Contact (parsed from combined "Name, Relationship, Phone" string)
-        '{{emergency_contact_name}}': ec_name or '__________',
-        '{{emergency_contact_phone}}': ec_phone or '__________',
-        '{{emergency_contact_address}}': application_data.get('emergencyContactAddress') or '__________',
-        '{{emergency_contact_email}}': application_data.get('emergencyContactEmail') or '__________',
+        'emergency_contact_name': ec_name or '__________',
+        'emergency_contact_phone': ec_phone or '__________',
+        'emergency_contact_address': application_data.get('emergencyContactAddress') or '__________',
+        'emergency_contact_email': application_data.get('emergencyContactEmail') or '__________',
         
         # Vehicles
         # If we have a list, we might need to join it or just take the first few
-        '{{vehicles_list}}': ', '.join([f"{v.get('year')} {v.get('make')} {v.get('model')}" for v in application_data.get('vehicles', [])]) if application_data.get('vehicles') else 'None',
+        'vehicles_list': ', '.join([f"{v.get('year')} {v.get('make')} {v.get('model')}" for v in application_data.get('vehicles', [])]) if application_data.get('vehicles') else 'None',
         
         # Pets
-        '{{pets_description}}': ', '.join([f"{p.get('type')} ({p.get('name')})" for p in application_data.get('pets', [])]) if application_data.get('pets') else 'No Pets',
-        '{{has_pets_check}}': '[x]' if application_data.get('pets') else '[_PetY_]',
-        '{{no_pets_check}}': '[ ]' if application_data.get('pets') else '[_PetN_]',
+        'pets_description': ', '.join([f"{p.get('type')} ({p.get('name')})" for p in application_data.get('pets', [])]) if application_data.get('pets') else 'No Pets',
+        'has_pets_check': '[x]' if application_data.get('pets') else '[_PetY_]',
+        'no_pets_check': '[ ]' if application_data.get('pets') else '[_PetN_]',
         
         # Employment (Extended)
-        '{{supervisor_name}}': employment.get('supervisorName') or '__________',
-        '{{supervisor_phone}}': employment.get('supervisorPhone') or '__________',
-        '{{employment_start_date}}': employment.get('startDate') or '__________',
-        '{{employment_duration}}': employment.get('duration') or '__________',
+        'supervisor_name': employment.get('supervisorName') or '__________',
+        'supervisor_phone': employment.get('supervisorPhone') or '__________',
+        'employment_start_date': employment.get('startDate') or '__________',
+        'employment_duration': employment.get('duration') or '__________',
         
         # Rental History
-        '{{previous_address}}': application_data.get('previousAddress') or '__________',
-        '{{previous_landlord}}': application_data.get('previousLandlordInfo') or '__________',
-        '{{previous_landlord_phone}}': application_data.get('previousLandlordPhone') or '__________',
-        '{{previous_landlord_email}}': application_data.get('previousLandlordEmail') or '__________',
-        '{{previous_rent}}': application_data.get('previousRent') or '__________',
-        '{{reason_for_leaving}}': application_data.get('reasonForLeaving') or '__________',
-        '{{move_in_date_prev}}': application_data.get('prevMoveInDate') or '__________',
-        '{{move_out_date_prev}}': application_data.get('prevMoveOutDate') or '__________',
+        'previous_address': application_data.get('previousAddress') or '__________',
+        'previous_landlord': application_data.get('previousLandlordInfo') or '__________',
+        'previous_landlord_phone': application_data.get('previousLandlordPhone') or '__________',
+        'previous_landlord_email': application_data.get('previousLandlordEmail') or '__________',
+        'previous_rent': application_data.get('previousRent') or '__________',
+        'reason_for_leaving': application_data.get('reasonForLeaving') or '__________',
+        'move_in_date_prev': application_data.get('prevMoveInDate') or '__________',
+        'move_out_date_prev': application_data.get('prevMoveOutDate') or '__________',
         
         # Standard Placeholders (if not mapped above)
-        '{{bedrooms}}': bedrooms_val,
-        '{{bathrooms}}': bathrooms_val,
-        '{{late_fee_amount}}': '$50.00',
-        '{{late_fee_day}}': '3rd',
-        '{{returned_check_fee}}': '$55.00',
+        'bedrooms': bedrooms_val,
+        'bathrooms': bathrooms_val,
+        'late_fee_amount': '$50.00',
+        'late_fee_day': '3rd',
+        'returned_check_fee': '$55.00',
     }
+    return replacements
+
+
+def fill_lease_template(template_content: str, tenant: Tenant, compiled=None) -> str:
+    """
+    Fill lease template with tenant data (single pass over the compiled template).
     
-    # Replace all placeholders
-    filled_content = template_content
-    for placeholder, value in replacements.items():
-        filled_content = filled_content.replace(placeholder, str(value))
-    
-    return filled_content
+    Args:
+        template_content: Template string with placeholders
+        tenant: Tenant instance
+        compiled: CompiledTemplate for template_content, when the caller has one cached
+        
+    Returns:
+        Filled template string
+    """
+    compiled = compiled or compile_template(template_content)
+    values = lease_placeholder_values(tenant)
+    missing = compiled.missing(values)
+    if missing:
+        logger.warning(f"Lease template placeholders without a value (left as-is): {', '.join(missing)}")
+    return compiled.render(values)
+
+
+def resolve_lease_template(template: LeaseTemplate = None) -> LeaseTemplate:
+    """The given template, else the first active one (creating the default if none exists)."""
+    if template:
+        return template
+    template = LeaseTemplate.objects.filter(is_active=True).first()
+    if not template:
+        # Create default template if none exists
+        template = LeaseTemplate.objects.create(
+            name='Standard Residential Lease',
+            content=get_default_lease_template(),
+            is_active=True
+        )
+    return template
 
 
 def generate_lease_pdf(tenant: Tenant, template: LeaseTemplate = None):
@@ -221,58 +270,14 @@ def generate_lease_pdf(tenant: Tenant, template: LeaseTemplate = None):
         tuple: (PDF BytesIO object, filled content string)
     """
     # Get template
-    if not template:
-        template = LeaseTemplate.objects.filter(is_active=True).first()
-        if not template:
-            # Create default template if none exists
-            template = LeaseTemplate.objects.create(
-                name='Standard Residential Lease',
-                content=get_default_lease_template(),
-                is_active=True
-            )
-    
-    # Fill template with tenant data
-    filled_content = fill_lease_template(template.content, tenant)
+    template = resolve_lease_template(template)
     
-    # Create PDF
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter,
-                           rightMargin=72, leftMargin=72,
-                           topMargin=72, bottomMargin=18)
-    
-    # Container for the 'Flowable' objects
-    elements = []
-    
-    # Define styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor=colors.HexColor('#1e293b'),
-        spaceAfter=30,
-        alignment=1,  # Center
-    )
-    
-    # Add title
-    elements.append(Paragraph("RESIDENTIAL LEASE AGREEMENT", title_style))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Split content into paragraphs and add to PDF
-    paragraphs = filled_content.split('\n\n')
-    for para in paragraphs:
-        if para.strip():
-            # Clean up the paragraph
-            para = para.strip().replace('\n', '<br/>')
-            elements.append(Paragraph(para, styles['Normal']))
-            elements.append(Spacer(1, 0.1*inch))
-    
-    # Build PDF
-    doc.build(elements)
-    
-    # Reset buffer position
-    buffer.seek(0)
+    # Fill template with tenant data (compiled once per template version)
+    filled_content = fill_lease_template(template.content, tenant, compiled=get_compiled_template(template))
     
+    # Create PDF (shared renderer; styles are built once per process)
+    buffer = BytesIO(render_lease(filled_content))
+
     return buffer, filled_content
 
 
@@ -323,7 +328,7 @@ Tenant's Signature: _________________________  Date: {{current_date}}
 {{tenant_name}}"""
 
 
-def save_lease_document(tenant: Tenant, pdf_buffer: BytesIO, filled_content: str) -> LegalDocument:
+def save_lease_document(tenant: Tenant, pdf_buffer: BytesIO, filled_content: str, template: LeaseTemplate = None) -> LegalDocument:
     """
     Save lease document to database and storage.
     
@@ -331,17 +336,23 @@ def save_lease_document(tenant: Tenant, pdf_buffer: BytesIO, filled_content: str
         tenant: Tenant instance
         pdf_buffer: PDF file buffer
         filled_content: Filled template content
+        template: LeaseTemplate the content came from (recorded on the document)
         
     Returns:
         LegalDocument instance
     """
+    from .signature_layout import document_field_layout
+
     # Always create a NEW legal document (each generation is a new version)
     # Don't reuse old leases - they serve as history
     legal_doc = LegalDocument.objects.create(
         tenant=tenant,
+        template=template,
         type='Lease Agreement',
         generated_content=filled_content,
         status='Draft',
+        # Scan the filled PDF: tenant values reflow the text, moving the anchors.
+        field_layout=document_field_layout(pdf_buffer.getvalue()),
     )
     
     # Save PDF file
@@ -435,66 +446,152 @@ def save_lease_document(tenant: Tenant, pdf_buffer: BytesIO, filled_content: str
     return legal_doc
 
 
+def upload_lease_pdf(filename: str, pdf_bytes: bytes) -> str:
+    """
+    Store a lease PDF and return the name to put on LegalDocument.pdf_file
+    (same Cloudinary raw layout as save_lease_document; safe to call from worker threads).
+    """
+    if hasattr(settings, 'CLOUDINARY_STORAGE') and settings.CLOUDINARY_STORAGE.get('CLOUD_NAME'):
+        try:
+            import cloudinary.uploader
+
+            if not cloudinary.config().api_secret:
+                cloudinary.config(
+                    cloud_name=settings.CLOUDINARY_STORAGE['CLOUD_NAME'],
+                    api_key=settings.CLOUDINARY_STORAGE['API_KEY'],
+                    api_secret=settings.CLOUDINARY_STORAGE['API_SECRET']
+                )
+            # Keep public_id WITHOUT the extension (see save_lease_document).
+            public_id = f"media/leases/{filename}"
+            if public_id.lower().endswith(".pdf"):
+                public_id = public_id[:-4]
+            upload_result = cloudinary.uploader.upload(
+                BytesIO(pdf_bytes),
+                resource_type="raw",
+                public_id=public_id,
+                type="upload",
+                format="pdf",
+            )
+            return upload_result.get('public_id') or public_id
+        except Exception as e:
+            logger.error(f"Cloudinary raw upload failed for {filename}, using default storage: {e}")
+
+    from django.core.files.storage import default_storage
+    return default_storage.save(f"leases/{filename}", ContentFile(pdf_bytes))
+
+
 # Letter size in points (PyMuPDF / PDF coordinate system)
 _PDF_PAGE_WIDTH = 612
 _PDF_PAGE_HEIGHT = 792
 
 
-def stamp_signed_pdf(pdf_bytes: bytes, fields: list[dict], values: dict[str, Any]) -> bytes:
-
-    if not pdf_bytes or not isinstance(fields, list):
-        raise ValueError("pdf_bytes and fields required")
+def _apply_overlays(doc, fields: list[dict], values: dict[str, Any]) -> None:
+    """Draw checkbox ticks, text and signature images for `fields` onto the open document."""
+    for field in fields:
+        field_id = field.get("id")
+        field_type = field.get("type")
+        if not field_id or field_type not in ("checkbox", "text", "signature"):
+            continue
+        raw = values.get(field_id)
+        if raw is None:
+            continue
+        page_index = max(0, int(field.get("page", 1)) - 1)
+        if page_index >= len(doc):
+            continue
+        page = doc[page_index]
+        x = float(field.get("x", 0))
+        y = float(field.get("y", 0))
+        w = float(field.get("width", 0.1))
+        h = float(field.get("height", 0.05))
+        left = x * _PDF_PAGE_WIDTH
+        top = y * _PDF_PAGE_HEIGHT
+        right = (x + w) * _PDF_PAGE_WIDTH
+        bottom = (y + h) * _PDF_PAGE_HEIGHT
+        rect = fitz.Rect(left, top, right, bottom)
+
+        if field_type == "checkbox":
+            checked = raw is True or (isinstance(raw, str) and str(raw).lower() in ("true", "1", "yes", "x"))
+            if checked:
+                cx = (left + right) / 2
+                fontsize = min(14, rect.height * 0.8)
+                pt = fitz.Point(cx - fontsize * 0.3, rect.y1 - 2)
+                page.insert_text(pt, "✓", fontsize=fontsize, color=(0, 0, 0))
+        elif field_type == "text":
+            text = str(raw).strip() if raw else ""
+            if text:
+                page.insert_textbox(rect, text, fontsize=10, fontname="helv", align=0)
+        elif field_type == "signature":
+            if isinstance(raw, str) and raw.startswith("data:image"):
+                try:
+                    payload = raw.split(",", 1)[1]
+                    image_bytes = base64.b64decode(payload)
+                    if image_bytes:
+                        page.insert_image(rect, stream=image_bytes)
+                except Exception as e:
+                    logger.warning("Failed to stamp signature image for %s: %s", field_id, e)
+
+
+def _stamp_full_rewrite(pdf_bytes: bytes, fields: list[dict], values: dict[str, Any]) -> bytes:
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
     if len(doc) == 0:
         doc.close()
         raise ValueError("PDF has no pages")
     out = BytesIO()
     try:
-        for field in fields:
-            field_id = field.get("id")
-            field_type = field.get("type")
-            if not field_id or field_type not in ("checkbox", "text", "signature"):
-                continue
-            raw = values.get(field_id)
-            if raw is None:
-                continue
-            page_index = max(0, int(field.get("page", 1)) - 1)
-            if page_index >= len(doc):
-                continue
-            page = doc[page_index]
-            x = float(field.get("x", 0))
-            y = float(field.get("y", 0))
-            w = float(field.get("width", 0.1))
-            h = float(field.get("height", 0.05))
-            left = x * _PDF_PAGE_WIDTH
-            top = y * _PDF_PAGE_HEIGHT
-            right = (x + w) * _PDF_PAGE_WIDTH
-            bottom = (y + h) * _PDF_PAGE_HEIGHT
-            rect = fitz.Rect(left, top, right, bottom)
-
-            if field_type == "checkbox":
-                checked = raw is True or (isinstance(raw, str) and str(raw).lower() in ("true", "1", "yes", "x"))
-                if checked:
-                    cx = (left + right) / 2
-                    fontsize = min(14, rect.height * 0.8)
-                    pt = fitz.Point(cx - fontsize * 0.3, rect.y1 - 2)
-                    page.insert_text(pt, "✓", fontsize=fontsize, color=(0, 0, 0))
-            elif field_type == "text":
-                text = str(raw).strip() if raw else ""
-                if text:
-                    page.insert_textbox(rect, text, fontsize=10, fontname="helv", align=0)
-            elif field_type == "signature":
-                if isinstance(raw, str) and raw.startswith("data:image"):
-                    try:
-                        payload = raw.split(",", 1)[1]
-                        image_bytes = base64.b64decode(payload)
-                        if image_bytes:
-                            page.insert_image(rect, stream=image_bytes)
-                    except Exception as e:
-                        logger.warning("Failed to stamp signature image for %s: %s", field_id, e)
+        _apply_overlays(doc, fields, values)
     finally:
         doc.save(out, deflate=True, garbage=4)
         doc.close()
     return out.getvalue()
 
 
+def _stamp_incremental(pdf_bytes: bytes, fields: list[dict], values: dict[str, Any]) -> bytes | None:
+    """
+    Append the overlays as an incremental update: the original bytes are kept
+    as-is and only the changed objects are written after them. PyMuPDF can only
+    save incrementally to the file it opened, so the PDF goes through a temp file.
+    Returns None when the document cannot be updated incrementally.
+    """
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(pdf_bytes)
+        doc = fitz.open(path)
+        try:
+            # Empty, repaired or encrypted files go through the full rewrite.
+            if len(doc) == 0 or doc.needs_pass or doc.is_repaired or not doc.can_save_incrementally():
+                return None
+            _apply_overlays(doc, fields, values)
+            doc.save(path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+        finally:
+            doc.close()
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def stamp_signed_pdf(pdf_bytes: bytes, fields: list[dict], values: dict[str, Any],
+                     incremental: bool = True) -> bytes:
+    """
+    Stamp filled field values onto a PDF. By default the overlays are appended
+    as an incremental update (original bytes unchanged, cost independent of file
+    size); falls back to a full deflate/garbage-collect rewrite when needed.
+    Benchmark: python manage.py bench_pdf_stamping
+    """
+    if not pdf_bytes or not isinstance(fields, list):
+        raise ValueError("pdf_bytes and fields required")
+    if incremental:
+        try:
+            stamped = _stamp_incremental(pdf_bytes, fields, values)
+            if stamped is not None:
+                return stamped
+            logger.info("PDF cannot be saved incrementally; rewriting in full")
+        except Exception as e:
+            logger.warning("Incremental PDF stamp failed, rewriting in full: %s", e)
+    return _stamp_full_rewrite(pdf_bytes, fields, values)
+
+
@@ -0,0 +1,285 @@
+"""
+Finish an in-house lease signature off the request path.
+
+submit_signed and sign_lease_by_token validate the submission, mark the document
+'Signing' and queue stamp_signed_lease on the dedicated PDF queue
+(PDF_STAMP_QUEUE; run a worker with `-Q pdf --max-memory-per-child`). The task
+downloads the lease, stamps it, uploads the signed copy and only then publishes
+the document as 'Signed', revoking links minted for the unsigned copy.
+signing_audit['stamp'] records status and timings. A worker killed mid-stamp
+(hard time limit, OOM) never reaches fail_signed_lease, so the beat job
+release_stuck_signed_leases fails documents left 'Signing' past
+PDF_STAMP_STALE_SECONDS and releases their signing link.
+"""
+import logging
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PDF_STAMP_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_PDF_STAMP_STALE_SECONDS = 300
+
+
+class StampInputTooLarge(Exception):
+    pass
+
+
+class SigningConflict(Exception):
+    """The document is already Signing/Signed, or the signing link was just used."""
+
+
+def _cloudinary_configured():
+    return hasattr(settings, 'CLOUDINARY_STORAGE') and settings.CLOUDINARY_STORAGE.get('CLOUD_NAME')
+
+
+def lease_pdf_version(legal_doc):
+    """
+    Version of the bytes behind legal_doc.pdf_file, for the local Cloudinary file
+    cache. A document's PDF is written when the row is created and replaced only
+    by signing (new name, new signed_at), so these change whenever the bytes do.
+    """
+    signed_at = legal_doc.signed_at.isoformat() if legal_doc.signed_at else ''
+    return f"{legal_doc.pk}:{legal_doc.created_at.isoformat()}:{signed_at}"
+
+
+def read_lease_pdf(legal_doc):
+    """Current PDF bytes for a document (Cloudinary, then default storage), or None."""
+    from .cloudinary_files import download_cloudinary_file
+
+    pdf_bytes = None
+    if _cloudinary_configured():
+        public_id = (legal_doc.pdf_file.name or '').lstrip('/')
+        pdf_bytes = download_cloudinary_file(public_id, version=lease_pdf_version(legal_doc))
+    if not pdf_bytes:
+        try:
+            legal_doc.pdf_file.open('rb')
+            pdf_bytes = legal_doc.pdf_file.read()
+            legal_doc.pdf_file.close()
+        except Exception as e:
+            logger.warning(f"Could not read PDF file from storage: {e}")
+    return pdf_bytes
+
+
+def store_signed_pdf(legal_doc, signed_pdf_bytes):
+    """Upload the signed copy and point legal_doc.pdf_file at it (caller saves)."""
+    filename = f"signed_lease_{legal_doc.tenant_id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    if _cloudinary_configured():
+        try:
+            import cloudinary.uploader
+            if not cloudinary.config().api_secret:
+                cloudinary.config(
+                    cloud_name=settings.CLOUDINARY_STORAGE['CLOUD_NAME'],
+                    api_key=settings.CLOUDINARY_STORAGE['API_KEY'],
+                    api_secret=settings.CLOUDINARY_STORAGE['API_SECRET'],
+                )
+            public_id_new = f"media/signed_leases/{filename}"
+            if public_id_new.lower().endswith('.pdf'):
+                public_id_new = public_id_new[:-4]
+            upload_result = cloudinary.uploader.upload(
+                signed_pdf_bytes,
+                resource_type="raw",
+                public_id=public_id_new,
+                type="upload",
+                format="pdf",
+            )
+            legal_doc.pdf_file.name = upload_result.get('public_id') or public_id_new
+            return
+        except Exception as e:
+            logger.error(f"Cloudinary upload failed for signed PDF: {e}")
+    legal_doc.pdf_file.save(filename, ContentFile(signed_pdf_bytes), save=False)
+
+
+def queue_signed_lease(legal_doc, *, values, fields, audit, signing_token=None):
+    """
+    Mark the document as Signing and hand stamping to the PDF worker.
+    Runs inline when Celery is unavailable. Returns the refreshed document.
+    Raises SigningConflict when another submission got there first.
+    """
+    from .models import LeaseSigningToken, LegalDocument
+    from .tasks import stamp_signed_lease
+
+    signing_token_id = signing_token.id if signing_token is not None else None
+    with transaction.atomic():
+        # Row locks make the status check and the move to Signing one step, so two
+        # concurrent submissions cannot both queue a stamp.
+        locked = LegalDocument.objects.select_for_update().get(pk=legal_doc.pk)
+        if locked.status in ('Signing', 'Signed'):
+            raise SigningConflict(f'Document is already {locked.status.lower()}')
+        if signing_token_id is not None:
+            token = LeaseSigningToken.objects.select_for_update().get(pk=signing_token_id)
+            if not token.is_valid:
+                raise SigningConflict('This signing link has already been used or has expired.')
+            # One submission per link; released again if stamping fails.
+            token.used_at = timezone.now()
+            token.save(update_fields=['used_at'])
+
+        previous_status = locked.status
+        queued_at = timezone.now().isoformat()
+        locked.status = 'Signing'
+        locked.signing_audit = {
+            **audit,
+            'stamp': {
+                'status': 'pending',
+                'queued_at': queued_at,
+                # Kept so release_stuck_signed_leases can restore the document.
+                'previous_status': previous_status,
+                'signing_token_id': signing_token_id,
+            },
+        }
+        locked.save(update_fields=['status', 'signing_audit'])
+
+    kwargs = {
+        'values': values,
+        'fields': fields,
+        'previous_status': previous_status,
+        'signing_token_id': signing_token_id,
+        'queued_at': queued_at,
+    }
+    try:
+        stamp_signed_lease.delay(legal_doc.id, **kwargs)
+        logger.info(f"Queued PDF stamping for document {legal_doc.id}")
+    except Exception as e:
+        logger.warning(f"Celery connection failed, stamping document {legal_doc.id} inline: {e}")
+        finalize_signed_lease(legal_doc.id, **kwargs)
+    legal_doc.refresh_from_db()
+    return legal_doc
+
+
+def fail_signed_lease(legal_document_id, error, previous_status='Sent', signing_token_id=None):
+    """Record a failed stamp, restore the document so it can be signed again."""
+    from .models import LeaseSigningToken, LegalDocument
+
+    legal_doc = LegalDocument.objects.filter(id=legal_document_id).first()
+    if legal_doc is None:
+        return
+    audit = dict(legal_doc.signing_audit or {})
+    audit['stamp'] = {
+        **(audit.get('stamp') or {}),
+        'status': 'failed',
+        'error': str(error)[:500],
+        'failed_at': timezone.now().isoformat(),
+    }
+    legal_doc.status = previous_status or 'Sent'
+    legal_doc.signing_audit = audit
+    legal_doc.save(update_fields=['status', 'signing_audit'])
+    if signing_token_id:
+        LeaseSigningToken.objects.filter(id=signing_token_id).update(used_at=None)
+
+
+def _stale_cutoff():
+    stale = int(getattr(settings, 'PDF_STAMP_STALE_SECONDS', DEFAULT_PDF_STAMP_STALE_SECONDS))
+    return timezone.now() - timedelta(seconds=stale)
+
+
+def release_stuck_signed_leases():
+    """
+    Fail documents whose stamp was queued more than PDF_STAMP_STALE_SECONDS ago and
+    are still Signing (worker killed or task lost). Returns the number released.
+    """
+    from .models import LegalDocument
+
+    cutoff = _stale_cutoff()
+    released = 0
+    with transaction.atomic():
+        for legal_doc in LegalDocument.objects.select_for_update(skip_locked=True).filter(status='Signing'):
+            stamp = (legal_doc.signing_audit or {}).get('stamp') or {}
+            try:
+                queued_at = datetime.fromisoformat(stamp.get('queued_at') or '')
+            except ValueError:
+                queued_at = None
+            if queued_at is not None and queued_at > cutoff:
+                continue
+            logger.error(f"Document {legal_doc.id} stuck in Signing since {stamp.get('queued_at')}; releasing it")
+            fail_signed_lease(
+                legal_doc.id,
+                'Stamping did not finish (worker lost or timed out)',
+                stamp.get('previous_status') or 'Sent',
+                stamp.get('signing_token_id'),
+            )
+            released += 1
+    return released
+
+
+def finalize_signed_lease(legal_document_id, *, values, fields, previous_status='Sent', signing_token_id=None,
+                          queued_at=None):
+    """Download, stamp, upload and publish a signed lease (the stamp_signed_lease task body)."""
+    from .document_urls import legal_document_scope, revoke_document_urls
+    from .email_outbox import enqueue_email
+    from .lease_service import stamp_signed_pdf
+    from .models import LegalDocument
+
+    legal_doc = LegalDocument.objects.select_related('tenant').filter(id=legal_document_id).first()
+    if legal_doc is None:
+        logger.error(f"Legal document {legal_document_id} not found for stamping.")
+        return
+    if legal_doc.status != 'Signing':
+        logger.info(f"Document {legal_document_id} is {legal_doc.status}; skipping stamp.")
+        return
+    current = ((legal_doc.signing_audit or {}).get('stamp') or {}).get('queued_at')
+    if queued_at is not None and current != queued_at:
+        # Released as stuck and signed again since; this delivery belongs to the old submission.
+        logger.info(f"Document {legal_document_id} was resubmitted; skipping stale stamp.")
+        return
+
+    try:
+        started = time.perf_counter()
+        pdf_bytes = read_lease_pdf(legal_doc)
+        if not pdf_bytes:
+            raise ValueError('Could not retrieve PDF')
+        max_bytes = int(getattr(settings, 'PDF_STAMP_MAX_BYTES', DEFAULT_PDF_STAMP_MAX_BYTES))
+        if len(pdf_bytes) > max_bytes:
+            raise StampInputTooLarge(f"PDF is {len(pdf_bytes)} bytes (limit {max_bytes})")
+        downloaded = time.perf_counter()
+        signed_pdf_bytes = stamp_signed_pdf(pdf_bytes, fields, values)
+        stamped = time.perf_counter()
+        store_signed_pdf(legal_doc, signed_pdf_bytes)
+        uploaded = time.perf_counter()
+    except Exception as e:
+        logger.error(f"Error stamping PDF for document {legal_document_id}: {e}", exc_info=True)
+        fail_signed_lease(legal_document_id, e, previous_status, signing_token_id)
+        return
+
+    audit = dict(legal_doc.signing_audit or {})
+    audit['stamp'] = {
+        **(audit.get('stamp') or {}),
+        'status': 'done',
+        'input_bytes': len(pdf_bytes),
+        'output_bytes': len(signed_pdf_bytes),
+        # Incremental stamps keep the original bytes as an untouched prefix.
+        'incremental': signed_pdf_bytes.startswith(pdf_bytes),
+        'download_ms': round((downloaded - started) * 1000),
+        'stamp_ms': round((stamped - downloaded) * 1000),
+        'upload_ms': round((uploaded - stamped) * 1000),
+        'finished_at': timezone.now().isoformat(),
+    }
+    with transaction.atomic():
+        legal_doc.status = 'Signed'
+        legal_doc.signed_at = timezone.now()
+        legal_doc.signing_audit = audit
+        legal_doc.save()
+
+        tenant = legal_doc.tenant
+        tenant.lease_status = 'Signed'
+        # Auto-activate resident once signing is completed (tenant-only or tenant+landlord flow).
+        if tenant.status != 'Active':
+            tenant.status = 'Active'
+            tenant.save(update_fields=['lease_status', 'status'])
+        else:
+            tenant.save(update_fields=['lease_status'])
+
+        # Confirmation emails to tenant and admin go out through the outbox with this commit.
+        enqueue_email('send_lease_signed_confirmation', legal_doc.id)
+
+    # Links minted for the unsigned PDF must not keep serving it. The version lives in
+    # the shared Redis cache (settings.CACHES), so gunicorn sees a bump made here.
+    try:
+        revoke_document_urls(legal_document_scope(legal_doc.id))
+    except Exception as e:
+        # The document is already Signed; old links still expire within DOCUMENT_URL_TTL_SECONDS.
+        logger.error(f"Could not revoke document links for {legal_doc.id}: {e}")
@@ -0,0 +1,79 @@
+"""
+Compiled lease/notice templates.
+
+A template body is tokenized once into literal chunks and {{placeholder}} names;
+rendering is a single join over the chunks, so cost no longer scales with
+(placeholders × template length). Compiled LeaseTemplates are cached per process,
+keyed by (id, updated_at), so an edit in the admin UI recompiles on next use.
+
+Placeholders are exact `{{name}}` tokens. Names without a value are left in the
+output verbatim, as the old str.replace loop did.
+"""
+import logging
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_RE = re.compile(r'\{\{([A-Za-z0-9_]+)\}\}')
+COMPILED_CACHE_SIZE = 64
+
+
+class CompiledTemplate:
+    """Literal chunks interleaved with placeholder names: [text, name, text, name, ..., text]."""
+
+    __slots__ = ('chunks', 'names')
+
+    def __init__(self, content):
+        self.chunks = PLACEHOLDER_RE.split(content or '')
+        self.names = frozenset(self.chunks[1::2])
+
+    def missing(self, values):
+        """Placeholder names used by the template that have no value."""
+        return sorted(self.names.difference(values))
+
+    def render(self, values):
+        chunks = self.chunks
+        out = chunks[:]
+        for i in range(1, len(chunks), 2):
+            name = chunks[i]
+            out[i] = str(values[name]) if name in values else '{{%s}}' % name
+        return ''.join(out)
+
+
+@lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def compile_template(content):
+    """Compile raw template text (custom content, default template)."""
+    return CompiledTemplate(content)
+
+
+_template_cache = OrderedDict()
+_template_cache_lock = threading.Lock()
+
+
+def get_compiled_template(template):
+    """Compiled form of a LeaseTemplate row, cached by (id, updated_at)."""
+    if template.pk is None:
+        return compile_template(template.content)
+    key = (template.pk, template.updated_at)
+    with _template_cache_lock:
+        compiled = _template_cache.get(key)
+        if compiled is not None:
+            _template_cache.move_to_end(key)
+            return compiled
+    compiled = CompiledTemplate(template.content)
+    with _template_cache_lock:
+        # Drop older versions of the same template, then the least recently used.
+        for stale in [k for k in _template_cache if k[0] == template.pk]:
+            del _template_cache[stale]
+        _template_cache[key] = compiled
+        while len(_template_cache) > COMPILED_CACHE_SIZE:
+            _template_cache.popitem(last=False)
+    return compiled
+
+
+def unknown_placeholders(content, known):
+    """Placeholder names in content that are not in `known` (sorted)."""
+    return sorted(set(PLACEHOLDER_RE.findall(content or '')).difference(known))
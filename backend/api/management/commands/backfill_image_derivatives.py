@@ -0,0 +1,42 @@
+"""
+Generate thumbnail/medium derivatives for existing Listing and Property images.
+
+Run (from backend/):
+  python manage.py backfill_image_derivatives
+  python manage.py backfill_image_derivatives --model property --force
+"""
+from django.core.management.base import BaseCommand
+
+from api.image_derivatives import generate_derivatives, needs_derivatives
+from api.models import Listing, Property
+
+MODELS = {'listing': Listing, 'property': Property}
+
+
+class Command(BaseCommand):
+    help = 'Backfill image derivatives (thumb/medium) for listings and properties'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=sorted(MODELS), help='Only this model (default: both)')
+        parser.add_argument('--force', action='store_true', help='Rebuild even when derivatives are current')
+
+    def handle(self, *args, **options):
+        names = [options['model']] if options['model'] else sorted(MODELS)
+        force = options['force']
+        for name in names:
+            built = skipped = failed = 0
+            for obj in MODELS[name].objects.order_by('pk').iterator():
+                if not force and not needs_derivatives(obj):
+                    skipped += 1
+                    continue
+                try:
+                    if generate_derivatives(obj, force=force):
+                        built += 1
+                    else:
+                        skipped += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'{name} {obj.pk}: {e}')
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: {built} built, {skipped} skipped, {failed} failed'
+            ))
@@ -0,0 +1,93 @@
+"""
+Worst-case latency of Cloudinary variant probing against a local stub server.
+
+Every candidate URL is answered by a local HTTP server after --delay-ms; only the
+last candidate returns 200, so this measures a full miss-then-hit probe.
+
+Run (from backend/):
+  python manage.py bench_cloudinary_probe
+  python manage.py bench_cloudinary_probe --delay-ms 300 --workers 8
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+import cloudinary
+import requests
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from api import cloudinary_files
+
+RESOURCE_TYPES = ['image', 'raw']
+FORMATS = ['pdf', 'jpg', 'jpeg', 'png', 'webp']
+
+
+def _stub_handler(delay, winner):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            parts = urlsplit(self.path)
+            query = parse_qs(parts.query)
+            # /v1_1/<cloud>/<resource_type>/download?format=..&type=..
+            resource_type = parts.path.rstrip('/').split('/')[-2]
+            key = (resource_type, query.get('format', [''])[0], query.get('type', [''])[0])
+            body = b'%PDF-1.4 stub' if key == winner else b'not found'
+            self.send_response(200 if key == winner else 404)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class _StubSession(requests.Session):
+    """Sends every request to the local stub instead of api.cloudinary.com."""
+
+    def __init__(self, netloc):
+        super().__init__()
+        self._netloc = netloc
+
+    def get(self, url, **kwargs):
+        parts = urlsplit(url)
+        return super().get(urlunsplit(('http', self._netloc, parts.path, parts.query, '')), **kwargs)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark serial vs pooled Cloudinary variant probing against a local stub'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delay-ms', type=int, default=200, help='Stub latency per request')
+        parser.add_argument('--workers', type=int, default=6, help='Probe pool size for the concurrent run')
+
+    def handle(self, *args, **options):
+        if not cloudinary.config().api_secret:
+            cloudinary.config(cloud_name='bench', api_key='bench', api_secret='bench')
+
+        candidates = cloudinary_files._candidate_variants(RESOURCE_TYPES, FORMATS)
+        last = candidates[-1]
+        winner = (last['resource_type'], last['format'], last['type'])
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _stub_handler(options['delay_ms'] / 1000, winner))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        previous = cloudinary_files.set_http_session(_StubSession(f'127.0.0.1:{server.server_port}'))
+        try:
+            for label, workers in (('serial', 1), ('pooled', options['workers'])):
+                with override_settings(CLOUDINARY_PROBE_WORKERS=workers):
+                    start = time.perf_counter()
+                    data, variant = cloudinary_files._probe_private_variants('bench/document.pdf', candidates)
+                    elapsed = time.perf_counter() - start
+                found = 'hit' if data else 'miss'
+                self.stdout.write(
+                    f'{label:>6} (workers={workers}): {elapsed * 1000:.0f} ms for '
+                    f'{len(candidates)} candidates ({found})'
+                )
+        finally:
+            cloudinary_files.set_http_session(previous)
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,79 @@
+"""
+Time rendering rent reminder emails.
+
+"uncached" resets the template loader before every email (a template compile per
+send), "render_to_string" is the old per-email call, "render_many" renders the
+whole batch from one compiled template and the shared static context.
+No database access: reminders are built from sample values.
+
+Run (from backend/):
+  python manage.py bench_email_rendering
+  python manage.py bench_email_rendering --count 2000
+"""
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.template.loader import render_to_string
+
+from api.email_rendering import clear_email_template_cache, render_many, static_context
+
+TEMPLATE = 'emails/payment_reminder.html'
+
+
+def _contexts(count):
+    due = date.today() - timedelta(days=3)
+    return [
+        {
+            'tenant_name': f'Tenant {i}',
+            'amount': Decimal('1450.00') + i,
+            'payment_type': 'Rent',
+            'due_date': due,
+            'status': 'Overdue',
+            'property_unit': f'123 Main St, Unit {i}',
+            'is_overdue': True,
+        }
+        for i in range(count)
+    ]
+
+
+def _reset_loaders():
+    for loader in engines['django'].engine.template_loaders:
+        if hasattr(loader, 'reset'):
+            loader.reset()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark rendering rent reminder emails: per-call vs cached batch rendering'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500, help='Reminders per run')
+
+    def handle(self, *args, **options):
+        count = max(1, options['count'])
+        contexts = _contexts(count)
+
+        def uncached():
+            out = []
+            for context in contexts:
+                _reset_loaders()
+                out.append(render_to_string(TEMPLATE, {**static_context(), **context}))
+            return out
+
+        def per_call():
+            return [render_to_string(TEMPLATE, {**static_context(), **context}) for context in contexts]
+
+        def batch():
+            return render_many(TEMPLATE, contexts)
+
+        clear_email_template_cache()
+        for label, run in (('uncached', uncached), ('render_to_string', per_call), ('render_many', batch)):
+            start = time.perf_counter()
+            rendered = run()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{label:>16}: {count} reminders in {elapsed * 1000:.0f} ms '
+                f'({elapsed * 1000 / count:.3f} ms each, {sum(map(len, rendered)) // count} chars avg)'
+            )
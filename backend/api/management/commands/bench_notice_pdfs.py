@@ -0,0 +1,57 @@
+"""
+Time notice PDF generation through the shared renderer.
+
+"cold" clears the cached style sheet before every notice (the old per-call
+getSampleStyleSheet behaviour); "shared" reuses the process-wide styles.
+No database access: notices are rendered from sample text.
+
+Run (from backend/):
+  python manage.py bench_notice_pdfs
+  python manage.py bench_notice_pdfs --count 500
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import pdf_renderer
+
+SAMPLE_NOTICE = """Date: January 05, 2026
+
+To: Jane Doe
+Property: 123 Main St, Unit 4, Houston, TX 77011
+
+RE: NOTICE OF LATE RENT
+
+Dear Jane Doe,
+
+This notice is to inform you that your rent payment of $1,450.00 was due on the 1st of the month and has not been received.
+
+Outstanding Balance: $1,450.00
+
+Please remit payment immediately to avoid additional late fees.
+A late fee of $50.00 has been assessed per your lease agreement.
+
+Neela Property Management Team"""
+
+
+class Command(BaseCommand):
+    help = 'Benchmark notice PDF rendering with per-call vs shared reportlab styles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100, help='Notices per run')
+
+    def handle(self, *args, **options):
+        count = max(1, options['count'])
+        for label, reset in (('cold', True), ('shared', False)):
+            pdf_renderer.get_styles.cache_clear()
+            total_bytes = 0
+            start = time.perf_counter()
+            for _ in range(count):
+                if reset:
+                    pdf_renderer.get_styles.cache_clear()
+                total_bytes += len(pdf_renderer.render_notice('Notice of Late Rent', SAMPLE_NOTICE))
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{label:>6}: {count} notices in {elapsed * 1000:.0f} ms '
+                f'({elapsed * 1000 / count:.2f} ms each, {total_bytes // count} bytes avg)'
+            )
@@ -0,0 +1,85 @@
+"""
+Time signed-lease stamping: incremental update vs full rewrite.
+
+"full" is the old path (deflate + garbage=4 rewrite of the whole file);
+"incremental" appends the overlays after the original bytes. Synthetic leases
+are padded with incompressible page images to the requested sizes, or pass
+--file to time a real lease. No database access.
+
+Run (from backend/):
+  python manage.py bench_pdf_stamping
+  python manage.py bench_pdf_stamping --sizes 1 20 --runs 5
+  python manage.py bench_pdf_stamping --file downloaded_lease.pdf
+"""
+import base64
+import os
+import time
+
+import fitz
+from django.core.management.base import BaseCommand
+
+from api.lease_service import stamp_signed_pdf
+from api.signature_layout import DEFAULT_LEASE_FIELDS
+
+# Bytes of random RGB image per padding page (~512 KB, barely compressible).
+PAGE_IMAGE_SIDE = 418
+
+
+def _synthetic_lease(size_mb):
+    doc = fitz.open()
+    target = int(size_mb * 1024 * 1024)
+    page_image = PAGE_IMAGE_SIDE * PAGE_IMAGE_SIDE * 3
+    pages = max(1, round(target / page_image))
+    for n in range(pages):
+        page = doc.new_page(width=612, height=792)
+        page.insert_text((72, 72), f"RESIDENTIAL LEASE AGREEMENT - page {n + 1}", fontsize=14)
+        pix = fitz.Pixmap(fitz.csRGB, PAGE_IMAGE_SIDE, PAGE_IMAGE_SIDE, os.urandom(page_image), False)
+        page.insert_image(fitz.Rect(72, 100, 540, 568), pixmap=pix)
+    data = doc.tobytes(deflate=True)
+    doc.close()
+    return data
+
+
+def _sample_values():
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 300, 80), False)
+    pix.clear_with(255)
+    signature = "data:image/png;base64," + base64.b64encode(pix.tobytes("png")).decode()
+    return {
+        'agree_terms': True,
+        'agree_rules': True,
+        'tenant_initials': 'JD',
+        'tenant_signature': signature,
+        'tenant_signature_date': '01/05/2026',
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark signed PDF stamping with incremental save vs full rewrite'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=float, nargs='+', default=[1, 20], help='Synthetic lease sizes in MB')
+        parser.add_argument('--file', help='Time this PDF instead of synthetic leases')
+        parser.add_argument('--runs', type=int, default=3, help='Stamps per mode (best is reported)')
+
+    def handle(self, *args, **options):
+        runs = max(1, options['runs'])
+        if options['file']:
+            with open(options['file'], 'rb') as f:
+                inputs = [(os.path.basename(options['file']), f.read())]
+        else:
+            inputs = [(f'{size:g} MB', _synthetic_lease(size)) for size in options['sizes']]
+
+        values = _sample_values()
+        for label, pdf_bytes in inputs:
+            self.stdout.write(f'{label} ({len(pdf_bytes)} bytes)')
+            for mode, incremental in (('full', False), ('incremental', True)):
+                best = None
+                for _ in range(runs):
+                    start = time.perf_counter()
+                    out = stamp_signed_pdf(pdf_bytes, DEFAULT_LEASE_FIELDS, values, incremental=incremental)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                self.stdout.write(
+                    f'  {mode:>11}: {best * 1000:.0f} ms, {len(out)} bytes '
+                    f'(+{len(out) - len(pdf_bytes)}), original prefix kept: {out.startswith(pdf_bytes)}'
+                )
@@ -0,0 +1,71 @@
+"""
+Compare the Decimal and NumPy monthly P&L engines on live data.
+
+Run (from backend/):
+  python manage.py check_pnl_engines
+  python manage.py check_pnl_engines --year 2025 --repeat 5
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Property
+from api.pnl_service import compute_property_pnl, prefetch_pnl_inputs
+
+
+def _diff(a, b, path=''):
+    """Yield paths where two payloads differ (exact equality, floats included)."""
+    if isinstance(a, dict) and isinstance(b, dict):
+        for key in sorted(set(a) | set(b), key=str):
+            yield from _diff(a.get(key), b.get(key), f'{path}.{key}')
+    elif isinstance(a, list) and isinstance(b, list) and len(a) == len(b):
+        for i, (x, y) in enumerate(zip(a, b)):
+            yield from _diff(x, y, f'{path}[{i}]')
+    elif a != b:
+        yield f'{path}: {a!r} != {b!r}'
+
+
+class Command(BaseCommand):
+    help = 'Parity + timing check: Decimal vs NumPy monthly engine for compute_property_pnl'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, default=None)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            raise CommandError('numpy is not installed; the NumPy engine is unavailable.')
+
+        from django.utils import timezone
+
+        year = options['year'] or timezone.now().year
+        properties = list(Property.objects.select_related('financials').prefetch_related('property_units'))
+        # Same inputs for both engines so only the monthly grid differs.
+        inputs = prefetch_pnl_inputs(years=[year], properties=properties)
+
+        results = {}
+        for engine in ('decimal', 'numpy'):
+            best = None
+            for _ in range(max(1, options['repeat'])):
+                start = time.perf_counter()
+                results[engine] = compute_property_pnl(
+                    year=year,
+                    properties=properties,
+                    admin_view=True,
+                    inputs=inputs,
+                    engine=engine,
+                )
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            self.stdout.write(f'{engine}: {best * 1000:.1f} ms (best of {options["repeat"]})')
+
+        diffs = list(_diff(results['decimal'], results['numpy']))
+        if diffs:
+            for line in diffs[:50]:
+                self.stdout.write(self.style.ERROR(line))
+            raise CommandError(f'{len(diffs)} differences between engines for {year}.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Engines match for {year} ({len(properties)} properties, cent-exact).'
+        ))
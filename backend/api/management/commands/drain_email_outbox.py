@@ -0,0 +1,27 @@
+"""
+Send pending transactional emails from the OutboundEmail outbox.
+
+Same work as the drain_email_outbox Celery task; use it from cron or by hand
+when no worker is running.
+
+Run (from backend/):
+  python manage.py drain_email_outbox
+  python manage.py drain_email_outbox --batch-size 100 --max-batches 5
+"""
+from django.core.management.base import BaseCommand
+
+from api.email_outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = 'Send pending emails from the outbox with retry/backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows claimed per batch')
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches')
+
+    def handle(self, *args, **options):
+        counts = drain_outbox(batch_size=options['batch_size'], max_batches=options['max_batches'])
+        self.stdout.write(
+            f"Outbox: {counts['sent']} sent, {counts['retrying']} retrying, {counts['failed']} failed"
+        )
@@ -0,0 +1,26 @@
+"""
+Show idempotent task hit/miss counts (api.idempotency).
+
+A hit is a duplicate execution that was skipped; a miss is a first execution.
+Counts are shared through Redis; with the database key store they cover only
+this process, so run it where Redis is configured.
+
+Run (from backend/):
+  python manage.py idempotency_stats
+"""
+from django.core.management.base import BaseCommand
+
+from api.idempotency import idempotency_stats
+
+
+class Command(BaseCommand):
+    help = 'Show duplicate (hit) and first-run (miss) counts for idempotent tasks'
+
+    def handle(self, *args, **options):
+        stats = idempotency_stats()
+        if not stats:
+            self.stdout.write('No idempotent task executions recorded.')
+            return
+        for task_name in sorted(stats):
+            counts = stats[task_name]
+            self.stdout.write(f"{task_name}: {counts.get('hit', 0)} hit, {counts.get('miss', 0)} miss")
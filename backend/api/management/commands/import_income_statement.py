@@ -462,14 +462,17 @@ class Command(BaseCommand):
                         category = map_category(label)
                         visibility = 'admin_only' if is_admin_expense(label, category) else 'operating'
                         note = f"{IMPORT_TAG}|{sheet_name}|{month:02d}|{label[:80]}"
-                        expense_objs.append(OperatingExpense(
+                        expense = OperatingExpense(
                             property=prop,
                             amount=amount,
                             category=category,
                             visibility=visibility,
                             date=date(year, month, 1),
                             notes=note,
-                        ))
+                        )
+                        # bulk_create skips save() — set the P&L flags explicitly.
+                        expense.apply_classification()
+                        expense_objs.append(expense)
 
                 if expense_objs:
                     OperatingExpense.objects.bulk_create(expense_objs, batch_size=200)
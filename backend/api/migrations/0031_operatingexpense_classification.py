@@ -0,0 +1,53 @@
+import re
+
+from django.db import migrations, models
+
+FINANCING_CATEGORIES = {'mortgage_interest', 'mortgage_principal', 'depreciation'}
+IMPORT_NOTE_YEAR_RE = re.compile(r'^excel-import-(\d{4})')
+
+
+def backfill_classification(apps, schema_editor):
+    # Mirrors api.pnl_service.classify_expense at the time of this migration.
+    OperatingExpense = apps.get_model('api', 'OperatingExpense')
+    batch = []
+    for exp in OperatingExpense.objects.only('id', 'category', 'notes').iterator(chunk_size=500):
+        notes = exp.notes or ''
+        m = IMPORT_NOTE_YEAR_RE.match(notes)
+        lowered = notes.lower()
+        exp.import_year = int(m.group(1)) if m else None
+        exp.is_excel_summary = bool(m) and '__SUMMARY__' in notes
+        exp.is_financing = (exp.category or '') in FINANCING_CATEGORIES or (
+            'mortgage interest' in lowered or 'depreciation' in lowered or 'principal repayment' in lowered
+        )
+        batch.append(exp)
+        if len(batch) >= 500:
+            OperatingExpense.objects.bulk_update(batch, ['import_year', 'is_excel_summary', 'is_financing'])
+            batch = []
+    if batch:
+        OperatingExpense.objects.bulk_update(batch, ['import_year', 'is_excel_summary', 'is_financing'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0030_propertymonthinput_computed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='operatingexpense',
+            name='is_excel_summary',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='operatingexpense',
+            name='is_financing',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='operatingexpense',
+            name='import_year',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_classification, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0033_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportjob',
+            name='kind',
+            field=models.CharField(choices=[('income_statement', 'Income statement'), ('income_statement_export', 'Income statement export'), ('lease_batch', 'Lease batch')], max_length=50),
+        ),
+        migrations.AddField(
+            model_name='reportjob',
+            name='progress',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
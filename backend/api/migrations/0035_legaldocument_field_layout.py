@@ -0,0 +1,22 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0034_reportjob_lease_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='legaldocument',
+            name='template',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='documents', to='api.leasetemplate'),
+        ),
+        migrations.AddField(
+            model_name='legaldocument',
+            name='field_layout',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+RENEWAL_THRESHOLDS = (90, 60, 30)
+
+
+def mark_already_notified(apps, schema_editor):
+    """
+    The old scan sent each reminder on the exact day (lease_end - N). Record the
+    thresholds already passed for current leases so the window scan does not
+    send them again.
+    """
+    Tenant = apps.get_model('api', 'Tenant')
+    LeaseRenewalNotice = apps.get_model('api', 'LeaseRenewalNotice')
+    today = date.today()
+    tenants = Tenant.objects.filter(
+        status='Active',
+        lease_end__gte=today,
+        lease_end__lte=today + timedelta(days=max(RENEWAL_THRESHOLDS)),
+    ).values_list('id', 'lease_end')
+    LeaseRenewalNotice.objects.bulk_create(
+        [
+            LeaseRenewalNotice(tenant_id=tenant_id, lease_end=lease_end, days_before=days)
+            for tenant_id, lease_end in tenants
+            for days in RENEWAL_THRESHOLDS
+            if (lease_end - today).days < days
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0036_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tenant',
+            name='lease_end',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='LeaseRenewalNotice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lease_end', models.DateField()),
+                ('days_before', models.PositiveSmallIntegerField()),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renewal_notices', to='api.tenant')),
+            ],
+            options={
+                'ordering': ['-sent_at'],
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'lease_end', 'days_before'), name='unique_renewal_notice')],
+            },
+        ),
+        migrations.RunPython(mark_already_notified, migrations.RunPython.noop),
+    ]
@@ -19,7 +19,7 @@ class Tenant(models.Model):
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='Applicant')
     property_unit = models.CharField(max_length=255)
     lease_start = models.DateField(null=True, blank=True)
-    lease_end = models.DateField(null=True, blank=True)
+    lease_end = models.DateField(null=True, blank=True, db_index=True)
     rent_amount = models.DecimalField(max_digits=10, decimal_places=2)
     deposit = models.DecimalField(max_digits=10, decimal_places=2)
     balance = models.DecimalField(max_digits=10, decimal_places=2, default=0)
@@ -143,6 +143,10 @@ class OperatingExpense(models.Model):
     )
     date = models.DateField(default=timezone.now)
     notes = models.CharField(max_length=255, blank=True, default='')
+    # Derived from notes/category on save (see pnl_service.classify_expense) so P&L can filter in SQL.
+    is_excel_summary = models.BooleanField(default=False, db_index=True, editable=False)
+    is_financing = models.BooleanField(default=False, db_index=True, editable=False)
+    import_year = models.PositiveSmallIntegerField(null=True, blank=True, db_index=True, editable=False)
     created_by = models.ForeignKey(
         'accounts.User',
         on_delete=models.SET_NULL,
@@ -159,6 +163,18 @@ class OperatingExpense(models.Model):
         scope = self.property.name if self.property else 'Portfolio'
         return f"{scope} - {self.category} - {self.amount}"
 
+    def apply_classification(self):
+        from .pnl_service import classify_expense
+        for field, value in classify_expense(self.category, self.notes).items():
+            setattr(self, field, value)
+
+    def save(self, *args, **kwargs):
+        self.apply_classification()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and ({'category', 'notes'} & set(update_fields)):
+            kwargs['update_fields'] = set(update_fields) | {'is_excel_summary', 'is_financing', 'import_year'}
+        super().save(*args, **kwargs)
+
 class MaintenanceRequest(models.Model):
     STATUS_CHOICES = [
         ('Open', 'Open'),
@@ -199,6 +215,10 @@ class LeaseTemplate(models.Model):
 
 class LegalDocument(models.Model):
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='legal_documents')
+    # Template a lease was generated from
+    template = models.ForeignKey(
+        LeaseTemplate, on_delete=models.SET_NULL, null=True, blank=True, related_name='documents'
+    )
     type = models.CharField(max_length=100)
     generated_content = models.TextField()
     created_at = models.DateTimeField(default=timezone.now)
@@ -210,6 +230,8 @@ class LegalDocument(models.Model):
     signed_pdf_url = models.URLField(null=True, blank=True)
     signed_at = models.DateTimeField(null=True, blank=True)
     signing_audit = models.JSONField(null=True, blank=True, help_text="Who signed, when, IP, etc.")
+    # Signing field positions scanned from this document's PDF (see signature_layout.py)
+    field_layout = models.JSONField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.type} - {self.tenant.name}"
@@ -253,6 +275,8 @@ class Listing(models.Model):
     image = models.URLField()
     description = models.TextField()
     amenities = models.JSONField(default=list)
+    # {'source': <image>, 'thumb': url, 'medium': url} — see image_derivatives.py
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return self.title
@@ -269,6 +293,7 @@ class Property(models.Model):
     square_footage = models.IntegerField(default=1000, help_text="Square footage")
     image = models.ImageField(upload_to='properties/', null=True, blank=True)
     image_url = models.URLField(null=True, blank=True)  # For external URLs
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)  # thumb/medium URLs
     furnishing_type = models.CharField(
         max_length=50,
         blank=True,
@@ -588,4 +613,128 @@ class ShortStayBlockedDate(models.Model):
         ordering = ['start_date']
 
     def __str__(self):
-        return f"Blocked {self.property.name}: {self.start_date} to {self.end_date}"
\ No newline at end of file
+        return f"Blocked {self.property.name}: {self.start_date} to {self.end_date}"
+
+class ReportJob(models.Model):
+    """
+    Heavy report (full P&L, multi-year export, lease batch) computed by a Celery worker.
+    The client polls /report-jobs/<id>/ and fetches the result once status is ready.
+    Results are kept until expires_at, then purged.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+    KIND_CHOICES = [
+        ('income_statement', 'Income statement'),
+        ('income_statement_export', 'Income statement export'),
+        ('lease_batch', 'Lease batch'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='report_jobs',
+    )
+    # JSON reports land in `result`; file reports in result_file + filename/content type.
+    result = models.JSONField(null=True, blank=True)
+    result_file = models.BinaryField(null=True, blank=True, editable=False)
+    result_filename = models.CharField(max_length=255, blank=True, default='')
+    result_content_type = models.CharField(max_length=100, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    # Per-item status while running (lease batches): {total, done, failed, items}
+    progress = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    @property
+    def is_expired(self):
+        return self.expires_at is not None and timezone.now() >= self.expires_at
+
+    def __str__(self):
+        return f"{self.kind} job {self.id} ({self.status})"
+
+
+class OutboundEmail(models.Model):
+    """
+    Transactional email outbox. Rows are written in the same transaction as the
+    change that triggers them (api.email_outbox.enqueue_email) and sent later by
+    the drainer, which retries with backoff. `kind` names an email_service sender
+    (e.g. 'send_payment_invoice_to_tenant'); args/kwargs are its JSON arguments.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=100)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.args} ({self.status})"
+
+
+class LeaseRenewalNotice(models.Model):
+    """
+    Marker for a lease renewal reminder already sent: one row per tenant, lease end
+    date and threshold (90/60/30 days), so check_lease_renewals can be re-run safely
+    and a renewed lease (new lease_end) gets its own reminders.
+    """
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='renewal_notices')
+    lease_end = models.DateField()
+    days_before = models.PositiveSmallIntegerField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-sent_at']
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'lease_end', 'days_before'], name='unique_renewal_notice'),
+        ]
+
+    def __str__(self):
+        return f"Renewal notice {self.days_before}d for tenant {self.tenant_id} (lease end {self.lease_end})"
+
+
+class TaskIdempotencyKey(models.Model):
+    """
+    Claimed idempotency key for a task execution (api.idempotency), used when
+    Redis is not configured. Rows past expires_at are ignored and purged hourly.
+    """
+    STATE_CHOICES = [
+        ('running', 'Running'),
+        ('done', 'Done'),
+    ]
+
+    key = models.CharField(max_length=255, unique=True)
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default='running')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key} ({self.state})"
@@ -0,0 +1,111 @@
+"""
+Portfolio P&L export (CSV / XLSX) built on compute_property_pnl payloads.
+
+Payloads are computed one year at a time and written out before the next year is
+built, so a multi-year export holds a single year's statement in memory:
+  CSV  → one flat file, per year: `section` column = property | unit | monthly
+  XLSX → write-only workbook with By Property, By Unit and Monthly sheets
+"""
+import csv
+import tempfile
+
+from .pnl_service import iter_property_pnl_range
+
+PROPERTY_COLUMNS = [
+    'year', 'property_id', 'property_name', 'address', 'city', 'state', 'units_count',
+    'rent_income', 'short_stay_income', 'total_income', 'total_expenses', 'net_income',
+]
+UNIT_COLUMNS = [
+    'year', 'property_id', 'property_name', 'unit_id', 'label', 'status', 'monthly_rent',
+    'rent_income', 'total_expenses', 'net_income',
+]
+MONTHLY_COLUMNS = ['year', 'property_id', 'property_name', 'month', 'income', 'expenses', 'net']
+CSV_COLUMNS = ['section'] + list(dict.fromkeys(PROPERTY_COLUMNS + UNIT_COLUMNS + MONTHLY_COLUMNS))
+
+
+def export_payloads(*, years, properties_by_year, admin_view, request=None):
+    """Full (non-summary) P&L payloads for the years, yielded oldest year first."""
+    return iter_property_pnl_range(
+        years=years,
+        properties_by_year=properties_by_year,
+        admin_view=admin_view,
+        request=request,
+    )
+
+
+def iter_property_rows(payload):
+    for row in payload['by_property']:
+        yield {'year': payload['year'], **row}
+
+
+def iter_unit_rows(payload):
+    names = {row['property_id']: row['property_name'] for row in payload['by_property']}
+    for unit in payload['by_unit']:
+        yield {'year': payload['year'], 'property_name': names.get(unit['property_id'], ''), **unit}
+
+
+def iter_monthly_rows(payload):
+    """Portfolio months first (blank property columns), then each property's months."""
+    year = payload['year']
+    for row in payload['monthly']:
+        yield {'year': year, 'property_id': '', 'property_name': 'Portfolio', **row}
+    for prop in payload['by_property']:
+        for row in prop.get('monthly') or []:
+            yield {
+                'year': year,
+                'property_id': prop['property_id'],
+                'property_name': prop['property_name'],
+                **row,
+            }
+
+
+class _Echo:
+    """File-like object whose write() hands the CSV line back to the generator."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(payloads):
+    """Yield encoded CSV lines for StreamingHttpResponse, one year's sections at a time."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS).encode('utf-8')
+    for payload in payloads:
+        sections = (
+            ('property', iter_property_rows(payload)),
+            ('unit', iter_unit_rows(payload)),
+            ('monthly', iter_monthly_rows(payload)),
+        )
+        for section, rows in sections:
+            for row in rows:
+                values = [section] + [row.get(col, '') for col in CSV_COLUMNS[1:]]
+                yield writer.writerow(values).encode('utf-8')
+
+
+def build_xlsx(payloads):
+    """
+    Write-only workbook (rows are flushed as they are appended) spooled to a temp file.
+    Returns an open file positioned at 0; the caller streams and closes it.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    sheets = []
+    for title, columns, rows_for in (
+        ('By Property', PROPERTY_COLUMNS, iter_property_rows),
+        ('By Unit', UNIT_COLUMNS, iter_unit_rows),
+        ('Monthly', MONTHLY_COLUMNS, iter_monthly_rows),
+    ):
+        ws = wb.create_sheet(title=title)
+        ws.append(columns)
+        sheets.append((ws, columns, rows_for))
+    # Each write-only sheet spools to its own temp file, so years can be interleaved.
+    for payload in payloads:
+        for ws, columns, rows_for in sheets:
+            for row in rows_for(payload):
+                ws.append([row.get(col) for col in columns])
+
+    out = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    wb.save(out)
+    out.seek(0)
+    return out
@@ -0,0 +1,78 @@
+"""
+Optional NumPy engine for the monthly section of compute_property_pnl.
+
+Amounts are accumulated as integer cents in (n_properties + 1, 12) int64 arrays —
+the extra row holds portfolio-level rows with no property. Income, net and the
+portfolio months are array ops; output floats match the Decimal engine exactly
+because every stored amount is a whole number of cents.
+
+Enable with PNL_MONTHLY_ENGINE=numpy. Parity is covered by api.tests
+(python manage.py test api, no database needed); compare on live data with
+python manage.py check_pnl_engines.
+"""
+from decimal import Decimal
+
+import numpy as np
+
+from .pnl_service import MONTH_GRID_KINDS
+
+
+def to_cents(amount) -> int:
+    """Exact Decimal → integer cents; refuses sub-cent values rather than rounding."""
+    cents = Decimal(amount) * 100
+    if cents != cents.to_integral_value():
+        raise ValueError(f"Amount {amount} is not a whole number of cents")
+    return int(cents)
+
+
+class NumpyMonthGrid:
+    """Drop-in for pnl_service.DecimalMonthGrid backed by integer-cent arrays."""
+
+    def __init__(self, property_ids):
+        self._index = {pid: i for i, pid in enumerate(property_ids)}
+        self._portfolio_row = len(property_ids)
+        self._pending = {kind: ([], [], []) for kind in MONTH_GRID_KINDS}
+        self._arrays = None
+
+    def add(self, kind, prop_id, month, amount):
+        rows, cols, cents = self._pending[kind]
+        rows.append(self._index.get(prop_id, self._portfolio_row))
+        cols.append(month - 1)
+        cents.append(to_cents(amount))
+        self._arrays = None
+
+    def _build(self):
+        if self._arrays is None:
+            shape = (self._portfolio_row + 1, 12)
+            arrays = {}
+            for kind, (rows, cols, cents) in self._pending.items():
+                grid = np.zeros(shape, dtype=np.int64)
+                if cents:
+                    np.add.at(grid, (np.asarray(rows), np.asarray(cols)), np.asarray(cents, dtype=np.int64))
+                arrays[kind] = grid
+            income = arrays['rent'] + arrays['short_stay']
+            expenses = arrays['opex']
+            self._arrays = (income, expenses, income - expenses)
+        return self._arrays
+
+    @staticmethod
+    def _rows(income, expenses, net):
+        return [
+            {
+                'month': month,
+                'income': i / 100,
+                'expenses': e / 100,
+                'net': n / 100,
+            }
+            for month, i, e, n in zip(range(1, 13), income.tolist(), expenses.tolist(), net.tolist())
+        ]
+
+    def property_rows(self, prop_id):
+        idx = self._index.get(prop_id)
+        if idx is None:
+            zero = np.zeros(12, dtype=np.int64)
+            return self._rows(zero, zero, zero)
+        return self._rows(*(a[idx] for a in self._build()))
+
+    def portfolio_rows(self):
+        return self._rows(*(a.sum(axis=0) for a in self._build()))
@@ -13,12 +13,15 @@ Bella Jess, Tomball, Conroe, Avenue Q, Sherman, 70th Street, Avenue H, Wooding,
 Avenue F are sheet / PropertyMonthInput only — rent collections and recorded operating
 expenses are excluded from their Income Statement totals (2026 corrected yearly seeds).
 """
+import logging
 import re
 from collections import defaultdict
+from datetime import date
 from decimal import Decimal
 
+from django.conf import settings
 from django.db.models import Sum, Q
-from django.db.models.functions import ExtractMonth
+from django.db.models.functions import ExtractMonth, ExtractYear
 
 from .models import (
     Payment,
@@ -35,7 +38,9 @@ from .property_units_service import (
     is_portfolio_parent,
     unit_for_door_number,
 )
-from .permissions import is_admin_user, exclude_import_placeholder_tenants
+from .permissions import is_admin_user, exclude_import_placeholder_tenants, filter_properties_for_user
+
+logger = logging.getLogger(__name__)
 
 # Corrected Bella Jess 2026 TEI / OpEx / NOI (matches utils/bellaJessPnl2026.ts).
 BELLA_JESS_2026_YEARLY = [
@@ -284,12 +289,17 @@ def _sheet_year_seed(prop_id: int, year: int, seed_map: dict):
     return seed_map.get(prop_id)
 
 
-def sheet_month_rows(prop_id: int, year: int, seed_map: dict):
-    """Return list of 12 (income, expenses, noi) Decimals for a sheet property."""
+def sheet_month_rows(prop_id: int, year: int, seed_map: dict, month_inputs=None):
+    """
+    Return list of 12 (income, expenses, noi) Decimals for a sheet property.
+    month_inputs: prefetched PropertyMonthInput rows for this property/year (skips the query).
+    """
+    if month_inputs is None:
+        month_inputs = PropertyMonthInput.objects.filter(property_id=prop_id, year=year).only(
+            'month', 'computed', 'income_lines', 'opex_lines', 'financing_lines'
+        )
     by_month = {}
-    for row in PropertyMonthInput.objects.filter(property_id=prop_id, year=year).only(
-        'month', 'computed', 'income_lines', 'opex_lines', 'financing_lines'
-    ):
+    for row in month_inputs:
         computed = row.computed or {}
         if computed.get('total_effective_income') is not None or computed.get('totalEffectiveIncome') is not None:
             tei = Decimal(str(
@@ -311,8 +321,8 @@ def sheet_month_rows(prop_id: int, year: int, seed_map: dict):
     return rows
 
 
-def sheet_year_totals(prop_id: int, year: int, seed_map: dict):
-    rows = sheet_month_rows(prop_id, year, seed_map)
+def sheet_year_totals(prop_id: int, year: int, seed_map: dict, month_inputs=None):
+    rows = sheet_month_rows(prop_id, year, seed_map, month_inputs)
     income = sum((r[0] for r in rows), Decimal('0'))
     expenses = sum((r[1] for r in rows), Decimal('0'))
     net = sum((r[2] for r in rows), Decimal('0'))
@@ -352,6 +362,28 @@ def is_excel_import_note(notes, year):
     return (notes or '').startswith(import_tag_for_year(year))
 
 
+_IMPORT_NOTE_YEAR_RE = re.compile(rf'^{re.escape(IMPORT_TAG_PREFIX)}(\d{{4}})')
+
+
+def import_year_from_note(notes):
+    """Calendar year of an excel-import note tag, or None for hand-entered rows."""
+    m = _IMPORT_NOTE_YEAR_RE.match(notes or '')
+    return int(m.group(1)) if m else None
+
+
+def classify_expense(category, notes):
+    """
+    Precomputed OperatingExpense flags (stored on the row, indexed).
+    P&L aggregation filters on these instead of re-parsing notes per request.
+    """
+    import_year = import_year_from_note(notes)
+    return {
+        'import_year': import_year,
+        'is_excel_summary': import_year is not None and '__SUMMARY__' in (notes or ''),
+        'is_financing': _is_financing(category, notes),
+    }
+
+
 def is_door_detail_payment(reference):
     """Per-door gross rent rows — unit breakdown only, not portfolio total."""
     return bool(re.search(r'-door-\d+-rent$', reference or ''))
@@ -472,14 +504,28 @@ def build_full_tenant_property_map(year_properties):
     return rolled, props_by_id
 
 
-def _is_financing_expense(exp):
+def _is_financing(category, notes):
     """Mortgage / depreciation sit below NOI in the Excel workbook."""
-    if (exp.category or '') in FINANCING_CATEGORIES:
+    if (category or '') in FINANCING_CATEGORIES:
         return True
-    notes = (exp.notes or '').lower()
+    notes = (notes or '').lower()
     return 'mortgage interest' in notes or 'depreciation' in notes or 'principal repayment' in notes
 
 
+def _excel_flags(exp, year):
+    """(is_excel, is_summary) for this year's import, from the stored columns."""
+    is_excel = exp.import_year == year
+    return is_excel, is_excel and exp.is_excel_summary
+
+
+def _summary_property_ids(expenses, year):
+    return {
+        e.property_id
+        for e in expenses
+        if e.is_excel_summary and e.import_year == year
+    }
+
+
 def _aggregate_expenses(expenses_qs, *, admin_view, year, rollup_property_id=None):
     """
     Excel imports store monthly __SUMMARY__ rows matching workbook totals.
@@ -491,12 +537,7 @@ def _aggregate_expenses(expenses_qs, *, admin_view, year, rollup_property_id=Non
     if not admin_view:
         expenses = [e for e in expenses if e.visibility != 'admin_only']
 
-    summary_keys = {
-        (e.property_id, e.date.month)
-        for e in expenses
-        if is_excel_import_note(e.notes, year) and '__SUMMARY__' in (e.notes or '')
-    }
-    properties_with_excel_summary = {pid for pid, _ in summary_keys}
+    properties_with_excel_summary = _summary_property_ids(expenses, year)
 
     expenses_by_property = defaultdict(lambda: Decimal('0'))
     expenses_by_category = defaultdict(lambda: Decimal('0'))
@@ -504,10 +545,8 @@ def _aggregate_expenses(expenses_qs, *, admin_view, year, rollup_property_id=Non
 
     for exp in expenses:
         amount = exp.amount or Decimal('0')
-        notes = exp.notes or ''
-        is_excel = is_excel_import_note(notes, year)
-        is_summary = is_excel and '__SUMMARY__' in notes
-        is_financing = _is_financing_expense(exp)
+        is_excel, is_summary = _excel_flags(exp, year)
+        is_financing = exp.is_financing
         prop_id = exp.property_id
         if rollup_property_id and prop_id:
             prop_id = rollup_property_id(prop_id) or prop_id
@@ -541,20 +580,13 @@ def _monthly_expense_map(expenses_qs, *, admin_view, property_ids_set, year, rol
     if not admin_view:
         expenses = [e for e in expenses if e.visibility != 'admin_only']
 
-    summary_keys = {
-        (e.property_id, e.date.month)
-        for e in expenses
-        if is_excel_import_note(e.notes, year) and '__SUMMARY__' in (e.notes or '')
-    }
-    properties_with_excel_summary = {pid for pid, _ in summary_keys}
+    properties_with_excel_summary = _summary_property_ids(expenses, year)
 
     month_map = defaultdict(lambda: Decimal('0'))
     for exp in expenses:
-        notes = exp.notes or ''
-        is_excel = is_excel_import_note(notes, year)
-        is_summary = is_excel and '__SUMMARY__' in notes
-        if _is_financing_expense(exp):
+        if exp.is_financing:
             continue
+        is_excel, is_summary = _excel_flags(exp, year)
         prop_id = exp.property_id
         if rollup_property_id and prop_id:
             prop_id = rollup_property_id(prop_id) or prop_id
@@ -596,6 +628,212 @@ def excel_portfolio_property_ids(year):
     return ids
 
 
+def excel_portfolio_property_ids_by_year(years):
+    """{year: property IDs with an Excel P&L import that year} for several years (one query)."""
+    years = sorted(set(years))
+    ids_by_year = {year: set() for year in years}
+    for ref, pay_date in Payment.objects.filter(
+        reference__startswith=IMPORT_TAG_PREFIX,
+        date__gte=date(years[0], 1, 1),
+        date__lte=date(years[-1], 12, 31),
+    ).values_list('reference', 'date'):
+        if not is_excel_import_reference(ref, pay_date.year):
+            continue
+        pid = parse_import_property_id(ref)
+        if pid:
+            ids_by_year[pay_date.year].add(pid)
+    return ids_by_year
+
+
+def _keep_excel_properties(properties, excel_ids):
+    """Only Excel-import / portfolio-parent properties (all of them when there are none)."""
+    portfolio_ids = portfolio_parent_property_ids(properties)
+    keep_ids = excel_ids | portfolio_ids if (excel_ids or portfolio_ids) else None
+    if keep_ids:
+        return [p for p in properties if p.id in keep_ids]
+    return properties
+
+
+def _user_income_statement_properties(user):
+    return list(filter_properties_for_user(
+        Property.objects.select_related('financials').prefetch_related('property_units'),
+        user,
+    ))
+
+
+def income_statement_properties(user, excel_ids=None):
+    """
+    Properties shown on the income statement for this user.
+    excel_ids (admin view): keep only Excel-import / portfolio-parent properties.
+    """
+    properties = _user_income_statement_properties(user)
+
+    # Filter to Excel / portfolio parents in-memory (avoid extra Neon round-trips).
+    if excel_ids is not None:
+        properties = _keep_excel_properties(properties, excel_ids)
+    return properties
+
+
+def income_statement_properties_by_year(user, years, admin_view):
+    """
+    {year: properties} for a multi-year statement. The admin view filters each year
+    by that year's Excel imports, exactly as the single-year income statement does.
+    """
+    properties = _user_income_statement_properties(user)
+    if not admin_view:
+        return {year: properties for year in years}
+    ids_by_year = excel_portfolio_property_ids_by_year(years)
+    return {year: _keep_excel_properties(properties, ids_by_year[year]) for year in years}
+
+
+def _sibling_property_ids(property_ids_set, props_by_id):
+    """Report properties plus unit-level listings that roll up into them."""
+    sibling_ids = set(property_ids_set)
+    for p in props_by_id.values():
+        rolled = _rollup_property_id(p.id, property_ids_set, props_by_id)
+        if rolled is not None:
+            sibling_ids.add(p.id)
+    return sibling_ids
+
+
+def prefetch_pnl_inputs(*, years, properties, include_units=True):
+    """
+    Load everything compute_property_pnl reads for a span of calendar years.
+    Tenant map and property classification are built once; payments, short stays,
+    expenses and month inputs are one query each over the whole span, partitioned by year.
+    """
+    years = sorted(set(years))
+    start, end = date(years[0], 1, 1), date(years[-1], 12, 31)
+    property_ids = [p.id for p in properties]
+    property_ids_set = set(property_ids)
+    sheet_ids = sheet_pnl_property_ids(properties)
+    tenant_prop_map, props_by_id = build_full_tenant_property_map(properties)
+
+    unit_rows_by_property = defaultdict(list)
+    if include_units:
+        # Read-only unit display for P&L — never sync/write on GET (that was ~minutes slow).
+        for unit in PropertyUnit.objects.filter(property_id__in=property_ids).order_by('sort_order', 'id'):
+            unit_rows_by_property[unit.property_id].append(unit)
+        for prop in properties:
+            rows = unit_rows_by_property.get(prop.id, [])
+            unit_rows_by_property[prop.id] = display_units_for_property(prop, rows)
+
+    payments = defaultdict(list)
+    for pay in Payment.objects.filter(
+        status='Paid',
+        date__gte=start,
+        date__lte=end,
+        type='Rent',
+    ).select_related('tenant').only(
+        'id', 'amount', 'date', 'tenant_id', 'tenant__property_unit', 'tenant__email', 'reference',
+    ):
+        payments[pay.date.year].append(pay)
+
+    short_stays = defaultdict(list)
+    for row in ShortStayBooking.objects.filter(
+        status='confirmed',
+        check_in__gte=start,
+        check_in__lte=end,
+        property_id__in=property_ids,
+    ).annotate(
+        year=ExtractYear('check_in'), month=ExtractMonth('check_in'),
+    ).order_by().values('property_id', 'year', 'month').annotate(total=Sum('total_amount')):
+        short_stays[int(row['year'])].append(row)
+
+    # Include expenses posted on unit-level listings, then roll them up to parents.
+    sibling_ids = _sibling_property_ids(property_ids_set, props_by_id)
+    expenses = defaultdict(list)
+    for exp in OperatingExpense.objects.filter(
+        date__gte=start,
+        date__lte=end,
+    ).filter(
+        Q(property_id__in=sibling_ids) | Q(property_id__isnull=True)
+    ).only(
+        'id', 'amount', 'category', 'property_id', 'unit_id', 'visibility', 'date',
+        'is_excel_summary', 'is_financing', 'import_year',
+    ):
+        expenses[exp.date.year].append(exp)
+
+    month_inputs = defaultdict(list)
+    if sheet_ids:
+        for row in PropertyMonthInput.objects.filter(
+            property_id__in=sheet_ids,
+            year__in=years,
+        ).only('property_id', 'year', 'month', 'computed', 'income_lines', 'opex_lines', 'financing_lines'):
+            month_inputs[(row.property_id, row.year)].append(row)
+
+    return {
+        'years': years,
+        'sheet_ids': sheet_ids,
+        'tenant_prop_map': tenant_prop_map,
+        'props_by_id': props_by_id,
+        'unit_rows_by_property': unit_rows_by_property,
+        'payments': payments,
+        'short_stays': short_stays,
+        'expenses': expenses,
+        'month_inputs': month_inputs,
+    }
+
+
+MONTH_GRID_KINDS = ('rent', 'short_stay', 'opex')
+
+
+class DecimalMonthGrid:
+    """
+    Property × month sums for rent, short-stay and operating expenses (Decimal engine).
+    prop_id None holds portfolio-level rows that only feed the portfolio months.
+    """
+
+    def __init__(self, property_ids):
+        self._cells = {
+            kind: defaultdict(lambda: defaultdict(lambda: Decimal('0')))
+            for kind in MONTH_GRID_KINDS
+        }
+
+    def add(self, kind, prop_id, month, amount):
+        self._cells[kind][prop_id][month] += amount
+
+    @staticmethod
+    def _rows(rent, short, opex):
+        rows = []
+        for month in range(1, 13):
+            income = rent.get(month, Decimal('0')) + short.get(month, Decimal('0'))
+            exp = opex.get(month, Decimal('0'))
+            rows.append({
+                'month': month,
+                'income': float(income),
+                'expenses': float(exp),
+                'net': float(income - exp),
+            })
+        return rows
+
+    def property_rows(self, prop_id):
+        return self._rows(*(self._cells[kind].get(prop_id, {}) for kind in MONTH_GRID_KINDS))
+
+    def portfolio_rows(self):
+        totals = []
+        for kind in MONTH_GRID_KINDS:
+            by_month = defaultdict(lambda: Decimal('0'))
+            for months in self._cells[kind].values():
+                for month, amount in months.items():
+                    by_month[month] += amount
+            totals.append(by_month)
+        return self._rows(*totals)
+
+
+def make_month_grid(property_ids, engine=None):
+    """Monthly grid for compute_property_pnl; 'numpy' needs the optional numpy package."""
+    engine = engine or getattr(settings, 'PNL_MONTHLY_ENGINE', 'decimal')
+    if engine == 'numpy':
+        try:
+            from .pnl_numpy import NumpyMonthGrid
+        except ImportError:
+            logger.warning("PNL_MONTHLY_ENGINE=numpy but numpy is not installed; using Decimal engine.")
+        else:
+            return NumpyMonthGrid(property_ids)
+    return DecimalMonthGrid(property_ids)
+
+
 def compute_property_pnl(
     *,
     year,
@@ -603,17 +841,27 @@ def compute_property_pnl(
     admin_view,
     request=None,
     summary_only=False,
+    inputs=None,
+    engine=None,
 ):
     """
     Build income-statement payload matching Excel P&L structure.
     Returns dict suitable for JSON Response (snake_case keys).
+    inputs: shared prefetch_pnl_inputs() result when computing several years.
+    engine: monthly grid engine ('decimal' / 'numpy'), default settings.PNL_MONTHLY_ENGINE.
     """
+    if inputs is None:
+        inputs = prefetch_pnl_inputs(years=[year], properties=properties, include_units=not summary_only)
     property_ids = [p.id for p in properties]
     property_ids_set = set(property_ids)
     seed_map = build_sheet_seed_map(properties, year)
-    sheet_ids = sheet_pnl_property_ids(properties)
+    sheet_ids = inputs['sheet_ids']
+    tenant_prop_map = inputs['tenant_prop_map']
+    props_by_id = inputs['props_by_id']
+    month_inputs = inputs['month_inputs']
 
-    tenant_prop_map, props_by_id = build_full_tenant_property_map(properties)
+    def sheet_inputs(pid):
+        return month_inputs.get((pid, year), [])
 
     def rolls_to_sheet(pid):
         """True when this property (or its rollup parent) is a sheet P&L property."""
@@ -624,33 +872,13 @@ def compute_property_pnl(
         rolled = _rollup_property_id(pid, property_ids_set, props_by_id)
         return (rolled or pid) in sheet_ids
 
-    unit_rows_by_property = defaultdict(list)
-    if not summary_only:
-        # Read-only unit display for P&L — never sync/write on GET (that was ~minutes slow).
-        existing_units = PropertyUnit.objects.filter(property_id__in=property_ids).order_by(
-            'sort_order', 'id'
-        )
-        for unit in existing_units:
-            unit_rows_by_property[unit.property_id].append(unit)
-
-        for prop in properties:
-            rows = unit_rows_by_property.get(prop.id, [])
-            unit_rows_by_property[prop.id] = display_units_for_property(prop, rows)
+    unit_rows_by_property = inputs['unit_rows_by_property']
 
     rent_income_by_property = defaultdict(lambda: Decimal('0'))
     rent_income_by_unit = defaultdict(lambda: Decimal('0'))
-    month_rent = defaultdict(lambda: Decimal('0'))
-    rent_by_prop_month = defaultdict(lambda: defaultdict(lambda: Decimal('0')))
+    month_grid = None if summary_only else make_month_grid(property_ids, engine)
 
-    payments_qs = Payment.objects.filter(
-        status='Paid',
-        date__year=year,
-        type='Rent',
-    ).select_related('tenant').only(
-        'id', 'amount', 'date', 'tenant_id', 'tenant__property_unit', 'tenant__email', 'reference',
-    )
-
-    for pay in payments_qs:
+    for pay in inputs['payments'].get(year, []):
         prop_id = tenant_prop_map.get(pay.tenant_id) or parse_import_property_id(pay.reference)
         if prop_id not in property_ids_set:
             continue
@@ -664,9 +892,7 @@ def compute_property_pnl(
         if not detail_only:
             rent_income_by_property[prop_id] += amount
             if not summary_only:
-                month = pay.date.month
-                month_rent[month] += amount
-                rent_by_prop_month[prop_id][month] += amount
+                month_grid.add('rent', prop_id, pay.date.month, amount)
         if not summary_only:
             door_n = door_number_from_payment(pay.reference)
             matched = False
@@ -683,46 +909,22 @@ def compute_property_pnl(
                         break
 
     short_stay_by_property = defaultdict(lambda: Decimal('0'))
-    month_short = defaultdict(lambda: Decimal('0'))
-    short_by_prop_month = defaultdict(lambda: defaultdict(lambda: Decimal('0')))
-    for row in ShortStayBooking.objects.filter(
-        status='confirmed',
-        check_in__year=year,
-        property_id__in=property_ids,
-    ).annotate(month=ExtractMonth('check_in')).values('property_id', 'month').annotate(total=Sum('total_amount')):
+    for row in inputs['short_stays'].get(year, []):
         pid = row['property_id']
         if rolls_to_sheet(pid):
             continue
         total = row['total'] or Decimal('0')
         short_stay_by_property[pid] += total
         if not summary_only:
-            month = int(row['month'])
-            month_short[month] += total
-            short_by_prop_month[pid][month] += total
+            month_grid.add('short_stay', pid, int(row['month']), total)
 
     expenses_by_property = defaultdict(lambda: Decimal('0'))
     expenses_by_category = defaultdict(lambda: Decimal('0'))
     expenses_by_unit = defaultdict(lambda: Decimal('0'))
 
-    # Include expenses posted on unit-level listings, then roll them up to parents.
-    sibling_ids = set(property_ids_set)
-    for p in props_by_id.values():
-        rolled = _rollup_property_id(p.id, property_ids_set, props_by_id)
-        if rolled is not None:
-            sibling_ids.add(p.id)
-
-    expenses_list = list(
-        OperatingExpense.objects.filter(
-            date__year=year,
-        ).filter(
-            Q(property_id__in=sibling_ids) | Q(property_id__isnull=True)
-        ).only(
-            'id', 'amount', 'category', 'property_id', 'unit_id', 'visibility', 'notes', 'date'
-        )
-    )
     # Sheet properties: ignore recorded / imported operating expenses.
     expenses_list = [
-        e for e in expenses_list
+        e for e in inputs['expenses'].get(year, [])
         if not rolls_to_sheet(e.property_id)
     ]
 
@@ -734,36 +936,22 @@ def compute_property_pnl(
         rollup_property_id=rollup,
     )
 
-    month_exp = defaultdict(lambda: Decimal('0'))
-    opex_by_prop_month = defaultdict(lambda: defaultdict(lambda: Decimal('0')))
     if not summary_only:
         exp_rows = expenses_list
         if not admin_view:
             exp_rows = [e for e in exp_rows if e.visibility != 'admin_only']
-        summary_keys = {
-            (e.property_id, e.date.month)
-            for e in exp_rows
-            if is_excel_import_note(e.notes, year) and '__SUMMARY__' in (e.notes or '')
-        }
-        props_with_summary = {pid for pid, _ in summary_keys}
+        props_with_summary = _summary_property_ids(exp_rows, year)
         for exp in exp_rows:
-            if _is_financing_expense(exp):
+            if exp.is_financing:
                 continue
-            notes = exp.notes or ''
-            is_excel = is_excel_import_note(notes, year)
-            is_summary = is_excel and '__SUMMARY__' in notes
+            is_excel, is_summary = _excel_flags(exp, year)
             if is_excel and not is_summary and exp.property_id in props_with_summary:
                 continue
             prop_id = rollup(exp.property_id) if exp.property_id else None
             if prop_id and prop_id not in property_ids_set:
                 continue
-            amount = exp.amount or Decimal('0')
-            month = exp.date.month
-            if prop_id:
-                opex_by_prop_month[prop_id][month] += amount
-                month_exp[month] += amount
-            else:
-                month_exp[month] += amount
+            # prop_id None → portfolio-level expense (portfolio months only).
+            month_grid.add('opex', prop_id or None, exp.date.month, exp.amount or Decimal('0'))
 
     if summary_only:
         # When sheet properties are in scope, portfolio totals are sheet-only (Bella + Tomball).
@@ -773,7 +961,7 @@ def compute_property_pnl(
         if sheet_ids:
             for p in properties:
                 if p.id in sheet_ids:
-                    inc, exp, _net = sheet_year_totals(p.id, year, seed_map)
+                    inc, exp, _net = sheet_year_totals(p.id, year, seed_map, sheet_inputs(p.id))
                     total_rent += inc
                     total_expenses += exp
         else:
@@ -807,7 +995,7 @@ def compute_property_pnl(
 
     for p in properties:
         if p.id in sheet_ids:
-            income, expenses, net = sheet_year_totals(p.id, year, seed_map)
+            income, expenses, net = sheet_year_totals(p.id, year, seed_map, sheet_inputs(p.id))
             rent = income
             short = Decimal('0')
         elif sheet_ids:
@@ -896,28 +1084,27 @@ def compute_property_pnl(
     portfolio_net = portfolio_income - portfolio_expenses
 
     sheet_month_cache = {
-        sid: sheet_month_rows(sid, year, seed_map)
+        sid: sheet_month_rows(sid, year, seed_map, sheet_inputs(sid))
         for sid in sheet_ids
     }
 
-    monthly = []
-    for month in range(1, 13):
-        if sheet_ids:
+    if sheet_ids:
+        monthly = []
+        for month in range(1, 13):
             income = Decimal('0')
             expenses_m = Decimal('0')
             for sid in sheet_ids:
                 bi, be, _bn = sheet_month_cache[sid][month - 1]
                 income += bi
                 expenses_m += be
-        else:
-            income = month_rent[month] + month_short[month]
-            expenses_m = month_exp[month]
-        monthly.append({
-            'month': month,
-            'income': float(income),
-            'expenses': float(expenses_m),
-            'net': float(income - expenses_m),
-        })
+            monthly.append({
+                'month': month,
+                'income': float(income),
+                'expenses': float(expenses_m),
+                'net': float(income - expenses_m),
+            })
+    else:
+        monthly = month_grid.portfolio_rows()
 
     for row in property_rows:
         pid = row['property_id']
@@ -936,15 +1123,7 @@ def compute_property_pnl(
             for month in range(1, 13):
                 rows.append({'month': month, 'income': 0.0, 'expenses': 0.0, 'net': 0.0})
         else:
-            for month in range(1, 13):
-                income = rent_by_prop_month[pid][month] + short_by_prop_month[pid][month]
-                exp = opex_by_prop_month[pid][month]
-                rows.append({
-                    'month': month,
-                    'income': float(income),
-                    'expenses': float(exp),
-                    'net': float(income - exp),
-                })
+            rows = month_grid.property_rows(pid)
         row['monthly'] = rows
 
     return {
@@ -966,6 +1145,135 @@ def compute_property_pnl(
     }
 
 
+def _years_by_property_set(years, properties_by_year):
+    """[(properties, [years])] grouping years that show the same properties."""
+    groups = {}
+    for year in sorted(set(years)):
+        properties = properties_by_year[year]
+        key = tuple(sorted(p.id for p in properties))
+        groups.setdefault(key, (properties, []))[1].append(year)
+    return list(groups.values())
+
+
+def compute_property_pnl_range(*, years, properties_by_year, admin_view, request=None, summary_only=False):
+    """
+    Income statements for several calendar years. properties_by_year maps each year
+    to its property list (income_statement_properties_by_year); years showing the
+    same properties share one prefetch. Returns a list of compute_property_pnl
+    payloads, oldest year first.
+    """
+    return list(iter_property_pnl_range(
+        years=years,
+        properties_by_year=properties_by_year,
+        admin_view=admin_view,
+        request=request,
+        summary_only=summary_only,
+    ))
+
+
+def iter_property_pnl_range(*, years, properties_by_year, admin_view, request=None, summary_only=False):
+    """
+    compute_property_pnl_range one payload at a time, oldest year first, so an export
+    can write each year and drop it. A shared prefetch is released after its last year.
+    """
+    group_for_year = {}
+    for properties, group_years in _years_by_property_set(years, properties_by_year):
+        for year in group_years:
+            group_for_year[year] = (properties, group_years)
+
+    prefetched = {}
+    for year in sorted(group_for_year):
+        properties, group_years = group_for_year[year]
+        group_key = group_years[0]
+        if group_key not in prefetched:
+            prefetched[group_key] = prefetch_pnl_inputs(
+                years=group_years, properties=properties, include_units=not summary_only,
+            )
+        yield compute_property_pnl(
+            year=year,
+            properties=properties,
+            admin_view=admin_view,
+            request=request,
+            summary_only=summary_only,
+            inputs=prefetched[group_key],
+        )
+        if year == group_years[-1]:
+            del prefetched[group_key]
+
+
+def trailing_month_keys(end_year, end_month, count=12):
+    """(year, month) pairs for the `count` months ending at end_year/end_month, oldest first."""
+    keys = []
+    year, month = end_year, end_month
+    for _ in range(count):
+        keys.append((year, month))
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+    return list(reversed(keys))
+
+
+def trailing_twelve_months(payloads, end_year, end_month):
+    """
+    Stitch a trailing-12-month view out of full-year payloads (compute_property_pnl_range).
+    Totals are summed from the monthly rows so they match the per-year statements.
+    """
+    by_year = {p['year']: p for p in payloads}
+    keys = trailing_month_keys(end_year, end_month)
+
+    def slice_rows(rows_for_year):
+        rows = []
+        for year, month in keys:
+            year_rows = rows_for_year(year)
+            row = year_rows[month - 1] if year_rows else {'income': 0.0, 'expenses': 0.0, 'net': 0.0}
+            rows.append({
+                'year': year,
+                'month': month,
+                'income': row['income'],
+                'expenses': row['expenses'],
+                'net': row['net'],
+            })
+        return rows
+
+    def totals(rows):
+        income = sum(Decimal(str(r['income'])) for r in rows)
+        expenses = sum(Decimal(str(r['expenses'])) for r in rows)
+        return {
+            'total_income': float(income),
+            'total_expenses': float(expenses),
+            'net_income': float(income - expenses),
+        }
+
+    monthly = slice_rows(lambda y: by_year[y]['monthly'] if y in by_year else None)
+
+    property_rows = {}
+    for payload in payloads:
+        for row in payload['by_property']:
+            property_rows.setdefault(row['property_id'], {
+                'property_id': row['property_id'],
+                'property_name': row['property_name'],
+                'monthly_by_year': {},
+            })['monthly_by_year'][payload['year']] = row['monthly']
+
+    by_property = []
+    for entry in property_rows.values():
+        rows = slice_rows(entry['monthly_by_year'].get)
+        by_property.append({
+            'property_id': entry['property_id'],
+            'property_name': entry['property_name'],
+            **totals(rows),
+            'monthly': rows,
+        })
+
+    return {
+        'start': {'year': keys[0][0], 'month': keys[0][1]},
+        'end': {'year': keys[-1][0], 'month': keys[-1][1]},
+        'portfolio': totals(monthly),
+        'by_property': by_property,
+        'monthly': monthly,
+    }
+
+
 def _monthly_maps(*, year, property_ids, admin_view, tenant_prop_map, props_by_id):
     """Portfolio + per-property monthly maps in one payment pass and one expense pass."""
     property_ids_set = set(property_ids)
@@ -998,36 +1306,33 @@ def _monthly_maps(*, year, property_ids, admin_view, tenant_prop_map, props_by_i
         month_short[month] += total
         short_by_prop[pid][month] += total
 
-    expenses = list(OperatingExpense.objects.filter(date__year=year).only(
-        'amount', 'date', 'property_id', 'visibility', 'notes', 'category',
-    ))
+    # Financing never reaches NOI — drop it (and hidden rows) in SQL, then sum per property/month.
+    expenses_qs = OperatingExpense.objects.filter(date__year=year).exclude(is_financing=True)
     if not admin_view:
-        expenses = [e for e in expenses if e.visibility != 'admin_only']
-
-    summary_keys = {
-        (e.property_id, e.date.month)
-        for e in expenses
-        if is_excel_import_note(e.notes, year) and '__SUMMARY__' in (e.notes or '')
-    }
-    props_with_summary = {pid for pid, _ in summary_keys}
+        expenses_qs = expenses_qs.exclude(visibility='admin_only')
+    props_with_summary = set(
+        expenses_qs.filter(is_excel_summary=True, import_year=year)
+        .order_by().values_list('property_id', flat=True).distinct()
+    )
+    # Excel line items are already inside __SUMMARY__ for those properties.
+    expense_rows = expenses_qs.exclude(
+        import_year=year,
+        is_excel_summary=False,
+        property_id__in=props_with_summary,
+    ).annotate(month=ExtractMonth('date')).order_by().values('property_id', 'month').annotate(
+        total=Sum('amount'),
+    )
 
     month_exp = defaultdict(lambda: Decimal('0'))
     opex_by_prop = defaultdict(lambda: defaultdict(lambda: Decimal('0')))
-    for exp in expenses:
-        if _is_financing_expense(exp):
-            continue
-        notes = exp.notes or ''
-        is_excel = is_excel_import_note(notes, year)
-        is_summary = is_excel and '__SUMMARY__' in notes
-        if is_excel and not is_summary and exp.property_id in props_with_summary:
-            continue
-        prop_id = exp.property_id
+    for row in expense_rows:
+        prop_id = row['property_id']
         if prop_id:
             prop_id = _rollup_property_id(prop_id, property_ids_set, props_by_id) or prop_id
         if prop_id and prop_id not in property_ids_set:
             continue
-        amount = exp.amount or Decimal('0')
-        month = exp.date.month
+        amount = row['total'] or Decimal('0')
+        month = int(row['month'])
         if prop_id:
             opex_by_prop[prop_id][month] += amount
             month_exp[month] += amount
@@ -0,0 +1,155 @@
+"""
+Background report jobs (ReportJob) for P&L work and lease batches too slow for a
+gunicorn request.
+
+enqueue_report_job() creates the row and hands it to Celery; execute_report_job()
+runs the registered builder and stores a JSON result or a file with a TTL.
+"""
+import logging
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import ReportJob
+from .permissions import is_admin_user
+
+logger = logging.getLogger(__name__)
+
+REPORT_RESULT_TTL = timedelta(hours=24)
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def _job_years(params):
+    from_year = int(params['from'])
+    to_year = int(params.get('to') or from_year)
+    return list(range(from_year, to_year + 1))
+
+
+def _build_income_statement(job):
+    """Full (or summary) P&L for one or more years → JSON."""
+    from .pnl_service import compute_property_pnl_range, income_statement_properties_by_year
+
+    years = _job_years(job.params)
+    user = job.requested_by
+    admin_view = is_admin_user(user)
+    payloads = compute_property_pnl_range(
+        years=years,
+        properties_by_year=income_statement_properties_by_year(user, years, admin_view),
+        admin_view=admin_view,
+        summary_only=bool(job.params.get('summary')),
+    )
+    return {'from': years[0], 'to': years[-1], 'is_admin_view': admin_view, 'years': payloads}
+
+
+def _build_income_statement_export(job):
+    """CSV / XLSX export → (filename, content_type, bytes)."""
+    from .pnl_export import build_xlsx, export_payloads, iter_csv
+    from .pnl_service import income_statement_properties_by_year
+
+    years = _job_years(job.params)
+    properties_by_year = income_statement_properties_by_year(job.requested_by, years, admin_view=True)
+    payloads = export_payloads(years=years, properties_by_year=properties_by_year, admin_view=True)
+
+    span = f"{years[0]}" if len(years) == 1 else f"{years[0]}-{years[-1]}"
+    if job.params.get('file_type') == 'xlsx':
+        out = build_xlsx(payloads)
+        try:
+            content = out.read()
+        finally:
+            out.close()
+        return f"income_statement_{span}.xlsx", XLSX_CONTENT_TYPE, content
+    return f"income_statement_{span}.csv", 'text/csv', b''.join(iter_csv(payloads))
+
+
+def _build_lease_batch(job):
+    from .lease_batch import build_lease_batch
+
+    return build_lease_batch(job)
+
+
+REPORT_BUILDERS = {
+    'income_statement': _build_income_statement,
+    'income_statement_export': _build_income_statement_export,
+    'lease_batch': _build_lease_batch,
+}
+# Kinds clients may queue through POST /report-jobs/ (others have their own endpoints).
+PNL_REPORT_KINDS = ('income_statement', 'income_statement_export')
+
+
+def execute_report_job(job_id):
+    """Run a pending job and persist its result (called by the Celery task)."""
+    try:
+        job = ReportJob.objects.select_related('requested_by').get(id=job_id)
+    except ReportJob.DoesNotExist:
+        logger.error(f"ReportJob {job_id} not found.")
+        return
+    if job.status not in ('pending', 'failed'):
+        logger.info(f"ReportJob {job_id} already {job.status}; skipping.")
+        return
+
+    builder = REPORT_BUILDERS.get(job.kind)
+    if builder is None:
+        job.status = 'failed'
+        job.error = f"Unknown report kind: {job.kind}"
+        job.finished_at = timezone.now()
+        job.expires_at = job.finished_at + REPORT_RESULT_TTL
+        job.save(update_fields=['status', 'error', 'finished_at', 'expires_at'])
+        return
+
+    # Claim the job with one conditional UPDATE: a redelivered task racing the inline
+    # fallback sees zero rows updated and leaves the build to whoever claimed it.
+    started_at = timezone.now()
+    claimed = ReportJob.objects.filter(id=job_id, status__in=('pending', 'failed')).update(
+        status='running', started_at=started_at, error='',
+    )
+    if claimed != 1:
+        logger.info(f"ReportJob {job_id} was claimed by another worker; skipping.")
+        return
+    job.status = 'running'
+    job.started_at = started_at
+    job.error = ''
+
+    try:
+        output = builder(job)
+    except Exception as e:
+        logger.error(f"ReportJob {job_id} ({job.kind}) failed: {e}", exc_info=True)
+        job.status = 'failed'
+        job.error = str(e)[:2000]
+        job.finished_at = timezone.now()
+        job.expires_at = job.finished_at + REPORT_RESULT_TTL
+        job.save(update_fields=['status', 'error', 'finished_at', 'expires_at'])
+        return
+
+    if isinstance(output, tuple):
+        job.result_filename, job.result_content_type, job.result_file = output
+    else:
+        job.result = output
+    job.status = 'ready'
+    job.finished_at = timezone.now()
+    job.expires_at = job.finished_at + REPORT_RESULT_TTL
+    job.save()
+    logger.info(
+        f"ReportJob {job_id} ({job.kind}) ready in "
+        f"{(job.finished_at - job.started_at).total_seconds():.1f}s"
+    )
+
+
+def enqueue_report_job(*, kind, params, user):
+    """Create a ReportJob and queue it; runs inline if Celery is unavailable."""
+    from .tasks import run_report_job
+
+    job = ReportJob.objects.create(kind=kind, params=params, requested_by=user)
+    try:
+        run_report_job.delay(str(job.id))
+    except Exception as e:
+        logger.warning(f"Failed to queue ReportJob {job.id}, running synchronously: {e}")
+        execute_report_job(job.id)
+        job.refresh_from_db()
+    return job
+
+
+def purge_expired_report_jobs():
+    """Delete jobs whose result TTL has passed. Returns the number removed."""
+    deleted, _ = ReportJob.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
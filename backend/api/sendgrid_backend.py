@@ -1,137 +1,203 @@
 import sendgrid
-from sendgrid.helpers.mail import Mail, Email, Content, Attachment
+from python_http_client.exceptions import HTTPError
 from django.conf import settings
 from django.core.mail.backends.base import BaseEmailBackend
 from django.core.mail.message import sanitize_address
+from email.utils import parseaddr
 import logging
 import base64
 import mimetypes
 import os
+import re
+import threading
 
 logger = logging.getLogger(__name__)
 
+# SendGrid v3 /mail/send accepts at most 1000 personalizations per request.
+MAX_PERSONALIZATIONS = 1000
+DEFAULT_API_HOST = 'https://api.sendgrid.com'
+# e.g. "personalizations.12.to.0.email" in a 400 error body
+_PERSONALIZATION_FIELD_RE = re.compile(r'^personalizations\.(\d+)\.')
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key, host=None):
+    """One SendGridAPIClient per (api key, host) per process."""
+    host = host or DEFAULT_API_HOST
+    key = (api_key, host)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = sendgrid.SendGridAPIClient(api_key=api_key, host=host)
+            _clients[key] = client
+        return client
+
+
+def _address(addr, encoding):
+    name, email = parseaddr(sanitize_address(addr, encoding))
+    return {'email': email, 'name': name} if name else {'email': email}
+
+
+def _attachments(message):
+    # Django EmailMessage attachments can be tuples or MIMEBase objects
+    built = []
+    for attachment in getattr(message, 'attachments', None) or []:
+        try:
+            if hasattr(attachment, 'get_payload'):
+                filename = attachment.get_filename()
+                file_content = attachment.get_payload(decode=True)
+                file_mimetype = attachment.get_content_type()
+            elif isinstance(attachment, tuple):
+                filename, content, file_mimetype = attachment
+                if isinstance(content, str) and os.path.isfile(content):
+                    with open(content, 'rb') as f:
+                        file_content = f.read()
+                else:
+                    file_content = content.encode() if isinstance(content, str) else content
+            else:
+                continue
+            if not file_mimetype:
+                file_mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            built.append({
+                'content': base64.b64encode(file_content).decode(),
+                'type': file_mimetype,
+                'filename': filename,
+                'disposition': 'attachment',
+            })
+        except Exception as e:
+            logger.warning(f"Could not attach file: {e}")
+    return built
+
+
+def _payload(message):
+    """Everything but the recipients: messages with equal payloads share one request."""
+    content = [{'type': 'text/plain', 'value': message.body or ' '}]
+    for alt_content, mimetype in getattr(message, 'alternatives', None) or []:
+        if mimetype == 'text/html':
+            content.append({'type': 'text/html', 'value': alt_content})
+    payload = {
+        'from': _address(message.from_email, message.encoding),
+        'subject': message.subject,
+        'content': content,
+    }
+    attachments = _attachments(message)
+    if attachments:
+        payload['attachments'] = attachments
+    if message.reply_to:
+        payload['reply_to'] = _address(message.reply_to[0], message.encoding)
+    return payload
+
+
+def _failed_personalizations(error):
+    """Indexes of personalizations a 400 response blames, or None if the whole request failed."""
+    import json
+
+    if getattr(error, 'status_code', None) != 400:
+        return None
+    try:
+        errors = json.loads(error.body or b'{}').get('errors') or []
+    except (TypeError, ValueError):
+        return None
+    indexes = {}
+    for err in errors:
+        match = _PERSONALIZATION_FIELD_RE.match(err.get('field') or '')
+        if not match:
+            return None
+        indexes[int(match.group(1))] = err.get('message') or 'rejected'
+    return indexes or None
+
+
 class SendGridBackend(BaseEmailBackend):
+    """
+    Sends through the SendGrid v3 API. Messages with the same sender, subject,
+    body and attachments go out as one request with a personalization per
+    recipient (each recipient still gets an individual email). After sending,
+    message.sendgrid_status maps every recipient to 'queued' or 'failed: <reason>'.
+    """
+
     def __init__(self, fail_silently=False, **kwargs):
         super().__init__(fail_silently=fail_silently)
         self.api_key = getattr(settings, "SENDGRID_API_KEY", None)
+        self.api_host = getattr(settings, "SENDGRID_API_HOST", None) or DEFAULT_API_HOST
         if not self.api_key:
             logger.error("SENDGRID_API_KEY is missing in settings.")
 
     def send_messages(self, email_messages):
-        if not self.api_key:
+        if not self.api_key or not email_messages:
             return 0
 
-        sg = sendgrid.SendGridAPIClient(api_key=self.api_key)
-        count = 0
-
+        client = get_client(self.api_key, self.api_host)
+        groups = {}
         for message in email_messages:
+            message.sendgrid_status = {}
             try:
-                from_email = sanitize_address(message.from_email, message.encoding)
                 to_emails = [sanitize_address(addr, message.encoding) for addr in (message.to or [])]
-                subject = message.subject
-                body = message.body
                 if not to_emails:
                     logger.warning("SendGridBackend: message has no recipients; skipping.")
                     continue
-
-                # Build attachments once; SendGrid Mail in this library version expects:
-                # Mail(from_email=None, subject=None, to_email=None, content=None)
-                # So we send one email per recipient.
-                built_attachments: list[Attachment] = []
-                if getattr(message, "attachments", None):
-                    for attachment in message.attachments:
-                        try:
-                            # Django EmailMessage attachments can be tuples or MIMEBase objects
-                            if hasattr(attachment, 'get_payload'):
-                                filename = attachment.get_filename()
-                                file_content = attachment.get_payload(decode=True)
-                                file_mimetype = attachment.get_content_type()
-                            elif isinstance(attachment, tuple):
-                                filename, content, file_mimetype = attachment
-                                if isinstance(content, str) and os.path.isfile(content):
-                                    with open(content, 'rb') as f:
-                                        file_content = f.read()
-                                else:
-                                    file_content = content.encode() if isinstance(content, str) else content
-                            else:
-                                continue
-
-                            encoded = base64.b64encode(file_content).decode()
-                            if not file_mimetype:
-                                file_mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
-
-                            sg_attachment = Attachment()
-                            sg_attachment.content = encoded
-                            sg_attachment.type = file_mimetype
-                            sg_attachment.filename = filename
-                            sg_attachment.disposition = 'attachment'
-                            built_attachments.append(sg_attachment)
-                            logger.info(f"Added attachment: {filename}")
-                        except Exception as e:
-                            logger.warning(f"Could not attach file: {e}")
-
-                html_alternatives = []
-                if hasattr(message, 'alternatives'):
-                    html_alternatives = [(c, mt) for (c, mt) in message.alternatives if mt == "text/html"]
-
-                # SendGrid Python SDK has different versions with different parameter names
-                # Try both to_email (singular) and to_emails (plural) for compatibility
-                for to_email in to_emails:
-                    sg_mail = None
-                    try:
-                        # Try with to_email (singular) and content parameter - used in some SendGrid versions
-                        sg_mail = Mail(
-                            from_email=Email(from_email),
-                            to_email=Email(to_email),
-                            subject=subject,
-                            content=Content("text/plain", body),
-                        )
-                    except TypeError:
-                        try:
-                            # Try with to_emails (plural) and content parameter - used in other SendGrid versions
-                            sg_mail = Mail(
-                                from_email=Email(from_email),
-                                to_emails=[Email(to_email)],
-                                subject=subject,
-                                content=Content("text/plain", body),
-                            )
-                        except TypeError as e2:
-                            logger.error(f"SendGrid Mail initialization failed with both to_email and to_emails: {e2}")
-                            if not self.fail_silently:
-                                raise
-                            continue
-                    
-                    if not sg_mail:
-                        logger.error(f"Failed to create Mail object for {to_email}")
-                        continue
-                    
-                    try:
-                        # Add HTML content if available
-                        for content, _mimetype in html_alternatives:
-                            sg_mail.add_content(Content("text/html", content))
-
-                        # Add attachments
-                        for att in built_attachments:
-                            sg_mail.add_attachment(att)
-
-                        # Send email via SendGrid API
-                        response = sg.client.mail.send.post(request_body=sg_mail.get())
-                        if 200 <= response.status_code < 300:
-                            count += 1
-                            logger.info(f"Email sent successfully via SendGrid to {to_email}. Status: {response.status_code}")
-                        else:
-                            logger.error(f"SendGrid API Error: {response.status_code} - {response.body}")
-                    except Exception as e:
-                        logger.error(f"Failed to send email via SendGrid to {to_email}: {str(e)}", exc_info=True)
-                        if not self.fail_silently:
-                            raise
-            
+                payload = _payload(message)
             except Exception as e:
-                logger.error(f"Failed to send email via SendGrid: {str(e)}", exc_info=True)
+                logger.error(f"Failed to build SendGrid request: {str(e)}", exc_info=True)
                 if not self.fail_silently:
                     raise
-
-        return count
-
-
-
+                continue
+            group_key = repr(payload)
+            group = groups.setdefault(group_key, {'payload': payload, 'recipients': []})
+            group['recipients'].extend((message, to_email) for to_email in to_emails)
+
+        for group in groups.values():
+            recipients = group['recipients']
+            for start in range(0, len(recipients), MAX_PERSONALIZATIONS):
+                self._send_chunk(client, group['payload'], recipients[start:start + MAX_PERSONALIZATIONS])
+
+        return sum(
+            1 for message in email_messages
+            if any(status == 'queued' for status in getattr(message, 'sendgrid_status', {}).values())
+        )
+
+    def _send_chunk(self, client, payload, recipients, retry=True):
+        """POST one request for (message, recipient) pairs and record each recipient's status."""
+        body = dict(payload)
+        body['personalizations'] = [{'to': [_address(to_email, message.encoding)]} for message, to_email in recipients]
+        try:
+            response = client.client.mail.send.post(request_body=body)
+            status_code = response.status_code
+        except HTTPError as e:
+            failed = _failed_personalizations(e)
+            if failed is not None and retry:
+                # Mark the recipients SendGrid rejected and resend the rest once.
+                for index, reason in failed.items():
+                    if index < len(recipients):
+                        message, to_email = recipients[index]
+                        message.sendgrid_status[to_email] = f'failed: {reason}'
+                        logger.error(f"SendGrid rejected recipient {to_email}: {reason}")
+                remaining = [r for i, r in enumerate(recipients) if i not in failed]
+                if remaining:
+                    self._send_chunk(client, payload, remaining, retry=False)
+                return
+            logger.error(f"SendGrid API Error: {getattr(e, 'status_code', '?')} - {getattr(e, 'body', e)}")
+            self._mark_failed(recipients, f"HTTP {getattr(e, 'status_code', '?')}")
+            if not self.fail_silently:
+                raise
+            return
+        except Exception as e:
+            logger.error(f"Failed to send email via SendGrid: {str(e)}", exc_info=True)
+            self._mark_failed(recipients, str(e))
+            if not self.fail_silently:
+                raise
+            return
+
+        if 200 <= status_code < 300:
+            for message, to_email in recipients:
+                message.sendgrid_status[to_email] = 'queued'
+            logger.info(f"Email sent successfully via SendGrid to {len(recipients)} recipient(s). Status: {status_code}")
+        else:
+            logger.error(f"SendGrid API Error: {status_code} - {response.body}")
+            self._mark_failed(recipients, f"HTTP {status_code}")
+
+    @staticmethod
+    def _mark_failed(recipients, reason):
+        for message, to_email in recipients:
+            message.sendgrid_status[to_email] = f'failed: {reason}'
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Tenant, Payment, MaintenanceRequest, LegalDocument, Listing, Property, LeaseTemplate, ShortStayBooking, ShortStayBlockedDate, OperatingExpense, PropertyUnit, PropertyFinancials, PropertyManagerProfile, PropertyMonthInput
+from .models import Tenant, Payment, MaintenanceRequest, LegalDocument, Listing, Property, LeaseTemplate, ShortStayBooking, ShortStayBlockedDate, OperatingExpense, PropertyUnit, PropertyFinancials, PropertyManagerProfile, PropertyMonthInput, ReportJob
 from .permissions import (
     is_admin_user,
     is_property_manager,
@@ -8,6 +8,9 @@ from .permissions import (
 )
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
+from django.db import transaction
+from .upload_pipeline import save_uploads
+from .image_derivatives import derivative_url
 import os
 from datetime import datetime
 
@@ -111,54 +114,23 @@ class TenantSerializer(serializers.ModelSerializer):
         # Create the tenant instance
         tenant = super().create(validated_data)
         
-        # Handle photo ID file uploads
-        photo_id_file_paths = []
-        for file in photo_id_uploads:
-            # Create unique filename with timestamp
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"applications/tenant_{tenant.id}/photo_id_{timestamp}_{file.name}"
-            
-            # Save file to storage
-            path = default_storage.save(filename, ContentFile(file.read()))
-            
-            # Store file metadata
-            photo_id_file_paths.append({
-                'filename': file.name,
-                'path': path,
-                'size': file.size,
-                'uploaded_at': datetime.now().isoformat()
-            })
-        
-        # Handle income verification file uploads
-        income_verification_file_paths = []
-        for file in income_verification_uploads:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"applications/tenant_{tenant.id}/income_{timestamp}_{file.name}"
-            
-            path = default_storage.save(filename, ContentFile(file.read()))
-            
-            income_verification_file_paths.append({
-                'filename': file.name,
-                'path': path,
-                'size': file.size,
-                'uploaded_at': datetime.now().isoformat()
-            })
-        
-        # Handle background check file uploads
-        background_check_file_paths = []
-        for file in background_check_uploads:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"applications/tenant_{tenant.id}/background_{timestamp}_{file.name}"
-            
-            path = default_storage.save(filename, ContentFile(file.read()))
-            
-            background_check_file_paths.append({
-                'filename': file.name,
-                'path': path,
-                'size': file.size,
-                'uploaded_at': datetime.now().isoformat()
-            })
-        
+        # Save every uploaded document concurrently (see upload_pipeline).
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        base = f"applications/tenant_{tenant.id}"
+        groups = [
+            ('photo_id', photo_id_uploads),
+            ('income', income_verification_uploads),
+            ('background', background_check_uploads),
+        ]
+        entries = save_uploads([
+            (f"{base}/{prefix}_{timestamp}_{file.name}", file)
+            for prefix, files in groups
+            for file in files
+        ])
+        photo_id_file_paths = entries[:len(photo_id_uploads)]
+        income_verification_file_paths = entries[len(photo_id_uploads):len(photo_id_uploads) + len(income_verification_uploads)]
+        background_check_file_paths = entries[len(photo_id_uploads) + len(income_verification_uploads):]
+
         # Update tenant with file paths and calculate balance
         tenant.photo_id_files = photo_id_file_paths
         tenant.income_verification_files = income_verification_file_paths
@@ -496,17 +468,63 @@ class CreatePropertyManagerSerializer(serializers.Serializer):
         child=serializers.IntegerField(), required=False, default=list
     )
 
+class LeaseBatchRequestSerializer(serializers.Serializer):
+    tenant_ids = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    lease_end_from = serializers.DateField(required=False, allow_null=True)
+    lease_end_to = serializers.DateField(required=False, allow_null=True)
+    status = serializers.CharField(required=False, allow_blank=True)
+    template_id = serializers.IntegerField(required=False, allow_null=True)
+    send = serializers.BooleanField(required=False, default=True)
+
+    def validate(self, attrs):
+        if not attrs.get('tenant_ids'):
+            start, end = attrs.get('lease_end_from'), attrs.get('lease_end_to')
+            if not (start or end):
+                raise serializers.ValidationError('tenant_ids or a lease_end_from/lease_end_to window is required')
+            if start and end and start > end:
+                raise serializers.ValidationError('lease_end_from must not be after lease_end_to')
+        return attrs
+
+    def to_params(self):
+        """JSON-safe ReportJob params for lease_batch.batch_tenants."""
+        data = self.validated_data
+        params = {'send': data['send']}
+        if data.get('tenant_ids'):
+            params['tenant_ids'] = data['tenant_ids']
+        else:
+            for key in ('lease_end_from', 'lease_end_to'):
+                if data.get(key):
+                    params[key] = data[key].isoformat()
+            if data.get('status'):
+                params['status'] = data['status']
+        if data.get('template_id'):
+            params['template_id'] = data['template_id']
+        return params
+
 class LeaseTemplateSerializer(serializers.ModelSerializer):
     class Meta:
         model = LeaseTemplate
         fields = '__all__'
 
+    def validate_content(self, value):
+        """Reject placeholders the lease engine cannot fill (typos would otherwise print verbatim)."""
+        from .lease_service import LEASE_PLACEHOLDERS
+        from .lease_templates import unknown_placeholders
+
+        unknown = unknown_placeholders(value, LEASE_PLACEHOLDERS)
+        if unknown:
+            raise serializers.ValidationError(
+                'Unknown placeholders: ' + ', '.join('{{%s}}' % name for name in unknown)
+            )
+        return value
+
 class LegalDocumentSerializer(serializers.ModelSerializer):
     pdf_url = serializers.SerializerMethodField()
     
     class Meta:
         model = LegalDocument
         fields = '__all__'
+        read_only_fields = ['field_layout']
     
     def get_pdf_url(self, obj):
         request = self.context.get('request')
@@ -515,12 +533,23 @@ class LegalDocumentSerializer(serializers.ModelSerializer):
         return request.build_absolute_uri(f"/api/legal-documents/{obj.id}/pdf/")
 
 class ListingSerializer(serializers.ModelSerializer):
+    image_thumb = serializers.SerializerMethodField()
+    image_medium = serializers.SerializerMethodField()
+
     class Meta:
         model = Listing
         fields = '__all__'
 
+    def get_image_thumb(self, obj):
+        return derivative_url(obj, 'thumb') or obj.image
+
+    def get_image_medium(self, obj):
+        return derivative_url(obj, 'medium') or obj.image
+
 class PropertySerializer(serializers.ModelSerializer):
     display_image = serializers.SerializerMethodField()
+    display_image_thumb = serializers.SerializerMethodField()
+    display_image_medium = serializers.SerializerMethodField()
     effective_nightly_rate = serializers.SerializerMethodField()
     effective_max_guests = serializers.SerializerMethodField()
     effective_cleaning_fee = serializers.SerializerMethodField()
@@ -535,7 +564,7 @@ class PropertySerializer(serializers.ModelSerializer):
         model = Property
         fields = '__all__'
         read_only_fields = (
-            'display_image', 'effective_nightly_rate', 'effective_max_guests',
+            'display_image', 'display_image_thumb', 'display_image_medium', 'effective_nightly_rate', 'effective_max_guests',
             'effective_cleaning_fee', 'effective_check_in_time', 'effective_check_out_time',
             'guest_listing_title', 'guest_listing_description', 'guest_listing_area',
             'guest_listing_location',
@@ -550,6 +579,13 @@ class PropertySerializer(serializers.ModelSerializer):
             return obj.image.url
         return obj.image_url
 
+    def get_display_image_thumb(self, obj):
+        """Small variant for list/grid views; the full image until derivatives exist."""
+        return derivative_url(obj, 'thumb') or self.get_display_image(obj)
+
+    def get_display_image_medium(self, obj):
+        return derivative_url(obj, 'medium') or self.get_display_image(obj)
+
     def get_effective_nightly_rate(self, obj):
         return float(obj.get_short_stay_nightly_rate())
 
@@ -733,22 +769,18 @@ class ShortStayBookingSerializer(serializers.ModelSerializer):
             if not available:
                 raise serializers.ValidationError({'status': reason})
 
-        booking = super().update(instance, validated_data)
+        # The confirmation email is written to the outbox in the booking's transaction.
+        with transaction.atomic():
+            booking = super().update(instance, validated_data)
 
-        if old_status != 'confirmed' and booking.status == 'confirmed':
-            from .guest_portal import generate_short_stay_access_pin
-            from .email_service import send_short_stay_confirmation_to_guest
+            if old_status != 'confirmed' and booking.status == 'confirmed':
+                from .email_outbox import enqueue_email
+                from .guest_portal import generate_short_stay_access_pin
 
-            if not booking.access_pin:
-                booking.access_pin = generate_short_stay_access_pin()
-                booking.save(update_fields=['access_pin'])
-            try:
-                send_short_stay_confirmation_to_guest.delay(booking.id)
-            except Exception as e:
-                import logging
-                logging.getLogger(__name__).warning(
-                    f"Queued short-stay confirmation email failed, skipping sync send: {e}"
-                )
+                if not booking.access_pin:
+                    booking.access_pin = generate_short_stay_access_pin()
+                    booking.save(update_fields=['access_pin'])
+                enqueue_email('send_short_stay_confirmation_to_guest', booking.id)
 
         return booking
 
@@ -770,19 +802,14 @@ class ShortStayBookingSerializer(serializers.ModelSerializer):
 
         booking = ShortStayBooking.objects.create(**validated_data)
 
-        def save_one_file(file, prefix):
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"short_stays/booking_{booking.id}/{prefix}_{timestamp}_{file.name}"
-            path = default_storage.save(filename, ContentFile(file.read()))
-            return {
-                'filename': file.name,
-                'path': path,
-                'size': file.size,
-                'uploaded_at': datetime.now().isoformat(),
-            }
-
-        proof_file_paths = [save_one_file(f, 'proof') for f in proof_uploads]
-        id_file_paths = [save_one_file(f, 'guest_id') for f in id_uploads]
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        base = f"short_stays/booking_{booking.id}"
+        entries = save_uploads(
+            [(f"{base}/proof_{timestamp}_{f.name}", f) for f in proof_uploads]
+            + [(f"{base}/guest_id_{timestamp}_{f.name}", f) for f in id_uploads]
+        )
+        proof_file_paths = entries[:len(proof_uploads)]
+        id_file_paths = entries[len(proof_uploads):]
         update_fields = []
         if proof_file_paths:
             booking.proof_of_payment_files = proof_file_paths
@@ -811,3 +838,19 @@ class ShortStayBlockedDateSerializer(serializers.ModelSerializer):
         if start and end and end <= start:
             raise serializers.ValidationError({'end_date': 'End date must be after start date.'})
         return data
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    """Job status for polling; `result` is only included once the job is ready."""
+    has_file = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportJob
+        fields = (
+            'id', 'kind', 'params', 'status', 'progress', 'error', 'has_file', 'result_filename',
+            'created_at', 'started_at', 'finished_at', 'expires_at',
+        )
+        read_only_fields = fields
+
+    def get_has_file(self, obj):
+        return obj.status == 'ready' and bool(obj.result_filename)
@@ -0,0 +1,125 @@
+"""
+Signature field layout for in-house lease signing.
+
+Each lease LegalDocument stores its own field_layout: normalized (0-1)
+page/x/y/width/height for every signature, initials, date and checkbox field.
+It is scanned with fitz from the generated PDF itself when the document is
+created (save_lease_document, lease batches), looking for anchor text
+("Tenant's Signature", "Landlord's Signature" and the "Date:" on the same line).
+Filled-in tenant values reflow the text, so the rendered template alone would
+put fields in the wrong place. Fields without an anchor keep the default position.
+
+signing_metadata, sign_lease_by_token and the stamper all read fields from here,
+so the overlay the tenant sees and the stamped PDF always agree.
+"""
+import copy
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fallback layout (letter page 1), used for fields without an anchor and for
+# documents that were not generated from a template.
+DEFAULT_LEASE_FIELDS = [
+    # Agreement checkboxes (tenant ticks to confirm)
+    {"id": "agree_terms", "type": "checkbox", "label": "I agree to the terms",
+     "page": 1, "x": 0.12, "y": 0.72, "width": 0.04, "height": 0.04, "required": True},
+    {"id": "agree_rules", "type": "checkbox", "label": "I agree to community rules",
+     "page": 1, "x": 0.12, "y": 0.76, "width": 0.04, "height": 0.04, "required": True},
+    # Tenant initials (short text)
+    {"id": "tenant_initials", "type": "text", "label": "Initials",
+     "page": 1, "x": 0.55, "y": 0.72, "width": 0.12, "height": 0.04, "required": True},
+    # Tenant signature block
+    {"id": "tenant_signature", "type": "signature", "label": "Tenant Signature",
+     "page": 1, "x": 0.12, "y": 0.82, "width": 0.35, "height": 0.07, "required": True},
+    {"id": "tenant_signature_date", "type": "text", "label": "Date",
+     "page": 1, "x": 0.52, "y": 0.82, "width": 0.15, "height": 0.05, "required": True},
+    # Landlord signature block
+    {"id": "landlord_signature", "type": "signature", "label": "Landlord Signature",
+     "page": 1, "x": 0.12, "y": 0.9, "width": 0.35, "height": 0.07, "required": False},
+    {"id": "landlord_signature_date", "type": "text", "label": "Date",
+     "page": 1, "x": 0.52, "y": 0.9, "width": 0.15, "height": 0.05, "required": False},
+]
+
+# signature field id → (anchor text, date field id on the same line)
+SIGNATURE_ANCHORS = {
+    'tenant_signature': ("Tenant's Signature", 'tenant_signature_date'),
+    'landlord_signature': ("Landlord's Signature", 'landlord_signature_date'),
+}
+INITIALS_ANCHOR = ('tenant_initials', "Tenant's Initials")
+
+
+def _clamp(value):
+    return round(min(max(value, 0.0), 1.0), 4)
+
+
+def _place_after(field, page_number, anchor, page_rect):
+    """Move `field` to sit on the anchor's line, just right of the anchor text."""
+    width, height = field['width'], field['height']
+    x = anchor.x1 / page_rect.width + 0.01
+    y = anchor.y1 / page_rect.height - height
+    field.update(page=page_number, x=_clamp(min(x, 1.0 - width)), y=_clamp(y))
+
+
+def scan_field_layout(pdf_bytes):
+    """Fields with anchored positions where the PDF has the anchor text (last occurrence wins)."""
+    import fitz
+
+    fields = {f['id']: copy.deepcopy(f) for f in DEFAULT_LEASE_FIELDS}
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        found = {}
+        for page_index in range(len(doc)):
+            page = doc[page_index]
+            for field_id, (anchor_text, date_id) in SIGNATURE_ANCHORS.items():
+                for rect in page.search_for(anchor_text):
+                    dates = [
+                        d for d in page.search_for("Date:")
+                        if abs(d.y1 - rect.y1) < 4 and d.x0 > rect.x1
+                    ]
+                    found[field_id] = (page_index + 1, rect, page.rect, dates[0] if dates else None, date_id)
+            initials_id, initials_text = INITIALS_ANCHOR
+            for rect in page.search_for(initials_text):
+                found[initials_id] = (page_index + 1, rect, page.rect, None, None)
+
+        for field_id, (page_number, rect, page_rect, date_rect, date_id) in found.items():
+            _place_after(fields[field_id], page_number, rect, page_rect)
+            if date_rect is not None:
+                _place_after(fields[date_id], page_number, date_rect, page_rect)
+                # Keep the signature box clear of the date on the same line.
+                sig = fields[field_id]
+                sig['width'] = _clamp(min(sig['width'], date_rect.x0 / page_rect.width - sig['x'] - 0.01))
+    finally:
+        doc.close()
+    return [fields[f['id']] for f in DEFAULT_LEASE_FIELDS]
+
+
+def document_field_layout(pdf_bytes):
+    """scan_field_layout for a freshly generated lease, or None when the PDF cannot be scanned."""
+    try:
+        return scan_field_layout(pdf_bytes)
+    except Exception as e:
+        logger.warning(f"Could not scan lease PDF for signing fields, using defaults: {e}")
+        return None
+
+
+def _backfill_document_layout(legal_doc):
+    """Scan and store the layout of a document generated before layouts were stored."""
+    from .lease_signing import read_lease_pdf
+    from .models import LegalDocument
+
+    pdf_bytes = read_lease_pdf(legal_doc)
+    fields = document_field_layout(pdf_bytes) if pdf_bytes else None
+    if fields is not None:
+        LegalDocument.objects.filter(pk=legal_doc.pk).update(field_layout=fields)
+        legal_doc.field_layout = fields
+    return fields
+
+
+def fields_for_document(legal_doc):
+    """Signing fields for a LegalDocument ([] when it is not a lease)."""
+    if (legal_doc.type or '').lower() != 'lease agreement':
+        return []
+    fields = legal_doc.field_layout
+    if fields is None:
+        fields = _backfill_document_layout(legal_doc)
+    return copy.deepcopy(fields or DEFAULT_LEASE_FIELDS)
@@ -20,48 +20,72 @@ def send_test_email():
         logger.error(f"Email sending failed: {e}")
 
 
+RENEWAL_THRESHOLDS = (90, 60, 30)
+
+
 @shared_task
 def check_lease_renewals():
     """
-    Periodic task to check for leases expiring in 90, 60, or 30 days.
+    Periodic task to check for leases expiring within 90, 60, or 30 days.
     Sends renewal reminder emails to tenants.
+
+    One query selects active tenants whose lease_end (indexed) falls in the window,
+    annotated with the tightest threshold reached and excluding thresholds already
+    recorded in LeaseRenewalNotice. Markers are written before the reminders are
+    queued as one Celery group, so a re-run (or a missed day) never repeats a notice.
     """
     from django.utils import timezone
     from datetime import timedelta
-    from .models import Tenant
+    from django.db.models import Case, Exists, IntegerField, OuterRef, Value, When
+    from .models import LeaseRenewalNotice, Tenant
     from .email_service import send_lease_renewal_reminder
     
     today = timezone.now().date()
-    check_days = [90, 60, 30]
+    thresholds = sorted(RENEWAL_THRESHOLDS)
     
-    sent_count = 0
-    
-    for days in check_days:
-        target_date = today + timedelta(days=days)
-        
-        # Find tenants whose lease ends on target_date
-        expiring_tenants = Tenant.objects.filter(
-            lease_end=target_date,
-            status='Active'  # Only active residents
+    already_sent = LeaseRenewalNotice.objects.filter(
+        tenant=OuterRef('pk'),
+        lease_end=OuterRef('lease_end'),
+        days_before=OuterRef('threshold'),
+    )
+    due = list(
+        Tenant.objects.filter(
+            status='Active',  # Only active residents
+            lease_end__gte=today,
+            lease_end__lte=today + timedelta(days=thresholds[-1]),
         )
-        
-        for tenant in expiring_tenants:
+        .exclude(email='')
+        .annotate(threshold=Case(
+            *[When(lease_end__lte=today + timedelta(days=days), then=Value(days)) for days in thresholds],
+            output_field=IntegerField(),
+        ))
+        .exclude(Exists(already_sent))
+        .values_list('id', 'lease_end', 'threshold')
+    )
+    if not due:
+        return "Sent 0 lease renewal reminders"
+    
+    LeaseRenewalNotice.objects.bulk_create(
+        [LeaseRenewalNotice(tenant_id=tenant_id, lease_end=lease_end, days_before=days) for tenant_id, lease_end, days in due],
+        ignore_conflicts=True,
+    )
+    signatures = [
+        send_lease_renewal_reminder.si(tenant_id, (lease_end - today).days)
+        for tenant_id, lease_end, _ in due
+    ]
+    try:
+        from celery import group
+        group(signatures).apply_async()
+    except Exception as e:
+        logger.warning(f"Celery unavailable for lease renewal reminders, sending inline: {e}")
+        for sig in signatures:
             try:
-                # Check if tenant has email
-                if not tenant.email:
-                    continue
-                    
-                logger.info(f"Sending lease renewal reminder to tenant {tenant.id} ({days} days remaining)")
-                
-                # Use delay() if Celery is working, or call directly if not configured?
-                # shared_task wrapper handles this if imported correctly, but let's use .delay() for async
-                send_lease_renewal_reminder.delay(tenant.id, days)
-                sent_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error sending lease renewal reminder to tenant {tenant.id}: {e}")
-                
-    return f"Sent {sent_count} lease renewal reminders"
+                sig.apply()
+            except Exception as exc:
+                logger.error(f"Lease renewal reminder failed: {exc}")
+    
+    logger.info(f"Queued {len(due)} lease renewal reminders")
+    return f"Sent {len(due)} lease renewal reminders"
 
 
 @shared_task
@@ -71,72 +95,175 @@ def send_rent_reminders():
     Logic:
     1. 3 days before due date (Due date is typically 1st of month)
     2. On due date (1st of month)
-    3. Overdue (When status is 'Overdue' or past due date without payment)
+    3. Overdue: payments due yesterday still 'Pending' are marked 'Overdue' with one UPDATE
+
+    Reminders fan out as send_payment_reminders tasks of RENT_REMINDER_CHUNK_SIZE
+    payments, each sending over one pooled connection; record_rent_reminder_run
+    logs the totals and durations and keeps them in the cache.
     """
+    import time
     from django.utils import timezone
     from datetime import timedelta
     from .models import Payment
-    from .email_service import send_payment_reminder_to_tenant
-    
+
+    started = time.perf_counter()
     today = timezone.now().date()
-    sent_count = 0
-    
-    # 1. Find payments due in 3 days (Upcoming)
-    target_date_3_days = today + timedelta(days=3)
-    upcoming_payments = Payment.objects.filter(
-        date=target_date_3_days,
-        status='Pending'
-    )
-    
-    for payment in upcoming_payments:
-        try:
-            send_payment_reminder_to_tenant.delay(payment.id)
-            sent_count += 1
-        except Exception as e:
-            logger.error(f"Error sending upcoming rent reminder for payment {payment.id}: {e}")
-
-    # 2. Find payments due today (Due Date)
-    due_today_payments = Payment.objects.filter(
-        date=today,
-        status='Pending'
-    )
-    
-    for payment in due_today_payments:
-        try:
-            send_payment_reminder_to_tenant.delay(payment.id)
-            sent_count += 1
-        except Exception as e:
-            logger.error(f"Error sending due date rent reminder for payment {payment.id}: {e}")
-
-    # 3. Find payments overdue (Late)
-    # We can check for payments with status 'Overdue' OR payments past due date that are still 'Pending'
-    # Let's run this check for payments due yesterday to mark them overdue effectively, 
-    # OR if we rely on another task to update status to 'Overdue'.
-    # Assuming status update happens elsewhere or we check simply for past due pending.
-    
-    # For notification purposes, let's notify for payments due exactly 1 day ago (now late)
-    # AND perhaps payments that are already marked 'Overdue' (e.g. weekly reminder?)
-    
-    # Logic: Notify on Day 2 (1 day late)
     yesterday = today - timedelta(days=1)
-    late_payments = Payment.objects.filter(
-        date=yesterday,
-        status='Pending'
-    )
-    
-    for payment in late_payments:
-        try:
-            # Update status to Overdue if not already
-            if payment.status != 'Overdue':
-                payment.status = 'Overdue'
-                payment.save()
-                
-            send_payment_reminder_to_tenant.delay(payment.id)
-            sent_count += 1
-        except Exception as e:
-            logger.error(f"Error sending late rent reminder for payment {payment.id}: {e}")
-            
-    return f"Sent {sent_count} rent reminders"
+
+    upcoming_ids = list(Payment.objects.filter(date=today + timedelta(days=3), status='Pending').values_list('id', flat=True))
+    due_today_ids = list(Payment.objects.filter(date=today, status='Pending').values_list('id', flat=True))
+    late = Payment.objects.filter(date=yesterday, status='Pending')
+    late_ids = list(late.values_list('id', flat=True))
+    overdue_marked = Payment.objects.filter(id__in=late_ids, status='Pending').update(status='Overdue')
+
+    payment_ids = upcoming_ids + due_today_ids + late_ids
+    chunk_size = max(1, int(getattr(settings, 'RENT_REMINDER_CHUNK_SIZE', 50)))
+    chunks = [payment_ids[i:i + chunk_size] for i in range(0, len(payment_ids), chunk_size)]
+    summary = {
+        'date': today.isoformat(),
+        'upcoming': len(upcoming_ids),
+        'due_today': len(due_today_ids),
+        'overdue': len(late_ids),
+        'overdue_marked': overdue_marked,
+        'chunks': len(chunks),
+        'select_ms': round((time.perf_counter() - started) * 1000),
+    }
+    if not chunks:
+        return record_rent_reminder_run([], summary)
+
+    from celery import chord
+    from .email_service import send_payment_reminders
+
+    try:
+        chord([send_payment_reminders.si(chunk) for chunk in chunks])(record_rent_reminder_run.s(summary))
+    except Exception as e:
+        logger.warning(f"Celery unavailable for rent reminder chunks, sending inline: {e}")
+        results = [send_payment_reminders(chunk) for chunk in chunks]
+        return record_rent_reminder_run(results, summary)
+    return f"Queued {len(payment_ids)} rent reminders in {len(chunks)} chunk(s)"
 
 
+@shared_task
+def record_rent_reminder_run(results, summary):
+    """
+    Chord callback for send_rent_reminders: totals per chunk results, logged and
+    cached under 'api:rent-reminders:last-run'.
+    """
+    from django.core.cache import cache
+
+    results = [r for r in results if r]
+    run = {
+        **summary,
+        'sent': sum(r['sent'] for r in results),
+        'skipped': sum(r['skipped'] for r in results),
+        'failed': sum(r['failed'] for r in results),
+        'send_ms': sum(r['duration_ms'] for r in results),
+        'slowest_chunk_ms': max((r['duration_ms'] for r in results), default=0),
+    }
+    cache.set('api:rent-reminders:last-run', run, 7 * 24 * 60 * 60)
+    logger.info(f"Rent reminder run: {run}")
+    return run
+
+
+@shared_task
+def run_report_job(job_id):
+    """
+    Celery task to build a queued ReportJob (full P&L, multi-year export).
+    """
+    from .report_jobs import execute_report_job
+
+    logger.info(f"Celery task executing: run_report_job for job {job_id}")
+    execute_report_job(job_id)
+
+
+@shared_task
+def purge_expired_report_jobs():
+    """
+    Periodic task to drop ReportJob rows whose result TTL has passed,
+    and expired idempotency keys kept in the database.
+    """
+    from .idempotency import purge_expired_idempotency_keys
+    from .report_jobs import purge_expired_report_jobs as purge
+
+    deleted = purge()
+    keys = purge_expired_idempotency_keys()
+    return f"Purged {deleted} expired report jobs, {keys} idempotency keys"
+
+
+@shared_task
+def generate_image_derivatives(model_name, pk):
+    """
+    Celery task to render thumbnail/medium variants of a Listing or Property image.
+    """
+    from .image_derivatives import generate_derivatives
+    from .models import Listing, Property
+
+    logger.info(f"Celery task executing: generate_image_derivatives for {model_name} {pk}")
+    model = {'listing': Listing, 'property': Property}.get(model_name)
+    if model is None:
+        logger.error(f"Unknown model for image derivatives: {model_name}")
+        return
+    obj = model.objects.filter(pk=pk).first()
+    if obj is None:
+        return
+    try:
+        generate_derivatives(obj)
+    except Exception as e:
+        logger.error(f"Image derivatives failed for {model_name} {pk}: {e}", exc_info=True)
+
+
+@shared_task(
+    acks_late=True,
+    soft_time_limit=getattr(settings, 'PDF_STAMP_SOFT_TIME_LIMIT', 120),
+    time_limit=getattr(settings, 'PDF_STAMP_TIME_LIMIT', 180),
+)
+def stamp_signed_lease(legal_document_id, values, fields, previous_status='Sent', signing_token_id=None,
+                       queued_at=None):
+    """
+    Celery task (routed to the PDF queue) that stamps and publishes a signed lease.
+    """
+    from celery.exceptions import SoftTimeLimitExceeded
+    from .lease_signing import fail_signed_lease, finalize_signed_lease
+
+    logger.info(f"Celery task executing: stamp_signed_lease for document {legal_document_id}")
+    try:
+        finalize_signed_lease(
+            legal_document_id,
+            values=values,
+            fields=fields,
+            previous_status=previous_status,
+            signing_token_id=signing_token_id,
+            queued_at=queued_at,
+        )
+    except SoftTimeLimitExceeded:
+        logger.error(f"Stamping document {legal_document_id} exceeded its time limit")
+        fail_signed_lease(legal_document_id, 'Stamping timed out', previous_status, signing_token_id)
+
+
+@shared_task
+def release_stuck_signed_leases():
+    """
+    Periodic task to fail leases left 'Signing' by a killed PDF worker, so the
+    tenant can submit again.
+    """
+    from .lease_signing import release_stuck_signed_leases as release
+
+    released = release()
+    if released:
+        logger.warning(f"Released {released} leases stuck in Signing")
+    return released
+
+
+@shared_task
+def drain_email_outbox():
+    """
+    Celery task (nudged after commit, and run every minute by beat) that sends
+    pending OutboundEmail rows and drops sent rows past retention.
+    """
+    from .email_outbox import drain_outbox, purge_sent_outbox
 
+    counts = drain_outbox()
+    purged = purge_sent_outbox()
+    if any(counts.values()) or purged:
+        logger.info(f"Email outbox drained: {counts}, purged {purged} sent rows")
+    return counts
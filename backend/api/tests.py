@@ -1,3 +1,140 @@
-from django.test import TestCase
+import json
+import random
+import threading
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import skipUnless
 
-# Create your tests here.
+from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.test import SimpleTestCase, override_settings
+
+from .pnl_service import MONTH_GRID_KINDS, DecimalMonthGrid
+from .sendgrid_backend import MAX_PERSONALIZATIONS, SendGridBackend
+
+try:
+    from .pnl_numpy import NumpyMonthGrid, to_cents
+except ImportError:
+    NumpyMonthGrid = None
+
+
+@skipUnless(NumpyMonthGrid, 'numpy is not installed')
+class MonthGridParityTests(SimpleTestCase):
+    """The NumPy monthly engine must produce the Decimal engine's rows exactly."""
+
+    property_ids = [11, 12, 13, 14, 15]
+
+    def _rows(self, seed, count=2000):
+        rng = random.Random(seed)
+        owners = self.property_ids + [None]
+        return [
+            (
+                rng.choice(MONTH_GRID_KINDS),
+                rng.choice(owners),
+                rng.randint(1, 12),
+                Decimal(rng.randint(-50000, 500000)) / 100,
+            )
+            for _ in range(count)
+        ]
+
+    def _grids(self, rows):
+        grids = DecimalMonthGrid(self.property_ids), NumpyMonthGrid(self.property_ids)
+        for kind, prop_id, month, amount in rows:
+            for grid in grids:
+                grid.add(kind, prop_id, month, amount)
+        return grids
+
+    def test_property_and_portfolio_rows_match(self):
+        for seed in range(5):
+            decimal_grid, numpy_grid = self._grids(self._rows(seed))
+            for prop_id in self.property_ids:
+                self.assertEqual(decimal_grid.property_rows(prop_id), numpy_grid.property_rows(prop_id))
+            self.assertEqual(decimal_grid.portfolio_rows(), numpy_grid.portfolio_rows())
+
+    def test_property_without_rows_is_zero(self):
+        decimal_grid, numpy_grid = self._grids(self._rows(seed=7, count=50))
+        self.assertEqual(decimal_grid.property_rows(99), numpy_grid.property_rows(99))
+
+    def test_rows_added_after_reading_are_included(self):
+        decimal_grid, numpy_grid = self._grids(self._rows(seed=3, count=100))
+        numpy_grid.portfolio_rows()
+        for grid in (decimal_grid, numpy_grid):
+            grid.add('rent', 11, 6, Decimal('1234.56'))
+        self.assertEqual(decimal_grid.property_rows(11), numpy_grid.property_rows(11))
+        self.assertEqual(decimal_grid.portfolio_rows(), numpy_grid.portfolio_rows())
+
+    def test_sub_cent_amount_is_rejected(self):
+        self.assertEqual(to_cents(Decimal('10.05')), 1005)
+        with self.assertRaises(ValueError):
+            to_cents(Decimal('0.005'))
+
+
+INVALID_DOMAIN = '@invalid.test'
+
+
+class FakeSendGrid(BaseHTTPRequestHandler):
+    """POST /v3/mail/send stand-in: rejects @invalid.test recipients with a SendGrid-style 400."""
+
+    requests = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)))
+        FakeSendGrid.requests.append(body)
+        errors = [
+            {'field': f'personalizations.{i}.to.0.email', 'message': 'Does not contain a valid address.'}
+            for i, p in enumerate(body.get('personalizations', []))
+            if p['to'][0]['email'].endswith(INVALID_DOMAIN)
+        ]
+        if len(body.get('personalizations', [])) > MAX_PERSONALIZATIONS:
+            errors = [{'field': 'personalizations', 'message': 'Too many personalizations'}]
+        status = 400 if errors else 202
+        payload = json.dumps({'errors': errors}).encode() if errors else b''
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class SendGridBackendTests(SimpleTestCase):
+    """SendGridBackend against a local fake SendGrid API (no network, no database)."""
+
+    def setUp(self):
+        FakeSendGrid.requests = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeSendGrid)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def _send(self, messages):
+        host = f'http://127.0.0.1:{self.server.server_port}'
+        with override_settings(SENDGRID_API_KEY='SG.fake', SENDGRID_API_HOST=host):
+            return SendGridBackend(fail_silently=True).send_messages(messages)
+
+    def test_grouping_and_per_recipient_status(self):
+        shared = [
+            EmailMessage('Rent reminder', 'Your rent is due.', 'Neela <noreply@neela.test>', [f'tenant{i}@neela.test'])
+            for i in range(1500)
+        ]
+        bad = EmailMessage('Rent reminder', 'Your rent is due.', 'Neela <noreply@neela.test>', [f'nobody{INVALID_DOMAIN}'])
+        other = EmailMultiAlternatives('Invoice', 'See attached.', 'noreply@neela.test', ['a@neela.test', 'b@neela.test'])
+        other.attach_alternative('<p>See attached.</p>', 'text/html')
+        other.attach('invoice.txt', 'total: 100', 'text/plain')
+        messages = shared + [bad, other]
+
+        sent = self._send(messages)
+
+        self.assertEqual(sent, len(messages) - 1)
+        self.assertTrue(bad.sendgrid_status[f'nobody{INVALID_DOMAIN}'].startswith('failed'))
+        for message in shared + [other]:
+            self.assertEqual(set(message.sendgrid_status.values()), {'queued'})
+        sizes = [len(r['personalizations']) for r in FakeSendGrid.requests]
+        self.assertLessEqual(max(sizes), MAX_PERSONALIZATIONS)
+        # 1501 identical rent reminders need two requests; the invoice gets its own.
+        self.assertLess(len(FakeSendGrid.requests), 10)
+        self.assertTrue(any(r['subject'] == 'Invoice' and r.get('attachments') for r in FakeSendGrid.requests))
+
+    def test_no_messages_makes_no_requests(self):
+        self.assertEqual(self._send([]), 0)
+        self.assertEqual(FakeSendGrid.requests, [])
@@ -0,0 +1,67 @@
+"""
+Concurrent saves of request uploads to default_storage.
+
+Each Cloudinary upload is a blocking HTTPS round trip, so an application with
+several ID scans used to wait for them back to back. Files are read in the
+request thread (UploadedFile objects are not shared across threads) and the
+storage saves run on a small bounded pool; results keep the input order.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPLOAD_WORKERS = 4
+
+
+def _upload_workers():
+    return max(1, int(getattr(settings, 'UPLOAD_WORKERS', DEFAULT_UPLOAD_WORKERS)))
+
+
+def _save_one(name, content):
+    return default_storage.save(name, ContentFile(content))
+
+
+def save_uploads(uploads):
+    """
+    uploads: list of (storage_name, uploaded_file).
+    Returns file entries ({filename, path, size, uploaded_at}) in the same order.
+    Any failed save raises, as the serial loop did.
+    """
+    if not uploads:
+        return []
+    payloads = []
+    seen = set()
+    for name, file in uploads:
+        # Same-named files in one batch would race for get_available_name(); keep names distinct.
+        root, ext = os.path.splitext(name)
+        unique, n = name, 1
+        while unique in seen:
+            unique, n = f"{root}_{n}{ext}", n + 1
+        seen.add(unique)
+        payloads.append((unique, file, file.read()))
+
+    workers = min(_upload_workers(), len(payloads))
+    if workers == 1:
+        paths = [_save_one(name, content) for name, _file, content in payloads]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='upload') as executor:
+            paths = list(executor.map(lambda p: _save_one(p[0], p[2]), payloads))
+
+    uploaded_at = datetime.now().isoformat()
+    logger.info(f"Saved {len(paths)} uploads with {workers} worker(s)")
+    return [
+        {
+            'filename': file.name,
+            'path': path,
+            'size': file.size,
+            'uploaded_at': uploaded_at,
+        }
+        for (_name, file, _content), path in zip(payloads, paths)
+    ]
@@ -9,9 +9,11 @@ from .views import (
     EmailTestViewSet,
     contact_manager,
     sign_lease_by_token,
+    signed_document,
     manager_me,
     PropertyManagerViewSet,
     PropertyMonthInputViewSet,
+    ReportJobViewSet,
 )
 
 router = DefaultRouter()
@@ -29,10 +31,12 @@ router.register(r'short-stay-blocks', ShortStayBlockedDateViewSet, basename='sho
 router.register(r'email-test', EmailTestViewSet, basename='email-test')
 router.register(r'property-managers', PropertyManagerViewSet, basename='property-manager')
 router.register(r'property-month-inputs', PropertyMonthInputViewSet, basename='property-month-input')
+router.register(r'report-jobs', ReportJobViewSet, basename='report-job')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('manager/me/', manager_me, name='manager-me'),
     path('contact-manager/', contact_manager, name='contact-manager'),
     path('sign-lease/', sign_lease_by_token, name='sign-lease-by-token'),
+    path('documents/<str:token>/', signed_document, name='signed-document'),
 ]
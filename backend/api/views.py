@@ -4,7 +4,9 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from .models import *
 from .serializers import *
-from .lease_service import generate_lease_pdf, save_lease_document, stamp_signed_pdf
+from .lease_service import generate_lease_pdf, resolve_lease_template, save_lease_document
+from .lease_signing import SigningConflict, lease_pdf_version, queue_signed_lease
+from .email_outbox import enqueue_email
 from .email_service import *
 from accounts.user_service import *
 from django.utils import timezone
@@ -12,19 +14,13 @@ import time
 from django.conf import settings
 import logging
 from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib import colors
 from django.core.files.base import ContentFile
 from django.http import HttpResponse
-from django.http import FileResponse
-from django.core.files.storage import default_storage
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
 from django.db.models import Sum, Q
 from django.db.models.functions import ExtractMonth
 import re
-import cloudinary
 import mimetypes
 from decimal import Decimal
 from collections import defaultdict
@@ -33,9 +29,29 @@ from api.management.commands.import_properties import (
     extract_unit_from_address,
     strip_city_state_from_address,
 )
-import cloudinary.api
-import requests
-from .pnl_service import compute_property_pnl, excel_portfolio_property_ids, portfolio_parent_property_ids
+from .file_responses import ranged_file_response
+from .image_derivatives import schedule_derivatives
+from .pdf_renderer import render_lease, render_notice
+from .signature_layout import fields_for_document
+from .document_urls import (
+    DocumentUrlError,
+    DocumentUrlUnavailable,
+    booking_scope,
+    legal_document_scope,
+    mint_document_url,
+    open_document_source,
+    revoke_document_urls,
+    tenant_scope,
+    verify_document_token,
+)
+from .pnl_service import (
+    compute_property_pnl,
+    compute_property_pnl_range,
+    excel_portfolio_property_ids,
+    income_statement_properties,
+    income_statement_properties_by_year,
+    trailing_twelve_months,
+)
 from .permissions import (
     is_admin_user,
     is_property_manager,
@@ -54,100 +70,75 @@ from .permissions import (
     MANAGER_EDITABLE_PAYMENT_FIELDS,
 )
 from rest_framework.exceptions import PermissionDenied, ValidationError
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 
-def download_cloudinary_file(resource_path, resource_types=None, formats=None):
-    """
-    Download a file from Cloudinary using API authentication.
-    Handles authenticated delivery and returns file bytes.
-    
-    Args:
-        resource_path: The path/public_id of the file in Cloudinary
-    
-    Returns:
-        bytes: The file content, or None if failed
-    """
-    try:
-        # Remove leading slash and get clean path
-        clean_path = resource_path.lstrip('/').replace('\\', '/')
-        
-        # Keep the full path including extension
-        # (Our uploads include .pdf in the public_id)
-        public_id = clean_path
-        
-        logger.info(f"Attempting to download Cloudinary file: {public_id}")
-        
-        # Try different delivery types and methods
-        resource_types = resource_types or ['raw']
-        formats = formats or ['pdf']
-        delivery_types = ['upload', 'authenticated', 'private']
-        
-        for resource_type in resource_types:
-            for file_format in formats:
-                for delivery_type in delivery_types:
-                    try:
-                        # Method 1: Use Cloudinary's private_download_url with API key signing
-                        if hasattr(cloudinary.utils, 'private_download_url'):
-                            # private_download_url requires `format`; skip invalid entries.
-                            if not file_format:
-                                continue
-                            download_url = cloudinary.utils.private_download_url(
-                                public_id,
-                                format=file_format,
-                                resource_type=resource_type,
-                                type=delivery_type,
-                                attachment=False,
-                            )
-                            
-                            logger.info(
-                                f"Trying private download URL ({resource_type}/{file_format or 'auto'}/{delivery_type}): {download_url[:100]}..."
-                            )
-                            response = requests.get(download_url, timeout=30)
-                            
-                            if response.status_code == 200:
-                                logger.info(f"Successfully downloaded file using {resource_type}/{delivery_type}")
-                                return response.content
-                            else:
-                                logger.warning(f"Failed with {resource_type}/{delivery_type}: HTTP {response.status_code}")
-                                
-                    except Exception as e:
-                        logger.warning(f"Error with {resource_type}/{delivery_type}: {e}")
-                        continue
-        
-        # Method 2: Try using Cloudinary Admin API to get resource details
-        try:
-            logger.info("Attempting to fetch resource details via Admin API")
-            for resource_type in resource_types:
-                try:
-                    resource_info = cloudinary.api.resource(
-                        public_id,
-                        resource_type=resource_type,
-                        type='upload'
-                    )
-                except Exception:
-                    continue
+# Cap for /payments/income-statement-range/ (each year is a full P&L build).
+MAX_INCOME_STATEMENT_YEARS = 10
 
-                if 'secure_url' in resource_info:
-                    secure_url = resource_info['secure_url']
-                    logger.info(f"Got secure_url from Admin API ({resource_type}): {secure_url[:100]}...")
-                    response = requests.get(secure_url, timeout=30)
-                    
-                    if response.status_code == 200:
-                        logger.info("Successfully downloaded file using Admin API secure_url")
-                        return response.content
-                    else:
-                        logger.warning(f"Admin API secure_url failed: HTTP {response.status_code}")
-        except Exception as e:
-            logger.warning(f"Admin API method failed: {e}")
-        
-        logger.error(f"All download methods failed for: {public_id}")
-        return None
-        
-    except Exception as e:
-        logger.error(f"Error in download_cloudinary_file: {e}")
-        import traceback
-        traceback.print_exc()
+TENANT_DOCUMENT_FORMATS = ['pdf', 'jpg', 'jpeg', 'png', 'webp']
+
+
+def _normalize_upload_path(raw_path, expected_prefix):
+    """Storage path without a leading media/, or None when outside the owner's upload folder."""
+    normalized_path = (raw_path or '').strip().lstrip('/').replace('\\', '/')
+    normalized_no_media = re.sub(r'^media/', '', normalized_path, flags=re.IGNORECASE)
+    if not normalized_no_media.startswith(expected_prefix):
         return None
+    return normalized_no_media
+
+
+def _uploaded_document_filename(file_lists, normalized_no_media):
+    """Original upload filename (keeps the extension for downloads)."""
+    for arr in file_lists:
+        if not isinstance(arr, list):
+            continue
+        for doc in arr:
+            if not isinstance(doc, dict):
+                continue
+            doc_path = str(doc.get('path') or doc.get('file') or '').lstrip('/').replace('\\', '/')
+            doc_no_media = re.sub(r'^media/', '', doc_path, flags=re.IGNORECASE)
+            if doc_no_media == normalized_no_media and doc.get('filename'):
+                return str(doc.get('filename'))
+    return normalized_no_media.split('/')[-1]
+
+
+def _upload_sources(normalized_no_media, cloudinary_fallback=False):
+    """Storage candidates for an uploaded document (see document_urls.open_document_source)."""
+    sources = [['storage', normalized_no_media], ['storage', f"media/{normalized_no_media}"]]
+    if cloudinary_fallback:
+        # Cloudinary fallback for private/restricted assets.
+        sources.append(['cloudinary', f"media/{normalized_no_media}", ['image', 'raw'], TENANT_DOCUMENT_FORMATS])
+    return sources
+
+
+def _legal_pdf_sources(legal_doc):
+    public_id = (legal_doc.pdf_file.name or "").lstrip("/")
+    sources = []
+    if hasattr(settings, 'CLOUDINARY_STORAGE') and settings.CLOUDINARY_STORAGE.get('CLOUD_NAME'):
+        sources.append(['cloudinary', public_id, ['raw'], ['pdf'], lease_pdf_version(legal_doc)])
+    sources.append(['storage', legal_doc.pdf_file.name])
+    return sources
+
+
+def _signed_url_response(request, *, scope, sources, content_type, filename=None, disposition='inline'):
+    from datetime import datetime, timezone as dt_timezone
+
+    try:
+        url, expires_at = mint_document_url(
+            request,
+            scope=scope,
+            sources=sources,
+            content_type=content_type,
+            filename=filename,
+            disposition=disposition,
+            ttl=request.query_params.get('ttl'),
+        )
+    except DocumentUrlUnavailable as e:
+        return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return Response({
+        'url': url,
+        'expires_at': datetime.fromtimestamp(expires_at, tz=dt_timezone.utc).isoformat(),
+    })
 
 # ==================== Contact Manager (Email-only) ====================
 
@@ -235,29 +226,21 @@ class TenantViewSet(viewsets.ModelViewSet):
         instance.delete()
 
     def perform_create(self, serializer):
-        tenant = serializer.save()
-        
-        if tenant.status == 'Applicant':
-            try:
-                # Try async with Celery
-                task = send_application_notification_to_admin.delay(tenant.id)
-                logger.info(f"Email task submitted to Celery: {task.id}")
-            except Exception as e:
-                # Fallback to threading if Celery connection fails (non-blocking)
-                logger.warning(f"Celery connection failed, using threading fallback: {e}")
-                send_application_notification_to_admin(tenant.id)  # Will use threading internally
-            
-            # Send confirmation email to tenant
-            try:
-                task = send_application_received_email_to_tenant.delay(tenant.id)
-                logger.info(f"Application received email task submitted to Celery: {task.id}")
-            except Exception as e:
-                logger.warning(f"Celery connection failed, using threading fallback for tenant email: {e}")
-                send_application_received_email_to_tenant(tenant.id)
+        # Application emails go through the outbox, committed with the tenant row.
+        with transaction.atomic():
+            tenant = serializer.save()
+            if tenant.status == 'Applicant':
+                enqueue_email('send_application_notification_to_admin', tenant.id)
+                enqueue_email('send_application_received_email_to_tenant', tenant.id)
 
     
     def perform_update(self, serializer):
         """Override to handle status changes and send acceptance email."""
+        # Status emails go through the outbox, committed with the tenant update.
+        with transaction.atomic():
+            self._update_tenant(serializer)
+
+    def _update_tenant(self, serializer):
         old_instance = self.get_object()
         old_status = old_instance.status
         
@@ -271,12 +254,7 @@ class TenantViewSet(viewsets.ModelViewSet):
             
             # Send notification to Admin about the approval (only on first approval)
             if new_status == 'Approved':
-                try:
-                    task = send_application_approval_notification_to_admin.delay(tenant.id)
-                    logger.info(f"Admin approval notification task submitted to Celery: {task.id}")
-                except Exception as e:
-                    logger.warning(f"Celery connection failed for admin approval notification: {e}")
-                    send_application_approval_notification_to_admin(tenant.id)
+                enqueue_email('send_application_approval_notification_to_admin', tenant.id)
 
             # Create user account if it doesn't exist
             user, created = create_user_from_tenant(tenant)
@@ -301,23 +279,11 @@ class TenantViewSet(viewsets.ModelViewSet):
                 reset_url = get_password_reset_url(uidb64, token, frontend_url)
                 
                 # Send acceptance email with password reset link
-                try:
-                    # Try async with Celery
-                    task = send_acceptance_email_to_user.delay(tenant.id, token, reset_url)
-                    logger.info(f"Email task submitted to Celery: {task.id}")
-                except Exception as e:
-                    # Fallback to threading if Celery connection fails (non-blocking)
-                    logger.warning(f"Celery connection failed, using threading fallback: {e}")
-                    send_acceptance_email_to_user(tenant.id, token, reset_url)  # Will use threading internally
+                enqueue_email('send_acceptance_email_to_user', tenant.id, token, reset_url)
         
         # If status changed to 'Declined' or similar rejection status, send declined email
         if old_status == 'Applicant' and new_status in ['Declined', 'Rejected', 'Denied']:
-            try:
-                task = send_application_declined_email_to_user.delay(tenant.id)
-                logger.info(f"Application declined email task submitted to Celery: {task.id}")
-            except Exception as e:
-                logger.warning(f"Celery connection failed, using threading fallback for declined email: {e}")
-                send_application_declined_email_to_user(tenant.id)
+            enqueue_email('send_application_declined_email_to_user', tenant.id)
 
     def partial_update(self, request, *args, **kwargs):
         if is_property_manager(request.user):
@@ -449,63 +415,61 @@ class TenantViewSet(viewsets.ModelViewSet):
         if not raw_path:
             return Response({'error': 'path is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        normalized_path = raw_path.lstrip('/').replace('\\', '/')
-        normalized_no_media = re.sub(r'^media/', '', normalized_path, flags=re.IGNORECASE)
-
-        expected_prefix = f'applications/tenant_{tenant.id}/'
-        if not normalized_no_media.startswith(expected_prefix):
+        normalized_no_media = _normalize_upload_path(raw_path, f'applications/tenant_{tenant.id}/')
+        if normalized_no_media is None:
             return Response({'error': 'Invalid document path'}, status=status.HTTP_403_FORBIDDEN)
 
-        # Resolve original uploaded filename (keeps extension for downloads).
-        original_filename = request.query_params.get('filename')
-        if not original_filename:
-            all_docs = []
-            for arr in [tenant.photo_id_files or [], tenant.income_verification_files or [], tenant.background_check_files or []]:
-                if isinstance(arr, list):
-                    all_docs.extend([x for x in arr if isinstance(x, dict)])
-            for doc in all_docs:
-                doc_path = str(doc.get('path') or doc.get('file') or '').lstrip('/').replace('\\', '/')
-                doc_no_media = re.sub(r'^media/', '', doc_path, flags=re.IGNORECASE)
-                if doc_no_media == normalized_no_media and doc.get('filename'):
-                    original_filename = str(doc.get('filename'))
-                    break
-        if not original_filename:
-            original_filename = normalized_no_media.split('/')[-1]
-
-        candidate_paths = [normalized_no_media, f"media/{normalized_no_media}"]
-        file_handle = None
-        try:
-            for candidate in candidate_paths:
-                try:
-                    file_handle = default_storage.open(candidate, 'rb')
-                    normalized_no_media = candidate
-                    break
-                except Exception:
-                    continue
-        except Exception:
-            file_handle = None
+        original_filename = request.query_params.get('filename') or _uploaded_document_filename(
+            [tenant.photo_id_files or [], tenant.income_verification_files or [], tenant.background_check_files or []],
+            normalized_no_media,
+        )
 
-        # Cloudinary fallback for private/restricted assets.
+        file_handle, source_name = open_document_source(
+            _upload_sources(normalized_no_media, cloudinary_fallback=True)
+        )
         if file_handle is None:
-            cloudinary_path = f"media/{re.sub(r'^media/', '', normalized_no_media, flags=re.IGNORECASE)}"
-            file_bytes = download_cloudinary_file(
-                cloudinary_path,
-                resource_types=['image', 'raw'],
-                formats=['pdf', 'jpg', 'jpeg', 'png', 'webp'],
-            )
-            if not file_bytes:
-                return Response({'error': 'Document not found'}, status=status.HTTP_404_NOT_FOUND)
-            content_type, _ = mimetypes.guess_type(original_filename)
-            response = HttpResponse(file_bytes, content_type=content_type or 'application/octet-stream')
-            if request.query_params.get('download') == '1':
-                response['Content-Disposition'] = f'attachment; filename="{original_filename}"'
-            return response
+            return Response({'error': 'Document not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        content_type, _ = mimetypes.guess_type(original_filename)
+        download = request.query_params.get('download') == '1'
+        return ranged_file_response(
+            request,
+            file_handle,
+            content_type=content_type or 'application/octet-stream',
+            etag_source=source_name,
+            filename=original_filename if download else None,
+            disposition='attachment',
+        )
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated], url_path='document-url')
+    def document_url(self, request, pk=None):
+        """
+        Mint a short-lived signed URL for a tenant document (same checks as /document/).
+        GET /api/tenants/{id}/document-url/?path=...&download=1&ttl=300
+        """
+        tenant = self.get_object()
+        raw_path = (request.query_params.get('path') or '').strip()
+        if not raw_path:
+            return Response({'error': 'path is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        normalized_no_media = _normalize_upload_path(raw_path, f'applications/tenant_{tenant.id}/')
+        if normalized_no_media is None:
+            return Response({'error': 'Invalid document path'}, status=status.HTTP_403_FORBIDDEN)
 
+        original_filename = request.query_params.get('filename') or _uploaded_document_filename(
+            [tenant.photo_id_files or [], tenant.income_verification_files or [], tenant.background_check_files or []],
+            normalized_no_media,
+        )
         content_type, _ = mimetypes.guess_type(original_filename)
-        response = FileResponse(file_handle, content_type=content_type or 'application/octet-stream')
-        if request.query_params.get('download') == '1':
-            response['Content-Disposition'] = f'attachment; filename="{original_filename}"'
-        return response
+        download = request.query_params.get('download') == '1'
+        return _signed_url_response(
+            request,
+            scope=tenant_scope(tenant.id),
+            sources=_upload_sources(normalized_no_media, cloudinary_fallback=True),
+            content_type=content_type or 'application/octet-stream',
+            filename=original_filename if download else None,
+            disposition='attachment',
+        )
 
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated], url_path='send-rent-notice')
     def send_rent_notice(self, request, pk=None):
@@ -611,49 +575,17 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 data['proof_of_payment_files_upload'] = proof_files
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
-        payment = serializer.save()
-        invoice_email_sent = False
-
-        # Send invoice email to tenant (same pattern as Legal & Compliance)
-        try:
-            try:
-                send_payment_invoice_to_tenant.delay(payment.id)
-                logger.info(f"Queued invoice email to tenant {payment.tenant.email if payment.tenant else 'unknown'} for payment {payment.id}")
-                invoice_email_sent = True
-            except Exception:
-                # Celery not available or misconfigured; run inline
-                send_payment_invoice_to_tenant(payment.id)
-                logger.info(f"Sent invoice email inline to tenant {payment.tenant.email if payment.tenant else 'unknown'} for payment {payment.id}")
-                invoice_email_sent = True
-        except Exception as e:
-            logger.error(f"Failed to send invoice email: {e}")
-            # Don't fail the whole request if email fails
-
-        # Send confirmation email if payment method is provided
-        if payment.method:
-            try:
-                try:
-                    send_payment_confirmation_to_tenant.delay(payment.id)
-                    logger.info(f"Queued confirmation email to tenant {payment.tenant.email if payment.tenant else 'unknown'} for payment {payment.id}")
-                except Exception:
-                    # Celery not available or misconfigured; run inline
-                    send_payment_confirmation_to_tenant(payment.id)
-                    logger.info(f"Sent confirmation email inline to tenant {payment.tenant.email if payment.tenant else 'unknown'} for payment {payment.id}")
-            except Exception as e:
-                logger.error(f"Failed to send confirmation email: {e}")
-                # Don't fail the whole request if email fails
-
-        # Send admin notification when tenant uploads proof of payment
-        if payment.proof_of_payment_files and len(payment.proof_of_payment_files) > 0:
-            try:
-                try:
-                    send_proof_of_payment_notification_to_admin.delay(payment.id)
-                    logger.info(f"Queued proof-of-payment admin notification for payment {payment.id}")
-                except Exception:
-                    send_proof_of_payment_notification_to_admin(payment.id)
-                    logger.info(f"Sent proof-of-payment admin notification inline for payment {payment.id}")
-            except Exception as e:
-                logger.error(f"Failed to send proof-of-payment admin notification: {e}")
+        # Invoice, confirmation and proof-of-payment emails are written to the outbox in the
+        # payment's transaction and sent by the drainer (retried if the backend is down).
+        with transaction.atomic():
+            payment = serializer.save()
+            enqueue_email('send_payment_invoice_to_tenant', payment.id)
+            if payment.method:
+                enqueue_email('send_payment_confirmation_to_tenant', payment.id)
+            if payment.proof_of_payment_files and len(payment.proof_of_payment_files) > 0:
+                enqueue_email('send_proof_of_payment_notification_to_admin', payment.id)
+        invoice_email_sent = True
+        logger.info(f"Queued payment emails for payment {payment.id} in the outbox")
 
         response_data = dict(serializer.data)
         response_data['invoice_email_sent'] = invoice_email_sent
@@ -672,17 +604,13 @@ class PaymentViewSet(viewsets.ModelViewSet):
         old_instance = self.get_object()
         old_status = old_instance.status
         
-        payment = serializer.save()
-        new_status = payment.status
-        
-        # If status changed to 'Paid', send receipt email
-        if old_status != 'Paid' and new_status == 'Paid':
-            try:
-                task = send_payment_receipt_to_tenant.delay(payment.id)
-                logger.info(f"Payment receipt task submitted to Celery: {task.id}")
-            except Exception as e:
-                logger.warning(f"Celery connection failed, using threading fallback for payment receipt: {e}")
-                send_payment_receipt_to_tenant(payment.id)
+        with transaction.atomic():
+            payment = serializer.save()
+            new_status = payment.status
+            
+            # If status changed to 'Paid', send receipt email
+            if old_status != 'Paid' and new_status == 'Paid':
+                enqueue_email('send_payment_receipt_to_tenant', payment.id)
     
     def perform_destroy(self, instance):
         self._deny_manager_write()
@@ -695,17 +623,11 @@ class PaymentViewSet(viewsets.ModelViewSet):
         payment = self.get_object()
         receipt_email_sent = False
         try:
-            try:
-                send_payment_receipt_to_tenant.delay(payment.id)
-                logger.info(f"Queued receipt email to tenant {payment.tenant.email if payment.tenant else 'unknown'} for payment {payment.id}")
-                receipt_email_sent = True
-            except Exception:
-                # Celery not available or misconfigured; run inline
-                send_payment_receipt_to_tenant(payment.id)
-                logger.info(f"Sent receipt email inline to tenant {payment.tenant.email if payment.tenant else 'unknown'} for payment {payment.id}")
-                receipt_email_sent = True
+            enqueue_email('send_payment_receipt_to_tenant', payment.id)
+            logger.info(f"Queued receipt email to tenant {payment.tenant.email if payment.tenant else 'unknown'} for payment {payment.id}")
+            receipt_email_sent = True
         except Exception as e:
-            logger.error(f"Failed to send receipt email: {e}")
+            logger.error(f"Failed to queue receipt email: {e}")
         return Response({
             'status': 'success',
             'message': f'Receipt email sent to {payment.tenant.name}' if receipt_email_sent else 'Receipt email could not be sent.',
@@ -723,14 +645,10 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
         reminder_email_sent = False
         try:
-            try:
-                send_payment_reminder_to_tenant.delay(payment.id)
-                reminder_email_sent = True
-            except Exception:
-                send_payment_reminder_to_tenant(payment.id)
-                reminder_email_sent = True
+            enqueue_email('send_payment_reminder_to_tenant', payment.id)
+            reminder_email_sent = True
         except Exception as e:
-            logger.error(f'Failed to send payment reminder: {e}')
+            logger.error(f'Failed to queue payment reminder: {e}')
 
         return Response({
             'status': 'success' if reminder_email_sent else 'error',
@@ -759,19 +677,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
         admin_view = is_admin_user(request.user)
         summary_only = request.query_params.get('summary') in ('1', 'true', 'yes')
-        properties_qs = filter_properties_for_user(
-            Property.objects.select_related('financials').prefetch_related('property_units'),
-            request.user,
-        )
-        properties = list(properties_qs)
-
-        # Filter to Excel / portfolio parents in-memory (avoid extra Neon round-trips).
-        if admin_view:
-            excel_ids = excel_portfolio_property_ids(year)
-            portfolio_ids = portfolio_parent_property_ids(properties)
-            keep_ids = excel_ids | portfolio_ids if (excel_ids or portfolio_ids) else None
-            if keep_ids:
-                properties = [p for p in properties if p.id in keep_ids]
+        properties = income_statement_properties(request.user, excel_portfolio_property_ids(year) if admin_view else None)
 
         data = compute_property_pnl(
             year=year,
@@ -782,6 +688,97 @@ class PaymentViewSet(viewsets.ModelViewSet):
         )
         return Response(data)
 
+    def _requested_years(self, request):
+        """(years, None) from ?year= or ?from=&to=, else (None, error Response)."""
+        today = timezone.now().date()
+        params = request.query_params
+        try:
+            to_year = int(params.get('to') or params.get('year') or today.year)
+            from_year = int(params.get('from') or to_year)
+        except (TypeError, ValueError):
+            return None, Response({'error': 'Invalid year range'}, status=status.HTTP_400_BAD_REQUEST)
+        if from_year > to_year:
+            return None, Response({'error': '"from" must not be after "to"'}, status=status.HTTP_400_BAD_REQUEST)
+        if to_year - from_year >= MAX_INCOME_STATEMENT_YEARS:
+            return None, Response(
+                {'error': f'Range is limited to {MAX_INCOME_STATEMENT_YEARS} years'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return list(range(from_year, to_year + 1)), None
+
+    @action(detail=False, methods=['get'], url_path='income-statement-range')
+    def income_statement_range(self, request):
+        """
+        Multi-year P&L in one request: ?from=2024&to=2026, or ?trailing=12 for the
+        last twelve months. Years share one prefetch instead of N income-statement calls.
+        """
+        if is_property_manager(request.user):
+            return Response(
+                {'error': 'Income statement is available to admin only. Property managers use the Expenses tab.'},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        today = timezone.now().date()
+        trailing = request.query_params.get('trailing') in ('12', '1', 'true', 'yes')
+        if trailing:
+            years = [today.year - 1, today.year] if today.month < 12 else [today.year]
+        else:
+            years, error = self._requested_years(request)
+            if error:
+                return error
+        from_year, to_year = years[0], years[-1]
+
+        admin_view = is_admin_user(request.user)
+        summary_only = not trailing and request.query_params.get('summary') in ('1', 'true', 'yes')
+        payloads = compute_property_pnl_range(
+            years=years,
+            properties_by_year=income_statement_properties_by_year(request.user, years, admin_view),
+            admin_view=admin_view,
+            request=request,
+            summary_only=summary_only,
+        )
+        data = {
+            'from': from_year,
+            'to': to_year,
+            'is_admin_view': admin_view,
+            'years': payloads,
+        }
+        if trailing:
+            data['trailing_12'] = trailing_twelve_months(payloads, today.year, today.month)
+        return Response(data)
+
+    @action(detail=False, methods=['get'], url_path='income-statement-export')
+    def income_statement_export(self, request):
+        """
+        Download the P&L as CSV (streamed) or XLSX (By Property / By Unit / Monthly sheets).
+        ?file_type=csv|xlsx plus ?year= or ?from=&to=.
+        """
+        from .pnl_export import build_xlsx, export_payloads, iter_csv
+
+        if not is_admin_user(request.user):
+            return Response({'error': 'Income statement export is available to admin only.'}, status=status.HTTP_403_FORBIDDEN)
+        file_type = (request.query_params.get('file_type') or 'csv').lower()
+        if file_type not in ('csv', 'xlsx'):
+            return Response({'error': 'file_type must be csv or xlsx'}, status=status.HTTP_400_BAD_REQUEST)
+        years, error = self._requested_years(request)
+        if error:
+            return error
+
+        properties_by_year = income_statement_properties_by_year(request.user, years, admin_view=True)
+        payloads = export_payloads(years=years, properties_by_year=properties_by_year, admin_view=True, request=request)
+
+        span = f"{years[0]}" if len(years) == 1 else f"{years[0]}-{years[-1]}"
+        if file_type == 'csv':
+            response = StreamingHttpResponse(iter_csv(payloads), content_type='text/csv')
+            response['Content-Disposition'] = f'attachment; filename="income_statement_{span}.csv"'
+            return response
+
+        return FileResponse(
+            build_xlsx(payloads),
+            as_attachment=True,
+            filename=f"income_statement_{span}.xlsx",
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+
 
 class OperatingExpenseViewSet(viewsets.ModelViewSet):
     serializer_class = OperatingExpenseSerializer
@@ -1114,6 +1111,66 @@ class PropertyMonthInputViewSet(viewsets.ModelViewSet):
         )
 
 
+class ReportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Queue heavy P&L reports and poll for the result.
+    POST {kind, params} → job id; GET /<id>/ → status; GET /<id>/result/ → JSON or file.
+    """
+    serializer_class = ReportJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        qs = ReportJob.objects.defer('result', 'result_file')
+        if is_admin_user(self.request.user):
+            return qs
+        return qs.filter(requested_by=self.request.user)
+
+    def create(self, request):
+        from .report_jobs import PNL_REPORT_KINDS, enqueue_report_job
+
+        if is_property_manager(request.user):
+            return Response(
+                {'error': 'Income statement is available to admin only. Property managers use the Expenses tab.'},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        kind = request.data.get('kind')
+        if kind not in PNL_REPORT_KINDS:
+            return Response({'error': f"kind must be one of: {', '.join(PNL_REPORT_KINDS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        if kind == 'income_statement_export' and not is_admin_user(request.user):
+            return Response({'error': 'Income statement export is available to admin only.'}, status=status.HTTP_403_FORBIDDEN)
+
+        raw = request.data.get('params') or {}
+        try:
+            to_year = int(raw.get('to') or raw.get('year') or timezone.now().year)
+            from_year = int(raw.get('from') or to_year)
+        except (TypeError, ValueError, AttributeError):
+            return Response({'error': 'Invalid year range'}, status=status.HTTP_400_BAD_REQUEST)
+        if from_year > to_year or to_year - from_year >= MAX_INCOME_STATEMENT_YEARS:
+            return Response({'error': 'Invalid year range'}, status=status.HTTP_400_BAD_REQUEST)
+        params = {'from': from_year, 'to': to_year}
+        if kind == 'income_statement':
+            params['summary'] = bool(raw.get('summary'))
+        else:
+            params['file_type'] = 'xlsx' if raw.get('file_type') == 'xlsx' else 'csv'
+
+        job = enqueue_report_job(kind=kind, params=params, user=request.user)
+        return Response(ReportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'], url_path='result')
+    def result(self, request, pk=None):
+        job = self.get_object()
+        if job.status != 'ready':
+            return Response(ReportJobSerializer(job).data, status=status.HTTP_409_CONFLICT)
+        if job.is_expired:
+            return Response({'error': 'Report result has expired'}, status=status.HTTP_410_GONE)
+        job = ReportJob.objects.get(pk=job.pk)
+        if job.result_filename:
+            response = HttpResponse(bytes(job.result_file), content_type=job.result_content_type)
+            response['Content-Disposition'] = f'attachment; filename="{job.result_filename}"'
+            return response
+        return Response(job.result)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def manager_me(request):
@@ -1166,26 +1223,18 @@ class MaintenanceRequestViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         """Override to send email notifications when maintenance request is created."""
-        maintenance_request = serializer.save()
-        
-        # Send email notification to 
-        try:
-            task = send_maintenance_ticket_notification_to_manager.delay(maintenance_request.id)
-            logger.info(f"Maintenance ticket notification task submitted to Celery: {task.id}")
-        except Exception as e:
-            logger.warning(f"Celery connection failed, using threading fallback for maintenance notification: {e}")
-            send_maintenance_ticket_notification_to_manager(maintenance_request.id)
-        
-        # Send confirmation email to tenant
-        try:
-            task = send_maintenance_ticket_confirmation_to_tenant.delay(maintenance_request.id)
-            logger.info(f"Maintenance ticket confirmation task submitted to Celery: {task.id}")
-        except Exception as e:
-            logger.warning(f"Celery connection failed, using threading fallback for maintenance confirmation: {e}")
-            send_maintenance_ticket_confirmation_to_tenant(maintenance_request.id)
+        # Manager notification and tenant confirmation are committed with the ticket.
+        with transaction.atomic():
+            maintenance_request = serializer.save()
+            enqueue_email('send_maintenance_ticket_notification_to_manager', maintenance_request.id)
+            enqueue_email('send_maintenance_ticket_confirmation_to_tenant', maintenance_request.id)
     
     def perform_update(self, serializer):
         """Override to handle status changes and comments, sending appropriate emails."""
+        with transaction.atomic():
+            self._update_maintenance_request(serializer)
+
+    def _update_maintenance_request(self, serializer):
         old_instance = self.get_object()
         old_status = old_instance.status
         old_updates = old_instance.updates or []
@@ -1203,14 +1252,10 @@ class MaintenanceRequestViewSet(viewsets.ModelViewSet):
                 if latest_update and isinstance(latest_update, dict):
                     update_message = latest_update.get('message', '')
             
-            try:
-                task = send_maintenance_status_update_to_tenant.delay(
-                    maintenance_request.id, old_status, new_status, update_message
-                )
-                logger.info(f"Maintenance status update task submitted to Celery: {task.id}")
-            except Exception as e:
-                logger.warning(f"Celery connection failed, using threading fallback for status update: {e}")
-                send_maintenance_status_update_to_tenant(maintenance_request.id, old_status, new_status, update_message)
+            enqueue_email(
+                'send_maintenance_status_update_to_tenant',
+                maintenance_request.id, old_status, new_status, update_message,
+            )
         
         # Detect new comments (new items in updates array)
         if len(new_updates) > len(old_updates):
@@ -1223,16 +1268,10 @@ class MaintenanceRequestViewSet(viewsets.ModelViewSet):
                     comment_date = comment.get('date', '')
                     
                     if comment_message:  # Only send if there's actual message content
-                        try:
-                            task = send_maintenance_comment_notification_to_tenant.delay(
-                                maintenance_request.id, comment_author, comment_message, comment_date
-                            )
-                            logger.info(f"Maintenance comment notification task submitted to Celery: {task.id}")
-                        except Exception as e:
-                            logger.warning(f"Celery connection failed, using threading fallback for comment notification: {e}")
-                            send_maintenance_comment_notification_to_tenant(
-                                maintenance_request.id, comment_author, comment_message, comment_date
-                            )
+                        enqueue_email(
+                            'send_maintenance_comment_notification_to_tenant',
+                            maintenance_request.id, comment_author, comment_message, comment_date,
+                        )
 
 def generate_notice_content(tenant, notice_type):
     """Generate notice content with tenant details auto-populated."""
@@ -1377,59 +1416,29 @@ def _create_and_send_notice(tenant, notice_type):
     import base64
 
     notice_content = generate_notice_content(tenant, notice_type)
-
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        rightMargin=72,
-        leftMargin=72,
-        topMargin=72,
-        bottomMargin=18,
-    )
-    elements = []
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor=colors.HexColor('#1e293b'),
-        spaceAfter=30,
-        alignment=1,
-    )
-    elements.append(Paragraph(notice_type.upper(), title_style))
-    elements.append(Spacer(1, 0.3 * inch))
-
-    for para in notice_content.split('\n\n'):
-        if para.strip():
-            elements.append(Paragraph(para.strip().replace('\n', '<br/>'), styles['Normal']))
-            elements.append(Spacer(1, 0.15 * inch))
-
-    doc.build(elements)
-    buffer.seek(0)
+    pdf_bytes = render_notice(notice_type, notice_content)
 
     filename = f'notice_{tenant.id}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-    legal_doc = LegalDocument.objects.create(
-        tenant=tenant,
-        type=notice_type,
-        generated_content=notice_content,
-        status='Sent',
-        delivery_method='Email',
-    )
-    legal_doc.pdf_file.save(filename, ContentFile(buffer.getvalue()))
-    legal_doc.save()
-
     notice_email_sent = False
-    try:
-        pdf_bytes_b64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+    with transaction.atomic():
+        legal_doc = LegalDocument.objects.create(
+            tenant=tenant,
+            type=notice_type,
+            generated_content=notice_content,
+            status='Sent',
+            delivery_method='Email',
+        )
+        legal_doc.pdf_file.save(filename, ContentFile(pdf_bytes))
+        legal_doc.save()
+
         try:
-            send_notice_to_tenant.delay(legal_doc.id, pdf_bytes_b64=pdf_bytes_b64)
-            notice_email_sent = True
-        except Exception:
-            send_notice_to_tenant(legal_doc.id, pdf_bytes_b64=pdf_bytes_b64)
+            # Pass PDF bytes directly to avoid fetching from remote storage (Cloudinary may require auth)
+            pdf_bytes_b64 = base64.b64encode(pdf_bytes).decode('utf-8')
+            enqueue_email('send_notice_to_tenant', legal_doc.id, pdf_bytes_b64=pdf_bytes_b64)
+            logger.info(f"Queued notice email to tenant {tenant.email} for document {legal_doc.id}")
             notice_email_sent = True
-    except Exception as e:
-        logger.error(f'Failed to send notice email: {e}')
+        except Exception as e:
+            logger.error(f'Failed to queue notice email: {e}')
 
     return legal_doc, notice_email_sent
 
@@ -1486,94 +1495,8 @@ class LegalDocumentViewSet(viewsets.ModelViewSet):
         request_obj = request._request if hasattr(request, '_request') else request
         pdf_proxy_url = request_obj.build_absolute_uri(f"/api/legal-documents/{legal_doc.id}/pdf/")
 
-        # For now we expose a conservative, static field map for Lease Agreement.
-        # These normalized coordinates are easy for the frontend to adapt and we can
-        # evolve them later (e.g. store per-template configuration in DB).
-        fields = []
-        if (legal_doc.type or '').lower() == 'lease agreement':
-            fields = [
-                # Agreement checkboxes (tenant ticks to confirm)
-                {
-                    "id": "agree_terms",
-                    "type": "checkbox",
-                    "label": "I agree to the terms",
-                    "page": 1,
-                    "x": 0.12,
-                    "y": 0.72,
-                    "width": 0.04,
-                    "height": 0.04,
-                    "required": True,
-                },
-                {
-                    "id": "agree_rules",
-                    "type": "checkbox",
-                    "label": "I agree to community rules",
-                    "page": 1,
-                    "x": 0.12,
-                    "y": 0.76,
-                    "width": 0.04,
-                    "height": 0.04,
-                    "required": True,
-                },
-                # Tenant initials (short text)
-                {
-                    "id": "tenant_initials",
-                    "type": "text",
-                    "label": "Initials",
-                    "page": 1,
-                    "x": 0.55,
-                    "y": 0.72,
-                    "width": 0.12,
-                    "height": 0.04,
-                    "required": True,
-                },
-                # Tenant signature block
-                {
-                    "id": "tenant_signature",
-                    "type": "signature",
-                    "label": "Tenant Signature",
-                    "page": 1,
-                    "x": 0.12,
-                    "y": 0.82,
-                    "width": 0.35,
-                    "height": 0.07,
-                    "required": True,
-                },
-                {
-                    "id": "tenant_signature_date",
-                    "type": "text",
-                    "label": "Date",
-                    "page": 1,
-                    "x": 0.52,
-                    "y": 0.82,
-                    "width": 0.15,
-                    "height": 0.05,
-                    "required": True,
-                },
-                # Landlord signature block
-                {
-                    "id": "landlord_signature",
-                    "type": "signature",
-                    "label": "Landlord Signature",
-                    "page": 1,
-                    "x": 0.12,
-                    "y": 0.9,
-                    "width": 0.35,
-                    "height": 0.07,
-                    "required": False,
-                },
-                {
-                    "id": "landlord_signature_date",
-                    "type": "text",
-                    "label": "Date",
-                    "page": 1,
-                    "x": 0.52,
-                    "y": 0.9,
-                    "width": 0.15,
-                    "height": 0.05,
-                    "required": False,
-                },
-            ]
+        # Field layout scanned from this document's PDF (normalized coordinates, see signature_layout.py).
+        fields = fields_for_document(legal_doc)
 
         return Response(
             {
@@ -1590,9 +1513,11 @@ class LegalDocumentViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], url_path='submit_signed', permission_classes=[AllowAny])
     def submit_signed(self, request, pk=None):
         """
-        Submit filled form values and field definitions; stamp them onto the PDF,
-        store the signed PDF, and record audit info.
-        Body: { "values": { field_id: value }, "fields": [ { id, type, page, x, y, width, height }, ... ] }
+        Submit filled form values and field definitions and record audit info.
+        Stamping and storing the signed PDF run on the PDF worker queue; the response
+        is 202 with status 'Signing' until the signed copy is published.
+        Body: { "values": { field_id: value } }; leases stamp at the template's field layout,
+        other documents also send "fields": [ { id, type, page, x, y, width, height }, ... ]
         """
         try:
             legal_doc = self.get_object()
@@ -1608,33 +1533,13 @@ class LegalDocumentViewSet(viewsets.ModelViewSet):
             return Response({'error': 'No PDF file available'}, status=status.HTTP_400_BAD_REQUEST)
 
         values = request.data.get('values')
-        fields = request.data.get('fields')
+        # Stamp at the registered layout; client-sent fields only for documents without one.
+        fields = fields_for_document(legal_doc) or request.data.get('fields')
         if not isinstance(values, dict):
             return Response({'error': 'values must be an object'}, status=status.HTTP_400_BAD_REQUEST)
         if not isinstance(fields, list):
             return Response({'error': 'fields must be an array'}, status=status.HTTP_400_BAD_REQUEST)
 
-        pdf_bytes = None
-        if hasattr(settings, 'CLOUDINARY_STORAGE') and settings.CLOUDINARY_STORAGE.get('CLOUD_NAME'):
-            public_id = (legal_doc.pdf_file.name or '').lstrip('/')
-            pdf_bytes = download_cloudinary_file(public_id)
-        if not pdf_bytes:
-            try:
-                legal_doc.pdf_file.open('rb')
-                pdf_bytes = legal_doc.pdf_file.read()
-                legal_doc.pdf_file.close()
-            except Exception as e:
-                logger.warning(f"Could not read PDF file from storage: {e}")
-        if not pdf_bytes:
-            return Response({'error': 'Could not retrieve PDF'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        try:
-            signed_pdf_bytes = stamp_signed_pdf(pdf_bytes, fields, values)
-        except Exception as e:
-            logger.error(f"Error stamping PDF: {e}", exc_info=True)
-            return Response({'error': f'Failed to stamp PDF: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        filename = f"signed_lease_{legal_doc.tenant_id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         request_obj = request._request if hasattr(request, '_request') else request
         audit = {
             'signed_at': timezone.now().isoformat(),
@@ -1642,63 +1547,23 @@ class LegalDocumentViewSet(viewsets.ModelViewSet):
             'ip': request_obj.META.get('REMOTE_ADDR'),
             'user_agent': (request_obj.META.get('HTTP_USER_AGENT') or '')[:500],
         }
-
-        if hasattr(settings, 'CLOUDINARY_STORAGE') and settings.CLOUDINARY_STORAGE.get('CLOUD_NAME'):
-            try:
-                import cloudinary.uploader
-                if not cloudinary.config().api_secret:
-                    cloudinary.config(
-                        cloud_name=settings.CLOUDINARY_STORAGE['CLOUD_NAME'],
-                        api_key=settings.CLOUDINARY_STORAGE['API_KEY'],
-                        api_secret=settings.CLOUDINARY_STORAGE['API_SECRET'],
-                    )
-                public_id_new = f"media/signed_leases/{filename}"
-                if public_id_new.lower().endswith('.pdf'):
-                    public_id_new = public_id_new[:-4]
-                upload_result = cloudinary.uploader.upload(
-                    signed_pdf_bytes,
-                    resource_type="raw",
-                    public_id=public_id_new,
-                    type="upload",
-                    format="pdf",
-                )
-                legal_doc.pdf_file.name = upload_result.get('public_id') or public_id_new
-            except Exception as e:
-                logger.error(f"Cloudinary upload failed for signed PDF: {e}")
-                legal_doc.pdf_file.save(filename, ContentFile(signed_pdf_bytes), save=False)
-        else:
-            legal_doc.pdf_file.save(filename, ContentFile(signed_pdf_bytes), save=False)
-
-        legal_doc.status = 'Signed'
-        legal_doc.signed_at = timezone.now()
-        legal_doc.signing_audit = audit
-        legal_doc.save()
-
-        tenant = legal_doc.tenant
-        tenant.lease_status = 'Signed'
-        # Auto-activate resident once signing is completed (tenant-only or tenant+landlord flow).
-        if tenant.status != 'Active':
-            tenant.status = 'Active'
-            tenant.save(update_fields=['lease_status', 'status'])
-        else:
-            tenant.save(update_fields=['lease_status'])
-
-        # Send confirmation emails to tenant and admin
+        # Stamping runs on the PDF worker; the document reads 'Signing' until it is published.
         try:
-            from .email_service import send_lease_signed_confirmation
-            try:
-                send_lease_signed_confirmation.delay(legal_doc.id)
-            except Exception:
-                send_lease_signed_confirmation(legal_doc.id)
-        except Exception as e:
-            logger.error(f"Failed to send signed confirmation email: {e}")
+            legal_doc = queue_signed_lease(legal_doc, values=values, fields=fields, audit=audit)
+        except SigningConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
 
         pdf_url = request_obj.build_absolute_uri(f"/api/legal-documents/{legal_doc.id}/pdf/")
         serializer = self.get_serializer(legal_doc)
         data = dict(serializer.data)
         data['pdf_url'] = pdf_url
         data['signed_at'] = legal_doc.signed_at.isoformat() if legal_doc.signed_at else None
-        return Response(data, status=status.HTTP_200_OK)
+        data['stamp_status'] = (legal_doc.signing_audit or {}).get('stamp', {}).get('status')
+        if legal_doc.status == 'Signed':
+            return Response(data, status=status.HTTP_200_OK)
+        if data['stamp_status'] == 'failed':
+            return Response({'error': 'Failed to stamp PDF', **data}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(data, status=status.HTTP_202_ACCEPTED)
 
     @action(detail=False, methods=['post'])
     def generate_lease(self, request):
@@ -1733,39 +1598,17 @@ class LegalDocumentViewSet(viewsets.ModelViewSet):
         
         try:
             # Generate PDF - use custom content if provided, otherwise generate from template
-            if custom_content:                
-                buffer = BytesIO()
-                doc = SimpleDocTemplate(buffer, pagesize=letter,
-                                       rightMargin=72, leftMargin=72,
-                                       topMargin=72, bottomMargin=18)
-                elements = []
-                styles = getSampleStyleSheet()
-                title_style = ParagraphStyle(
-                    'CustomTitle',
-                    parent=styles['Heading1'],
-                    fontSize=16,
-                    textColor=colors.HexColor('#1e293b'),
-                    spaceAfter=30,
-                    alignment=1,
-                )
-                elements.append(Paragraph("RESIDENTIAL LEASE AGREEMENT", title_style))
-                elements.append(Spacer(1, 0.2*inch))
-                paragraphs = custom_content.split('\n\n')
-                for para in paragraphs:
-                    if para.strip():
-                        para = para.strip().replace('\n', '<br/>')
-                        elements.append(Paragraph(para, styles['Normal']))
-                        elements.append(Spacer(1, 0.1*inch))
-                doc.build(elements)
-                buffer.seek(0)
+            if custom_content:
+                pdf_buffer = BytesIO(render_lease(custom_content))
                 filled_content = custom_content
-                pdf_buffer = buffer
+                template = None  # free text: the template's field layout does not apply
             else:
                 # Generate PDF from template
+                template = resolve_lease_template(template)
                 pdf_buffer, filled_content = generate_lease_pdf(tenant, template)
             
             # Save document
-            legal_doc = save_lease_document(tenant, pdf_buffer, filled_content)
+            legal_doc = save_lease_document(tenant, pdf_buffer, filled_content, template=template)
             
             # Serialize and return
             serializer = self.get_serializer(legal_doc)
@@ -1780,8 +1623,6 @@ class LegalDocumentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def generate_notice(self, request):
         """Generate and send a legal notice to a tenant with auto-populated details."""
-        from .email_service import send_notice_to_tenant
-        import base64
         tenant_id = request.data.get('tenant_id')
         notice_type = request.data.get('notice_type', 'Notice of Late Rent')
         
@@ -1800,69 +1641,9 @@ class LegalDocumentViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            # Generate notice content with auto-populated tenant details
-            notice_content = generate_notice_content(tenant, notice_type)
-            
-            # Create PDF
-            buffer = BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter,
-                                   rightMargin=72, leftMargin=72,
-                                   topMargin=72, bottomMargin=18)
-            elements = []
-            styles = getSampleStyleSheet()
-            
-            # Title
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                textColor=colors.HexColor('#1e293b'),
-                spaceAfter=30,
-                alignment=1,
-            )
-            elements.append(Paragraph(notice_type.upper(), title_style))
-            elements.append(Spacer(1, 0.3*inch))
-            
-            # Content - split by paragraphs
-            paragraphs = notice_content.split('\n\n')
-            for para in paragraphs:
-                if para.strip():
-                    para = para.strip().replace('\n', '<br/>')
-                    elements.append(Paragraph(para, styles['Normal']))
-                    elements.append(Spacer(1, 0.15*inch))
-            
-            doc.build(elements)
-            buffer.seek(0)
-            
-            # Save legal document
-            filename = f'notice_{tenant.id}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-            legal_doc = LegalDocument.objects.create(
-                tenant=tenant,
-                type=notice_type,
-                generated_content=notice_content,
-                status='Sent',
-                delivery_method='Email'
-            )
-            legal_doc.pdf_file.save(filename, ContentFile(buffer.getvalue()))
-            legal_doc.save()
-            
-            notice_email_sent = False
-            # Send email notification to tenant
-            try:
-                # Pass PDF bytes directly to avoid fetching from remote storage (Cloudinary may require auth)
-                pdf_bytes_b64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
-                try:
-                    send_notice_to_tenant.delay(legal_doc.id, pdf_bytes_b64=pdf_bytes_b64)
-                    logger.info(f"Queued notice email to tenant {tenant.email} for document {legal_doc.id}")
-                    notice_email_sent = True
-                except Exception:
-                    # Celery not available or misconfigured; run inline
-                    send_notice_to_tenant(legal_doc.id, pdf_bytes_b64=pdf_bytes_b64)
-                    logger.info(f"Sent notice email inline to tenant {tenant.email} for document {legal_doc.id}")
-                    notice_email_sent = True
-            except Exception as e:
-                logger.error(f"Failed to send notice email: {e}")
-            
+            # Build the PDF, save the LegalDocument and email the tenant
+            legal_doc, notice_email_sent = _create_and_send_notice(tenant, notice_type)
+
             # Serialize and return
             serializer = self.get_serializer(legal_doc)
             response_data = dict(serializer.data)
@@ -1924,6 +1705,37 @@ class LegalDocumentViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(legal_doc)
         return Response({**serializer.data, 'signing_token': str(signing_token.token)}, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['post'], url_path='generate_lease_batch', permission_classes=[IsAuthenticated])
+    def generate_lease_batch(self, request):
+        """
+        Generate (and by default send for signing) leases for many tenants in the background.
+        POST {tenant_ids: [...]} or {lease_end_from, lease_end_to, status}, optional template_id, send.
+        Returns a report job to poll at /api/report-jobs/{id}/ (progress lists each tenant).
+        """
+        from .lease_batch import MAX_LEASE_BATCH_SIZE, batch_tenants
+        from .report_jobs import enqueue_report_job
+
+        if not is_admin_user(request.user):
+            return Response({'error': 'Batch lease generation is available to admin only.'}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = LeaseBatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.to_params()
+        if params.get('template_id') and not LeaseTemplate.objects.filter(id=params['template_id']).exists():
+            return Response({'error': 'Template not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        count = batch_tenants(params).count()
+        if count == 0:
+            return Response({'error': 'No tenants match'}, status=status.HTTP_400_BAD_REQUEST)
+        if count > MAX_LEASE_BATCH_SIZE:
+            return Response(
+                {'error': f'At most {MAX_LEASE_BATCH_SIZE} tenants per batch ({count} matched)'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        job = enqueue_report_job(kind='lease_batch', params=params, user=request.user)
+        return Response(ReportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
     @action(
         detail=True,
         methods=['post'],
@@ -1937,8 +1749,6 @@ class LegalDocumentViewSet(viewsets.ModelViewSet):
         This is used by the Legal Compliance Center to ensure the email attachment
         matches the preview/template the admin generated.
         """
-        from .email_service import send_notice_to_tenant
-
         legal_doc = self.get_object()
 
         # Frontend supplies delivery_method (Email/Certified Mail) and notice_type
@@ -1956,28 +1766,41 @@ class LegalDocumentViewSet(viewsets.ModelViewSet):
         if tracking_number:
             legal_doc.tracking_number = tracking_number
 
-        # Persist changes before sending the email task.
+        # Persist changes and queue the email in one transaction.
         fields_to_update = ['type', 'status', 'delivery_method']
         if tracking_number:
             fields_to_update.append('tracking_number')
-        legal_doc.save(update_fields=fields_to_update)
+        with transaction.atomic():
+            legal_doc.save(update_fields=fields_to_update)
 
-        # Send email with the PDF attachment from the stored document.
-        if not legal_doc.pdf_file:
-            return Response(
-                {'error': 'No PDF file available. Generate the notice first.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            # Send email with the PDF attachment from the stored document.
+            if not legal_doc.pdf_file:
+                return Response(
+                    {'error': 'No PDF file available. Generate the notice first.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-        try:
-            send_notice_to_tenant.delay(legal_doc.id)
-        except Exception:
-            # Celery may be misconfigured; fail-safe: send inline.
-            send_notice_to_tenant(legal_doc.id)
+            enqueue_email('send_notice_to_tenant', legal_doc.id)
 
         serializer = self.get_serializer(legal_doc)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def _pdf_access_denied(self, request, legal_doc):
+        """403 response when an authenticated tenant asks for someone else's document."""
+        if not request.user.is_authenticated:
+            return None
+        # Check if user is a tenant and owns this document
+        try:
+            tenant = Tenant.objects.filter(email=request.user.email).first()
+            if tenant and legal_doc.tenant_id != tenant.id:
+                # User is authenticated but doesn't own this document
+                return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+        except Exception as e:
+            logger.warning(f"Error verifying tenant ownership for PDF access: {e}")
+            # If verification fails, deny access for security
+            return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+        return None
+
     @action(detail=True, methods=['get'], url_path='pdf', permission_classes=[AllowAny])
     def pdf(self, request, pk=None):
         """
@@ -1989,58 +1812,75 @@ class LegalDocumentViewSet(viewsets.ModelViewSet):
             legal_doc = LegalDocument.objects.get(pk=pk)
         except LegalDocument.DoesNotExist:
             return Response({'error': 'Document not found'}, status=status.HTTP_404_NOT_FOUND)
-        
-        # Verify tenant ownership if user is authenticated
-        if request.user.is_authenticated:
-            # Check if user is a tenant and owns this document
-            try:
-                tenant = Tenant.objects.filter(email=request.user.email).first()
-                if tenant and legal_doc.tenant_id != tenant.id:
-                    # User is authenticated but doesn't own this document
-                    return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
-            except Exception as e:
-                logger.warning(f"Error verifying tenant ownership for PDF access: {e}")
-                # If verification fails, deny access for security
-                return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+
+        denied = self._pdf_access_denied(request, legal_doc)
+        if denied:
+            return denied
         # For unauthenticated access, we allow it but this should ideally be secured with a signed URL or token
         # For now, allowing unauthenticated access to support direct link downloads
-        
+
         if not legal_doc.pdf_file:
             return Response({'error': 'No PDF found'}, status=status.HTTP_404_NOT_FOUND)
 
-        pdf_bytes = None
-        if hasattr(settings, 'CLOUDINARY_STORAGE') and settings.CLOUDINARY_STORAGE.get('CLOUD_NAME'):
-            public_id = (legal_doc.pdf_file.name or "").lstrip("/")
-            logger.info(f"Attempting to download PDF for document {pk}, path: {public_id}")
-            pdf_bytes = download_cloudinary_file(public_id)
-            if pdf_bytes:
-                logger.info(f"Successfully retrieved PDF for document {pk} ({len(pdf_bytes)} bytes)")
-        if not pdf_bytes:
-            try:
-                legal_doc.pdf_file.open('rb')
-                pdf_bytes = legal_doc.pdf_file.read()
-                legal_doc.pdf_file.close()
-            except Exception as e:
-                logger.warning(f"Could not read PDF file for document {pk}: {e}")
-        if not pdf_bytes:
+        logger.info(f"Attempting to download PDF for document {pk}, path: {legal_doc.pdf_file.name}")
+        pdf_handle, source_name = open_document_source(_legal_pdf_sources(legal_doc))
+        if pdf_handle is None:
+            logger.warning(f"Could not read PDF file for document {pk}")
             return Response({'error': 'Could not retrieve PDF'}, status=status.HTTP_404_NOT_FOUND)
 
-        return HttpResponse(pdf_bytes, content_type="application/pdf")
+        return ranged_file_response(
+            request,
+            pdf_handle,
+            content_type="application/pdf",
+            etag_source=source_name,
+        )
+
+    @action(detail=True, methods=['get'], url_path='pdf-url', permission_classes=[IsAuthenticated])
+    def pdf_url(self, request, pk=None):
+        """
+        Mint a short-lived signed URL for the lease PDF.
+        GET /api/legal-documents/{id}/pdf-url/?ttl=300
+        """
+        try:
+            legal_doc = LegalDocument.objects.get(pk=pk)
+        except LegalDocument.DoesNotExist:
+            return Response({'error': 'Document not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        denied = self._pdf_access_denied(request, legal_doc)
+        if denied:
+            return denied
+        if not legal_doc.pdf_file:
+            return Response({'error': 'No PDF found'}, status=status.HTTP_404_NOT_FOUND)
+
+        return _signed_url_response(
+            request,
+            scope=legal_document_scope(legal_doc.id),
+            sources=_legal_pdf_sources(legal_doc),
+            content_type='application/pdf',
+        )
+
+    @action(detail=True, methods=['post'], url_path='revoke-pdf-urls', permission_classes=[IsAuthenticated])
+    def revoke_pdf_urls(self, request, pk=None):
+        """Invalidate every signed PDF URL minted for this document (admin only)."""
+        if not is_admin_user(request.user):
+            return Response({'error': 'Revoking document links is available to admin only.'}, status=status.HTTP_403_FORBIDDEN)
+        legal_doc = self.get_object()
+        try:
+            version = revoke_document_urls(legal_document_scope(legal_doc.id))
+        except DocumentUrlUnavailable as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({'revoked': True, 'version': version})
 
     def perform_update(self, serializer):
         old_instance = self.get_object()
         old_signed_at = old_instance.signed_at
-        legal_doc = serializer.save()
-        new_signed_at = legal_doc.signed_at
-        
-        # If lease is signed (signed_at is set), send confirmation
-        if not old_signed_at and new_signed_at:
-            try:
-                task = send_lease_signed_confirmation.delay(legal_doc.id)
-                logger.info(f"Lease signed confirmation task submitted to Celery: {task.id}")
-            except Exception as e:
-                logger.warning(f"Celery connection failed, using threading fallback for lease signed confirmation: {e}")
-                send_lease_signed_confirmation(legal_doc.id)
+        with transaction.atomic():
+            legal_doc = serializer.save()
+            new_signed_at = legal_doc.signed_at
+            
+            # If lease is signed (signed_at is set), send confirmation
+            if not old_signed_at and new_signed_at:
+                enqueue_email('send_lease_signed_confirmation', legal_doc.id)
 
 
 class ListingViewSet(viewsets.ModelViewSet):
@@ -2048,6 +1888,12 @@ class ListingViewSet(viewsets.ModelViewSet):
     serializer_class = ListingSerializer
     permission_classes = [AllowAny]  # Public access for listings
 
+    def perform_create(self, serializer):
+        schedule_derivatives(serializer.save())
+
+    def perform_update(self, serializer):
+        schedule_derivatives(serializer.save())
+
 def _clean_property_name_and_address(name, address, city, state):
     """Strip unit + duplicate city/state from address. Keep catalog unit names as-is."""
     unit_label, address_no_unit = extract_unit_from_address(address)
@@ -2095,12 +1941,12 @@ class PropertyViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         if is_property_manager(self.request.user):
             raise PermissionDenied('Only admin can add properties.')
-        serializer.save()
+        schedule_derivatives(serializer.save())
 
     def perform_update(self, serializer):
         if is_property_manager(self.request.user):
             raise PermissionDenied('Only admin can edit properties.')
-        serializer.save()
+        schedule_derivatives(serializer.save())
 
     def perform_destroy(self, instance):
         if is_property_manager(self.request.user):
@@ -2157,13 +2003,10 @@ class ShortStayBookingViewSet(viewsets.ModelViewSet):
                 data['guest_id_files_upload'] = id_files
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
-        booking = serializer.save()
-
-        if booking.proof_of_payment_files:
-            try:
-                send_short_stay_proof_notification_to_admin.delay(booking.id)
-            except Exception as e:
-                logger.warning(f"Queued short-stay proof notification failed, skipping sync send: {e}")
+        with transaction.atomic():
+            booking = serializer.save()
+            if booking.proof_of_payment_files:
+                enqueue_email('send_short_stay_proof_notification_to_admin', booking.id)
 
         headers = self.get_success_headers(serializer.data)
         return Response({
@@ -2282,45 +2125,55 @@ class ShortStayBookingViewSet(viewsets.ModelViewSet):
         if not raw_path:
             return Response({'error': 'path is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        normalized_path = raw_path.lstrip('/').replace('\\', '/')
-        normalized_no_media = re.sub(r'^media/', '', normalized_path, flags=re.IGNORECASE)
-        expected_prefix = f'short_stays/booking_{booking.id}/'
-        if not normalized_no_media.startswith(expected_prefix):
+        normalized_no_media = _normalize_upload_path(raw_path, f'short_stays/booking_{booking.id}/')
+        if normalized_no_media is None:
             return Response({'error': 'Invalid document path'}, status=status.HTTP_403_FORBIDDEN)
 
-        original_filename = request.query_params.get('filename')
-        if not original_filename:
-            all_docs = []
-            for arr in [booking.proof_of_payment_files or [], booking.guest_id_files or []]:
-                if isinstance(arr, list):
-                    all_docs.extend([x for x in arr if isinstance(x, dict)])
-            for doc in all_docs:
-                doc_path = str(doc.get('path') or doc.get('file') or '').lstrip('/').replace('\\', '/')
-                doc_no_media = re.sub(r'^media/', '', doc_path, flags=re.IGNORECASE)
-                if doc_no_media == normalized_no_media and doc.get('filename'):
-                    original_filename = str(doc.get('filename'))
-                    break
-        if not original_filename:
-            original_filename = normalized_no_media.split('/')[-1]
-
-        candidate_paths = [normalized_no_media, f"media/{normalized_no_media}"]
-        file_handle = None
-        for candidate in candidate_paths:
-            try:
-                file_handle = default_storage.open(candidate, 'rb')
-                normalized_no_media = candidate
-                break
-            except Exception:
-                continue
+        original_filename = request.query_params.get('filename') or _uploaded_document_filename(
+            [booking.proof_of_payment_files or [], booking.guest_id_files or []],
+            normalized_no_media,
+        )
 
+        file_handle, source_name = open_document_source(_upload_sources(normalized_no_media))
         if not file_handle:
             return Response({'error': 'File not found'}, status=status.HTTP_404_NOT_FOUND)
 
         content_type, _ = mimetypes.guess_type(original_filename)
-        response = FileResponse(file_handle, content_type=content_type or 'application/octet-stream')
         disposition = 'inline' if request.query_params.get('download') != '1' else 'attachment'
-        response['Content-Disposition'] = f'{disposition}; filename="{original_filename}"'
-        return response
+        return ranged_file_response(
+            request,
+            file_handle,
+            content_type=content_type or 'application/octet-stream',
+            etag_source=source_name,
+            filename=original_filename,
+            disposition=disposition,
+        )
+
+    @action(detail=True, methods=['get'], url_path='document-url')
+    def document_url(self, request, pk=None):
+        """Mint a short-lived signed URL for a booking document (same checks as /document/)."""
+        booking = self.get_object()
+        raw_path = (request.query_params.get('path') or '').strip()
+        if not raw_path:
+            return Response({'error': 'path is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        normalized_no_media = _normalize_upload_path(raw_path, f'short_stays/booking_{booking.id}/')
+        if normalized_no_media is None:
+            return Response({'error': 'Invalid document path'}, status=status.HTTP_403_FORBIDDEN)
+
+        original_filename = request.query_params.get('filename') or _uploaded_document_filename(
+            [booking.proof_of_payment_files or [], booking.guest_id_files or []],
+            normalized_no_media,
+        )
+        content_type, _ = mimetypes.guess_type(original_filename)
+        return _signed_url_response(
+            request,
+            scope=booking_scope(booking.id),
+            sources=_upload_sources(normalized_no_media),
+            content_type=content_type or 'application/octet-stream',
+            filename=original_filename,
+            disposition='inline' if request.query_params.get('download') != '1' else 'attachment',
+        )
 
     @action(detail=False, methods=['get'], url_path='booked-dates')
     def booked_dates(self, request):
@@ -2517,7 +2370,8 @@ class EmailTestViewSet(viewsets.ViewSet):
 def sign_lease_by_token(request):
     """
     GET  /api/sign-lease/?token=<uuid>  — validate token, return signing metadata
-    POST /api/sign-lease/?token=<uuid>  — submit signed fields, stamp PDF, mark Signed
+    POST /api/sign-lease/?token=<uuid>  — submit signed fields; the PDF is stamped on the
+                                          PDF worker (202 'Signing' until it is published)
 
     No login required. The token is a one-time link sent via email by the admin.
     """
@@ -2541,24 +2395,7 @@ def sign_lease_by_token(request):
         request_obj = request._request if hasattr(request, '_request') else request
         pdf_proxy_url = request_obj.build_absolute_uri(f"/api/legal-documents/{legal_doc.id}/pdf/")
 
-        fields = []
-        if (legal_doc.type or '').lower() == 'lease agreement':
-            fields = [
-                {"id": "agree_terms", "type": "checkbox", "label": "I agree to the terms",
-                 "page": 1, "x": 0.12, "y": 0.72, "width": 0.04, "height": 0.04, "required": True},
-                {"id": "agree_rules", "type": "checkbox", "label": "I agree to community rules",
-                 "page": 1, "x": 0.12, "y": 0.76, "width": 0.04, "height": 0.04, "required": True},
-                {"id": "tenant_initials", "type": "text", "label": "Initials",
-                 "page": 1, "x": 0.55, "y": 0.72, "width": 0.12, "height": 0.04, "required": True},
-                {"id": "tenant_signature", "type": "signature", "label": "Tenant Signature",
-                 "page": 1, "x": 0.12, "y": 0.82, "width": 0.35, "height": 0.07, "required": True},
-                {"id": "tenant_signature_date", "type": "text", "label": "Date",
-                 "page": 1, "x": 0.52, "y": 0.82, "width": 0.15, "height": 0.05, "required": True},
-                {"id": "landlord_signature", "type": "signature", "label": "Landlord Signature",
-                 "page": 1, "x": 0.12, "y": 0.9, "width": 0.35, "height": 0.07, "required": False},
-                {"id": "landlord_signature_date", "type": "text", "label": "Date",
-                 "page": 1, "x": 0.52, "y": 0.9, "width": 0.15, "height": 0.05, "required": False},
-            ]
+        fields = fields_for_document(legal_doc)
 
         return Response({
             'id': legal_doc.id,
@@ -2574,35 +2411,13 @@ def sign_lease_by_token(request):
 
     # POST — submit signed values
     values = request.data.get('values')
-    fields = request.data.get('fields')
+    # Stamp at the registered layout; client-sent fields only for documents without one.
+    fields = fields_for_document(legal_doc) or request.data.get('fields')
     if not isinstance(values, dict):
         return Response({'error': 'values must be an object'}, status=status.HTTP_400_BAD_REQUEST)
     if not isinstance(fields, list):
         return Response({'error': 'fields must be an array'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Download original PDF
-    pdf_bytes = None
-    if hasattr(settings, 'CLOUDINARY_STORAGE') and settings.CLOUDINARY_STORAGE.get('CLOUD_NAME'):
-        public_id = (legal_doc.pdf_file.name or '').lstrip('/')
-        pdf_bytes = download_cloudinary_file(public_id)
-    if not pdf_bytes:
-        try:
-            legal_doc.pdf_file.open('rb')
-            pdf_bytes = legal_doc.pdf_file.read()
-            legal_doc.pdf_file.close()
-        except Exception as e:
-            logger.warning(f"Could not read PDF for token signing: {e}")
-    if not pdf_bytes:
-        return Response({'error': 'Could not retrieve PDF'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-    # Stamp PDF
-    try:
-        signed_pdf_bytes = stamp_signed_pdf(pdf_bytes, fields, values)
-    except Exception as e:
-        logger.error(f"Error stamping PDF (token signing): {e}", exc_info=True)
-        return Response({'error': f'Failed to stamp PDF: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-    filename = f"signed_lease_{legal_doc.tenant_id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
     request_obj = request._request if hasattr(request, '_request') else request
     # Collect non-signature inline field values filled in by the tenant
     inline_filled = {
@@ -2621,65 +2436,51 @@ def sign_lease_by_token(request):
     if inline_filled:
         audit['filled_fields'] = inline_filled
 
-    # Save signed PDF
-    if hasattr(settings, 'CLOUDINARY_STORAGE') and settings.CLOUDINARY_STORAGE.get('CLOUD_NAME'):
-        try:
-            import cloudinary.uploader
-            if not cloudinary.config().api_secret:
-                cloudinary.config(
-                    cloud_name=settings.CLOUDINARY_STORAGE['CLOUD_NAME'],
-                    api_key=settings.CLOUDINARY_STORAGE['API_KEY'],
-                    api_secret=settings.CLOUDINARY_STORAGE['API_SECRET'],
-                )
-            public_id_new = f"media/signed_leases/{filename}"
-            if public_id_new.lower().endswith('.pdf'):
-                public_id_new = public_id_new[:-4]
-            upload_result = cloudinary.uploader.upload(
-                signed_pdf_bytes,
-                resource_type="raw",
-                public_id=public_id_new,
-                type="upload",
-                format="pdf",
-            )
-            legal_doc.pdf_file.name = upload_result.get('public_id') or public_id_new
-        except Exception as e:
-            logger.error(f"Cloudinary upload failed for token-signed PDF: {e}")
-            legal_doc.pdf_file.save(filename, ContentFile(signed_pdf_bytes), save=False)
-    else:
-        legal_doc.pdf_file.save(filename, ContentFile(signed_pdf_bytes), save=False)
-
-    legal_doc.status = 'Signed'
-    legal_doc.signed_at = timezone.now()
-    legal_doc.signing_audit = audit
-    legal_doc.save()
-
-    # Mark token as used
-    signing_token.used_at = timezone.now()
-    signing_token.save(update_fields=['used_at'])
-
-    # Update tenant lease status
-    tenant = legal_doc.tenant
-    tenant.lease_status = 'Signed'
-    # Auto-activate resident once signing is completed (tenant-only or tenant+landlord flow).
-    if tenant.status != 'Active':
-        tenant.status = 'Active'
-        tenant.save(update_fields=['lease_status', 'status'])
-    else:
-        tenant.save(update_fields=['lease_status'])
-
-    # Send confirmation emails
+    # Marks the token used and queues stamping on the PDF worker.
     try:
-        from .email_service import send_lease_signed_confirmation
-        try:
-            send_lease_signed_confirmation.delay(legal_doc.id)
-        except Exception:
-            send_lease_signed_confirmation(legal_doc.id)
-    except Exception as e:
-        logger.error(f"Failed to send signed confirmation after token signing: {e}")
+        legal_doc = queue_signed_lease(
+            legal_doc, values=values, fields=fields, audit=audit, signing_token=signing_token,
+        )
+    except SigningConflict as e:
+        return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
 
     pdf_url = request_obj.build_absolute_uri(f"/api/legal-documents/{legal_doc.id}/pdf/")
+    stamp_status = (legal_doc.signing_audit or {}).get('stamp', {}).get('status')
+    if stamp_status == 'failed':
+        return Response({'error': 'Failed to stamp PDF'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     return Response({
-        'status': 'Signed',
+        'status': legal_doc.status,
+        'stamp_status': stamp_status,
         'pdf_url': pdf_url,
-        'signed_at': legal_doc.signed_at.isoformat(),
-    }, status=status.HTTP_200_OK)
+        'signed_at': legal_doc.signed_at.isoformat() if legal_doc.signed_at else None,
+    }, status=status.HTTP_200_OK if legal_doc.status == 'Signed' else status.HTTP_202_ACCEPTED)
+
+
+@require_safe
+def signed_document(request, token):
+    """
+    Serve a document from a signed URL minted by a */document-url/ or */pdf-url/ endpoint.
+    GET /api/documents/{token}/
+    Plain Django view: the token is the credential, so no JWT decode and no DB query.
+    """
+    try:
+        claims = verify_document_token(token)
+    except DocumentUrlUnavailable as e:
+        return JsonResponse({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    except DocumentUrlError as e:
+        return JsonResponse({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+
+    file_handle, source_name = open_document_source(claims.get('src'))
+    if file_handle is None:
+        return JsonResponse({'error': 'Document not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    remaining = max(0, int(claims['exp'] - time.time()))
+    return ranged_file_response(
+        request,
+        file_handle,
+        content_type=claims.get('ct') or 'application/octet-stream',
+        etag_source=f"{source_name}:{claims.get('v', 0)}",
+        filename=claims.get('fn'),
+        disposition=claims.get('d') or 'inline',
+        cache_control=f'private, max-age={remaining}',
+    )
@@ -46,6 +46,29 @@ try:
 except Exception:
     pass
 
+from celery.signals import worker_process_init, worker_process_shutdown
+
+
+@worker_process_init.connect
+def warm_email_templates(**kwargs):
+    """Compile the email templates once per worker child (api.email_rendering)."""
+    try:
+        from api.email_rendering import warm_email_templates as warm
+        warm()
+    except Exception:
+        logger.warning("Could not warm email templates", exc_info=True)
+
+
+@worker_process_shutdown.connect
+def close_email_connection(**kwargs):
+    """Close the pooled email connection (api.email_connections) when a worker child exits."""
+    try:
+        from api.email_connections import close_pooled_connection
+        close_pooled_connection()
+    except Exception:
+        pass
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
@@ -63,5 +86,17 @@ app.conf.beat_schedule = {
         'task': 'api.tasks.send_rent_reminders',
         'schedule': crontab(hour=8, minute=0),  # Run daily at 8 AM
     },
+    'drain-email-outbox-every-minute': {
+        'task': 'api.tasks.drain_email_outbox',
+        'schedule': crontab(),  # Every minute; picks up emails whose nudge was lost
+    },
+    'release-stuck-signed-leases': {
+        'task': 'api.tasks.release_stuck_signed_leases',
+        'schedule': crontab(minute='*/5'),  # Every 5 minutes; stamps killed past the time limit
+    },
+    'purge-expired-report-jobs-hourly': {
+        'task': 'api.tasks.purge_expired_report_jobs',
+        'schedule': crontab(minute=15),  # Run hourly at :15
+    },
 }
 
@@ -69,6 +69,18 @@ CLOUDINARY_STORAGE = {
     'API_KEY': os.environ.get('CLOUDINARY_API_KEY'),
     'API_SECRET': os.environ.get('CLOUDINARY_API_SECRET'),
 }
+# Local LRU cache of downloaded Cloudinary documents (lease PDFs, tenant uploads); 0 disables it
+CLOUDINARY_FILE_CACHE_DIR = os.environ.get('CLOUDINARY_FILE_CACHE_DIR', '').strip() or None
+CLOUDINARY_FILE_CACHE_MAX_BYTES = int(os.environ.get('CLOUDINARY_FILE_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+# Parallel variant probes when a document's Cloudinary delivery type is unknown
+CLOUDINARY_PROBE_WORKERS = int(os.environ.get('CLOUDINARY_PROBE_WORKERS', '6'))
+# Signed document URLs (/api/documents/<token>/): default and maximum lifetime in seconds
+DOCUMENT_URL_TTL_SECONDS = int(os.environ.get('DOCUMENT_URL_TTL_SECONDS', '300'))
+DOCUMENT_URL_MAX_TTL_SECONDS = int(os.environ.get('DOCUMENT_URL_MAX_TTL_SECONDS', '3600'))
+# Concurrent storage saves for tenant/booking document uploads
+UPLOAD_WORKERS = int(os.environ.get('UPLOAD_WORKERS', '4'))
+# Render/upload pool for batch lease generation (/legal-documents/generate_lease_batch/)
+LEASE_BATCH_WORKERS = int(os.environ.get('LEASE_BATCH_WORKERS', '4'))
 
 # Storage Configuration (Django 4.2+)
 STORAGES = {
@@ -228,7 +240,9 @@ AUTH_USER_MODEL = 'accounts.User'
 SENDGRID_API_KEY = os.environ.get('SENDGRID_API_KEY')
 
 if SENDGRID_API_KEY:
-    EMAIL_BACKEND = "anymail.backends.sendgrid.EmailBackend"  # Use Anymail instead of custom backend
+    # Anymail by default; set SENDGRID_EMAIL_BACKEND=api.sendgrid_backend.SendGridBackend for batched personalizations
+    EMAIL_BACKEND = os.environ.get('SENDGRID_EMAIL_BACKEND', "anymail.backends.sendgrid.EmailBackend")
+    SENDGRID_API_HOST = os.environ.get('SENDGRID_API_HOST', 'https://api.sendgrid.com')
     ANYMAIL = {
         "SENDGRID_API_KEY": SENDGRID_API_KEY,
     }
@@ -248,6 +262,15 @@ else:
     EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
     EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', '10'))
     DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER)
+# Pooled email connection (api.email_connections): recycle after this many idle seconds / sends
+EMAIL_CONNECTION_MAX_IDLE_SECONDS = int(os.environ.get('EMAIL_CONNECTION_MAX_IDLE_SECONDS', '60'))
+EMAIL_CONNECTION_MAX_MESSAGES = int(os.environ.get('EMAIL_CONNECTION_MAX_MESSAGES', '500'))
+# Email outbox (api.email_outbox): rows per drain batch, attempts before failing, first retry delay (s)
+EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', '50'))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', '6'))
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = int(os.environ.get('EMAIL_OUTBOX_RETRY_BASE_SECONDS', '60'))
+# Payments per send_payment_reminders task in the daily rent reminder fan-out
+RENT_REMINDER_CHUNK_SIZE = int(os.environ.get('RENT_REMINDER_CHUNK_SIZE', '50'))
 # Landlord/Admin contact (used for lease placeholders, signing, emails)
 LANDLORD_EMAIL = os.environ.get('LANDLORD_EMAIL', '').strip() or None
 LANDLORD_NAME = os.environ.get('LANDLORD_NAME', '').strip() or None
@@ -261,6 +284,16 @@ PROPERTY_DEFAULT_CITY_STATE_ZIP = os.environ.get('PROPERTY_DEFAULT_CITY_STATE_ZI
 # Admin notification emails (proof of payment, applications, etc.)
 ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', '').strip() or None
 
+# Hosts image derivatives may download a URL source from (Listing image URLs are client-supplied)
+IMAGE_DERIVATIVE_SOURCE_HOSTS = [
+    h.strip().lower()
+    for h in os.environ.get('IMAGE_DERIVATIVE_SOURCE_HOSTS', 'res.cloudinary.com').split(',')
+    if h.strip()
+]
+
+# Income statement monthly engine: 'decimal' (default) or 'numpy' (requires numpy to be installed)
+PNL_MONTHLY_ENGINE = os.environ.get('PNL_MONTHLY_ENGINE', 'decimal').strip().lower() or 'decimal'
+
 logger = logging.getLogger(__name__)
 
 # Celery Configuration
@@ -289,6 +322,33 @@ if CELERY_BROKER_URL.startswith('rediss://'):
         'ssl_cert_reqs': ssl.CERT_NONE
     }
 
+# Idempotent email tasks (api.idempotency): key store (broker Redis by default) and TTLs in seconds
+IDEMPOTENCY_REDIS_URL = os.environ.get(
+    'IDEMPOTENCY_REDIS_URL',
+    CELERY_BROKER_URL.replace('ssl_cert_reqs=CERT_NONE', 'ssl_cert_reqs=none'),
+)
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', '3600'))
+IDEMPOTENCY_RUNNING_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_RUNNING_TTL_SECONDS', '600'))
+
+# Django cache shared by gunicorn and every Celery worker (document URL revocation, admin recipients,
+# Cloudinary variant memo). Redis: CACHE_URL, else the broker when CELERY_BROKER_URL is set.
+# Without either (local development) each process gets its own in-memory cache.
+CACHE_URL = os.environ.get('CACHE_URL') or (IDEMPOTENCY_REDIS_URL if os.environ.get('CELERY_BROKER_URL') else '')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+            'KEY_PREFIX': 'neela',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
@@ -301,6 +361,19 @@ if sys.platform == 'win32':
 else:
     CELERY_WORKER_POOL = 'prefork'  # Use prefork on Linux/Mac
 
+# Signed-lease PDF stamping runs on its own queue so large PDFs cannot starve email/report workers.
+# Run a dedicated worker: celery -A neela_backend worker -Q pdf --concurrency=1 --max-memory-per-child=<KB>
+PDF_STAMP_QUEUE = os.environ.get('PDF_STAMP_QUEUE', 'pdf')
+CELERY_TASK_ROUTES = {
+    'api.tasks.stamp_signed_lease': {'queue': PDF_STAMP_QUEUE},
+}
+# Per-task limits (seconds) and the largest lease PDF the stamper will open (bytes)
+PDF_STAMP_SOFT_TIME_LIMIT = int(os.environ.get('PDF_STAMP_SOFT_TIME_LIMIT', '120'))
+PDF_STAMP_TIME_LIMIT = int(os.environ.get('PDF_STAMP_TIME_LIMIT', '180'))
+# A document still 'Signing' this long after queueing is released by the beat sweeper.
+PDF_STAMP_STALE_SECONDS = int(os.environ.get('PDF_STAMP_STALE_SECONDS', str(PDF_STAMP_TIME_LIMIT + 120)))
+PDF_STAMP_MAX_BYTES = int(os.environ.get('PDF_STAMP_MAX_BYTES', str(50 * 1024 * 1024)))
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -16,6 +16,18 @@ python manage.py create_superuser_from_env
 echo "Starting Celery worker..."
 celery -A neela_backend worker --loglevel=info --concurrency=2 &
 
+# PDF stamping worker: one process, recycled once it grows past PDF_WORKER_MAX_MEMORY_KB
+echo "Starting PDF stamping worker..."
+celery -A neela_backend worker --loglevel=info -Q "${PDF_STAMP_QUEUE:-pdf}" --concurrency=1 \
+    --max-memory-per-child="${PDF_WORKER_MAX_MEMORY_KB:-400000}" -n "pdf@%h" &
+
+# Celery beat: periodic tasks (email outbox drain, report job purge, lease renewals, rent reminders).
+# Run exactly one beat per deployment; set RUN_CELERY_BEAT=0 on any additional instances.
+if [ "${RUN_CELERY_BEAT:-1}" = "1" ]; then
+    echo "Starting Celery beat..."
+    celery -A neela_backend beat --loglevel=info --schedule="${CELERY_BEAT_SCHEDULE_FILE:-/tmp/celerybeat-schedule}" &
+fi
+
 # Start Gunicorn
 echo "Starting Gunicorn..."
 gunicorn neela_backend.wsgi:application --bind 0.0.0.0:$PORT
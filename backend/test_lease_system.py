@@ -10,7 +10,7 @@ print("="*70)
 
 from api.models import Tenant, LegalDocument
 from api.lease_service import generate_lease_pdf, save_lease_document
-from api.views import download_cloudinary_file
+from api.cloudinary_files import download_cloudinary_file
 import os
 
 # Test Configuration